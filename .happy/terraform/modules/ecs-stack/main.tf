@@ -167,6 +167,19 @@ module category_dynamodb_table {
                           {
                             name = "version_hash"
                             type = "S"
+                          },
+                          {
+                            name = "version"
+                            type = "S"
+                          }
+                        ]
+  global_secondary_indexes = [
+                          {
+                            name               = "${local.custom_stack_name}-category-version"
+                            hash_key           = "version"
+                            range_key          = "name"
+                            projection_type    = "INCLUDE"
+                            non_key_attributes = ["formatted_name", "dimension", "hierarchy", "label"]
                           }
                         ]
   autoscaling_enabled = var.env == "dev" ? false : true
@@ -287,6 +300,8 @@ module backend_lambda {
     "SNOWFLAKE_PASSWORD" = local.snowflake_password
     "API_KEY" = random_uuid.api_key.result
     "STACK_NAME" = local.custom_stack_name
+    "PREVIEW_QUEUE" = "sqs"
+    "PREVIEW_QUEUE_URL" = aws_sqs_queue.preview_jobs_queue.url
   }
 
   log_retention_in_days = local.log_retention_period
@@ -379,6 +394,22 @@ resource "aws_lambda_event_source_mapping" "data_workflow_sqs_event_source_mappi
   batch_size       = 1
 }
 
+resource aws_sqs_queue preview_jobs_queue {
+  name                        = "${local.custom_stack_name}-preview-jobs"
+  delay_seconds               = 0
+  message_retention_seconds   = var.env == "dev" ? 600 : 86400
+  receive_wait_time_seconds   = 20
+  visibility_timeout_seconds  = 300
+  tags                        = var.tags
+}
+
+resource "aws_lambda_event_source_mapping" "preview_jobs_sqs_event_source_mapping" {
+  event_source_arn        = aws_sqs_queue.preview_jobs_queue.arn
+  function_name           = module.backend_lambda.function_arn
+  batch_size              = 4
+  function_response_types = ["ReportBatchItemFailures"]
+}
+
 module api_gateway_proxy_stage {
   source               = "../api-gateway-proxy-stage"
   lambda_function_name = local.backend_function_name
@@ -499,6 +530,7 @@ data aws_iam_policy_document backend_policy {
       module.install_dynamodb_table.table_arn,
       module.github_dynamodb_table.table_arn,
       module.category_dynamodb_table.table_arn,
+      "${module.category_dynamodb_table.table_arn}/index/*",
       module.plugin_metadata_dynamodb_table.table_arn,
       module.plugin_dynamodb_table.table_arn,
       module.plugin_blocked_dynamodb_table.table_arn,
@@ -512,7 +544,28 @@ data aws_iam_policy_document backend_policy {
 
     resources = [
       module.install_dynamodb_table.table_arn,
+      module.plugin_metadata_dynamodb_table.table_arn,
+    ]
+  }
+
+  statement {
+    actions = [
+      "dynamodb:BatchWriteItem",
+    ]
+
+    resources = [
+      module.plugin_metadata_dynamodb_table.table_arn,
+    ]
+  }
+
+  statement {
+    actions = [
+      "sqs:SendMessage",
+      "sqs:ReceiveMessage",
+      "sqs:DeleteMessage",
+      "sqs:GetQueueAttributes",
     ]
+    resources = [aws_sqs_queue.preview_jobs_queue.arn]
   }
 
   statement {
@@ -536,6 +589,7 @@ data aws_iam_policy_document data_workflows_policy {
   }
   statement {
     actions = [
+      "dynamodb:BatchGetItem",
       "dynamodb:BatchWriteItem",
       "dynamodb:GetItem",
       "dynamodb:Query",
@@ -587,6 +641,8 @@ data aws_iam_policy_document plugins_policy {
 
   statement {
     actions = [
+      "dynamodb:BatchGetItem",
+      "dynamodb:BatchWriteItem",
       "dynamodb:GetItem",
       "dynamodb:PutItem",
     ]
@@ -0,0 +1,80 @@
+import threading
+import time
+from collections import defaultdict
+from unittest.mock import patch
+
+import pytest
+
+from api import model
+from utils.utils import get_category_mapping
+
+VERSION = 'EDAM-BIOIMAGING:alpha06'
+MAPPINGS = {
+    'Manual segmentation': [
+        {'label': 'Image Segmentation', 'dimension': 'Operation',
+         'hierarchy': ['Image segmentation', 'Manual segmentation']},
+        {'label': 'Image annotation', 'dimension': 'Operation',
+         'hierarchy': ['Image annotation', 'Dense image annotation', 'Manual segmentation']},
+    ],
+    'Image segmentation': [
+        {'label': 'Image Segmentation', 'dimension': 'Operation', 'hierarchy': ['Image segmentation']},
+    ],
+    'Fluorescence microscopy': [
+        {'label': 'Fluorescence microscopy', 'dimension': 'Image modality',
+         'hierarchy': ['Optical light microscopy', 'Fluorescence microscopy']},
+    ],
+}
+
+
+def _get_categories_per_match(terms, mappings):
+    categories = defaultdict(list)
+    category_hierarchy = defaultdict(list)
+    for term in terms:
+        for match in get_category_mapping(term, mappings):
+            if match['label'] not in categories[match['dimension']]:
+                categories[match['dimension']].append(match['label'])
+            category_hierarchy[match['dimension']].append([match['label'], *match['hierarchy'][1:]])
+    return categories, category_hierarchy
+
+
+class TestCategoryMapping:
+
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        model._category_mappings.clear()
+        yield
+        model._category_mappings.clear()
+
+    @pytest.mark.parametrize('terms', [
+        ['Manual segmentation', 'Image segmentation', 'Fluorescence microscopy'],
+        ['Fluorescence microscopy', 'Unknown term', 'Manual segmentation'],
+        [],
+    ])
+    def test_get_plugin_categories(self, terms):
+        with patch.object(model, 'get_cache', return_value=MAPPINGS):
+            actual = model.get_plugin_categories(terms, VERSION)
+
+        assert actual == _get_categories_per_match(terms, MAPPINGS)
+
+    def test_mapping_loaded_once(self):
+        def _slow_get_cache(key):
+            time.sleep(0.05)
+            return MAPPINGS
+
+        with patch.object(model, 'get_cache', side_effect=_slow_get_cache) as mock_get_cache:
+            threads = [threading.Thread(target=model.get_plugin_categories, args=(['Manual segmentation'], VERSION))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert model.get_categories_mapping(VERSION) == MAPPINGS
+            mock_get_cache.assert_called_once_with('category/EDAM-BIOIMAGING/alpha06.json')
+
+    def test_missing_mapping_not_cached(self):
+        with patch.object(model, 'get_cache', return_value=None) as mock_get_cache:
+            assert model.get_categories_mapping(VERSION) == {}
+            assert model.get_categories_mapping(VERSION) == {}
+
+            assert mock_get_cache.call_count == 2
@@ -0,0 +1,72 @@
+from unittest.mock import patch
+
+from api import model
+
+PLUGIN_NAME = 'napari-foo'
+VERSION = '0.1.0'
+MANIFEST = {
+    'display_name': 'Foo',
+    'contributions': {'readers': [{'filename_patterns': ['*.tif']}], 'widgets': [{'command': 'foo.widget'}]},
+}
+MANIFEST_METADATA_KEY = f'cache/{PLUGIN_NAME}/{VERSION}-manifest-metadata-v{model.MANIFEST_METADATA_VERSION}.json'
+
+
+class TestManifestMetadata:
+
+    @patch.object(model, 'get_manifest')
+    @patch.object(model, 'cache')
+    @patch.object(model, 'get_cache', return_value={'display_name': 'Foo'})
+    def test_precomputed_fields_skip_manifest(self, mock_get_cache, mock_cache, mock_get_manifest):
+        assert model.get_frontend_manifest_metadata(PLUGIN_NAME, VERSION) == {'display_name': 'Foo'}
+        mock_get_cache.assert_called_once_with(MANIFEST_METADATA_KEY)
+        mock_get_manifest.assert_not_called()
+        mock_cache.assert_not_called()
+
+    @patch.object(model, 'get_manifest', return_value=MANIFEST)
+    @patch.object(model, 'cache')
+    @patch.object(model, 'get_cache', return_value=None)
+    def test_fields_cached_on_first_read(self, mock_get_cache, mock_cache, mock_get_manifest):
+        expected = model.parse_manifest(MANIFEST)
+
+        assert model.get_frontend_manifest_metadata(PLUGIN_NAME, VERSION) == expected
+        mock_cache.assert_called_once_with(expected, MANIFEST_METADATA_KEY)
+
+    @patch.object(model, 'discover_manifest')
+    @patch.object(model, 'get_manifest', return_value={'error': 'Manifest not yet processed.'})
+    @patch.object(model, 'cache')
+    @patch.object(model, 'get_cache', return_value=None)
+    def test_defaults_not_cached_on_error(self, mock_get_cache, mock_cache, mock_get_manifest, mock_discover):
+        assert model.build_manifest_metadata(PLUGIN_NAME, VERSION) == (PLUGIN_NAME, model.parse_manifest())
+        mock_discover.assert_called_once_with(PLUGIN_NAME, VERSION)
+        mock_cache.assert_not_called()
+
+
+class TestGetManifest:
+
+    @patch.object(model, 'get_cache')
+    @patch.object(model.plugin_metadata_model, 'get_manifest_record',
+                  return_value={'status': 'ok', 'manifest': MANIFEST})
+    @patch.object(model, 'get_valid_plugins', return_value={PLUGIN_NAME: VERSION})
+    def test_manifest_read_from_record(self, mock_plugins, mock_record, mock_get_cache):
+        assert model.get_manifest(PLUGIN_NAME, VERSION) == MANIFEST
+        mock_record.assert_called_once_with(PLUGIN_NAME, VERSION)
+        mock_get_cache.assert_not_called()
+
+    @patch.object(model, 'get_cache')
+    @patch.object(model.plugin_metadata_model, 'get_manifest_record', return_value=None)
+    @patch.object(model, 'get_valid_plugins', return_value={PLUGIN_NAME: VERSION})
+    def test_manifest_not_processed(self, mock_plugins, mock_record, mock_get_cache):
+        assert model.get_manifest(PLUGIN_NAME, VERSION) == {'error': 'Manifest not yet processed.'}
+        mock_get_cache.assert_not_called()
+
+    @patch.object(model.plugin_metadata_model, 'get_manifest_record',
+                  return_value={'status': 'timed-out', 'manifest': {}})
+    @patch.object(model, 'get_valid_plugins', return_value={PLUGIN_NAME: VERSION})
+    def test_failed_manifest(self, mock_plugins, mock_record):
+        assert model.get_manifest(PLUGIN_NAME, VERSION) == {'error': 'Manifest discovery timed-out.'}
+
+    @patch.object(model.plugin_metadata_model, 'get_manifest_record',
+                  return_value={'status': 'error', 'manifest': {'error': 'HTTP Error 404: Not Found'}})
+    @patch.object(model, 'get_valid_plugins', return_value={PLUGIN_NAME: VERSION})
+    def test_failed_manifest_error(self, mock_plugins, mock_record):
+        assert model.get_manifest(PLUGIN_NAME, VERSION) == {'error': 'HTTP Error 404: Not Found'}
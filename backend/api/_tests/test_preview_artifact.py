@@ -0,0 +1,56 @@
+import io
+import zipfile
+from unittest.mock import patch
+
+import boto3
+import pytest
+from moto import mock_s3
+
+from api import model, s3
+
+BUCKET = 'test-bucket'
+FILES = {
+    'index.html': b'<html></html>',
+    '_next/static/main.js': b'console.log("preview")',
+    '_next/static/style.css': b'body {}',
+    'icons/icon.svg': b'<svg></svg>',
+}
+
+
+@pytest.fixture
+def s3_bucket(monkeypatch):
+    monkeypatch.setenv('AWS_ACCESS_KEY_ID', 'testing')
+    monkeypatch.setenv('AWS_SECRET_ACCESS_KEY', 'testing')
+    monkeypatch.setenv('AWS_DEFAULT_REGION', 'us-east-1')
+    with mock_s3():
+        client = boto3.client('s3', region_name='us-east-1')
+        client.create_bucket(Bucket=BUCKET)
+        with patch.object(s3, 's3_client', client), patch.object(s3, 'bucket', BUCKET), \
+                patch.object(s3, 'bucket_path', 'stack'):
+            yield client
+
+
+def _artifact():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as artifact:
+        artifact.writestr('_next/', '')
+        for name, content in FILES.items():
+            artifact.writestr(name, content)
+    buffer.seek(0)
+    return buffer
+
+
+def test_upload_preview_artifact(s3_bucket, tmp_path):
+    model._upload_preview_artifact(_artifact(), str(tmp_path), 'preview/owner/repo/1')
+
+    index = s3_bucket.get_object(Bucket=BUCKET, Key='stack/preview/owner/repo/1')
+    assert index['Body'].read() == FILES['index.html']
+    assert index['ContentType'] == 'text/html'
+    expected_types = {'_next/static/main.js': ('text/javascript', 'application/javascript'),
+                      '_next/static/style.css': ('text/css',),
+                      'icons/icon.svg': ('image/svg+xml',)}
+    for name, content_types in expected_types.items():
+        uploaded = s3_bucket.get_object(Bucket=BUCKET, Key=f'stack/preview/owner/repo/1/{name}')
+        assert uploaded['Body'].read() == FILES[name]
+        assert uploaded['ContentType'] in content_types
+    assert not (tmp_path / 'artifact.zip').exists()
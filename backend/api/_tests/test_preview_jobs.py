@@ -0,0 +1,111 @@
+import json
+import threading
+import time
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from api import model, preview_jobs
+
+PAYLOAD = {
+    'installation': {'id': 1},
+    'repository': {'name': 'napari-foo', 'full_name': 'foo/napari-foo', 'owner': {'login': 'foo'}},
+    'workflow_run': {'pull_requests': [{'number': 7}], 'artifacts_url': 'https://api.github.com/artifacts'},
+}
+COMMENT_KEY = 'cache/preview-comments/foo/napari-foo/7.json'
+
+
+class TestPreviewJobQueue:
+
+    def test_local_queue_bounds_concurrency(self):
+        lock = threading.Lock()
+        running = []
+        peak = []
+
+        def handler(payload):
+            with lock:
+                running.append(payload)
+                peak.append(len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(payload)
+
+        queue = preview_jobs.LocalPreviewJobQueue(handler, max_workers=2)
+        start = time.perf_counter()
+        for i in range(6):
+            queue.enqueue({'id': i})
+        assert time.perf_counter() - start < 0.05
+        queue.join()
+
+        assert len(peak) == 6
+        assert max(peak) == 2
+
+    def test_handle_preview_jobs_reports_failures(self):
+        def handler(payload):
+            if payload['id'] == 1:
+                raise ValueError('failed')
+
+        event = {'Records': [{'messageId': f'message-{i}', 'body': json.dumps({'id': i})} for i in range(3)]}
+        result = preview_jobs.handle_preview_jobs(event, None, handler)
+
+        assert result == {'batchItemFailures': [{'itemIdentifier': 'message-1'}]}
+
+    @pytest.mark.parametrize('mode, url, expected', [
+        ('', None, type(None)),
+        ('local', None, preview_jobs.LocalPreviewJobQueue),
+    ])
+    def test_get_preview_job_queue(self, mode, url, expected, monkeypatch):
+        monkeypatch.setattr(preview_jobs, 'preview_queue_mode', mode)
+        monkeypatch.setattr(preview_jobs, 'preview_queue_url', url)
+        assert isinstance(preview_jobs.get_preview_job_queue(), expected)
+
+    def test_sqs_queue_requires_url(self, monkeypatch):
+        monkeypatch.setattr(preview_jobs, 'preview_queue_mode', 'sqs')
+        monkeypatch.setattr(preview_jobs, 'preview_queue_url', None)
+        with pytest.raises(ValueError):
+            preview_jobs.get_preview_job_queue()
+
+
+@patch.object(model, '_upload_preview_artifact')
+@patch.object(model, 'get_artifact', return_value=MagicMock())
+@patch.object(model, 'cache')
+class TestPreviewComment:
+
+    def test_stored_comment_id_skips_scan(self, mock_cache, mock_get_artifact, mock_upload):
+        client = MagicMock()
+        client.issue.return_value.comment.return_value.edit.return_value = True
+
+        with patch.object(model, 'get_cache', return_value={'comment_id': 42}) as mock_get_cache:
+            model.move_artifact_to_s3(PAYLOAD, client)
+
+        mock_get_cache.assert_called_once_with(COMMENT_KEY)
+        client.issue.assert_called_once_with('foo', 'napari-foo', 7)
+        client.issue.return_value.comment.assert_called_once_with(42)
+        client.pull_request.assert_not_called()
+        mock_cache.assert_not_called()
+
+    def test_comment_id_stored_on_create(self, mock_cache, mock_get_artifact, mock_upload):
+        client = MagicMock()
+        client.pull_request.return_value.issue_comments.return_value = []
+        client.pull_request.return_value.create_comment.return_value.id = 43
+
+        with patch.object(model, 'get_cache', return_value=None):
+            model.move_artifact_to_s3(PAYLOAD, client)
+
+        client.issue.assert_not_called()
+        client.pull_request.return_value.create_comment.assert_called_once()
+        mock_cache.assert_called_once_with({'comment_id': 43}, COMMENT_KEY)
+
+    def test_missing_stored_comment_falls_back_to_scan(self, mock_cache, mock_get_artifact, mock_upload):
+        client = MagicMock()
+        client.issue.return_value.comment.return_value = None
+        comment = MagicMock(id=44, body='Preview page for your plugin is ready here:\nhttps://...')
+        comment.user.login = 'napari-hub[bot]'
+        client.pull_request.return_value.issue_comments.return_value = [comment]
+
+        with patch.object(model, 'get_cache', return_value={'comment_id': 42}):
+            model.move_artifact_to_s3(PAYLOAD, client)
+
+        comment.edit.assert_called_once()
+        client.pull_request.return_value.create_comment.assert_not_called()
+        mock_cache.assert_called_once_with({'comment_id': 44}, COMMENT_KEY)
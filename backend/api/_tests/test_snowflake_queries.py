@@ -0,0 +1,57 @@
+import json
+from unittest.mock import patch
+
+import pandas as pd
+from nhcommons.utils import snowflake_pool
+from nhcommons.utils.snowflake_pool import QueryEngine
+
+from api import model
+
+
+class RecordingQueryEngine(QueryEngine):
+    """Local stand-in for snowflake returning fixed rows."""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self.queries = []
+        self.closed = False
+
+    def execute(self, schema, query):
+        self.queries.append(schema)
+        return [iter(self._rows)]
+
+    def close(self):
+        self.closed = True
+
+
+def test_activity_timeline_uses_shared_engine():
+    engine = RecordingQueryEngine([('napari-foo', '2023-01-01 00:00:00', 3), ('napari-foo', '2023-02-01 00:00:00', 5)])
+    written = {}
+    snowflake_pool.set_query_engine(engine)
+    try:
+        with patch.object(model, 'write_data', lambda data, path: written.update({path: data.read()})):
+            model._update_activity_timeline_data()
+    finally:
+        snowflake_pool.close_query_engine()
+
+    assert engine.queries == ['PYPI']
+    assert engine.closed
+    assert written == {'activity_dashboard_data/plugin_installs.csv': b'PROJECT,MONTH,NUM_DOWNLOADS_BY_MONTH\n'
+                                                                      b'napari-foo,2023-01-01 00:00:00,3\n'
+                                                                      b'napari-foo,2023-02-01 00:00:00,5\n'}
+
+
+def test_commit_activity_timestamps():
+    engine = RecordingQueryEngine([('foo/napari-foo', '2023-02-01', 2), ('foo/napari-foo', '2023-01-01', 4),
+                                   ('bar/unknown', '2023-01-01', 1)])
+    snowflake_pool.set_query_engine(engine)
+    try:
+        with patch.object(model, 'write_data') as mock_write_data:
+            model._update_commit_activity({'foo/napari-foo': 'napari-foo'})
+    finally:
+        snowflake_pool.close_query_engine()
+
+    data = json.loads(mock_write_data.call_args[0][0])
+    expected = [{'timestamp': int(pd.to_datetime(month).strftime("%s")) * 1000, 'commits': commits}
+                for month, commits in (('2023-01-01', 4), ('2023-02-01', 2))]
+    assert data == {'napari-foo': expected}
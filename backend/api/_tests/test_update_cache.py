@@ -0,0 +1,55 @@
+from unittest.mock import patch
+
+from api import model
+from api.models import plugin_metadata
+
+PLUGINS = {'napari-foo': '0.1.0', 'napari-bar': '0.2.0', 'napari-baz': '0.3.0'}
+METADATA = {plugin: {'name': plugin} for plugin in PLUGINS}
+
+
+class TestWritePluginMetadataToDynamo:
+
+    @patch.object(model.plugin_metadata_model, 'put_plugin_metadata')
+    @patch.object(model.plugin_metadata_model, 'get_plugin_metadata_hashes', return_value={
+        ('napari-foo', '0.1.0'): plugin_metadata.get_data_hash({'name': 'napari-foo'}),
+        ('napari-bar', '0.2.0'): plugin_metadata.get_data_hash({'name': 'napari-bar', 'summary': 'outdated'}),
+    })
+    def test_writes_missing_and_changed_records(self, mock_hashes, mock_put):
+        model._write_plugin_metadata_to_dynamo(PLUGINS, METADATA)
+
+        mock_put.assert_called_once_with({
+            'napari-bar': ('0.2.0', {'name': 'napari-bar'}),
+            'napari-baz': ('0.3.0', {'name': 'napari-baz'}),
+        })
+
+    @patch.object(model.plugin_metadata_model, 'put_plugin_metadata', side_effect=RuntimeError('throttled'))
+    @patch.object(model.plugin_metadata_model, 'get_plugin_metadata_hashes', return_value={})
+    def test_failures_are_not_raised(self, mock_hashes, mock_put):
+        model._write_plugin_metadata_to_dynamo(PLUGINS, METADATA)
+
+        mock_put.assert_called_once()
+
+
+class TestRenderDescriptionsCached:
+
+    def test_reuses_stored_text_and_stores_new_text(self):
+        stored_key = model._get_rendered_description_key(model.get_description_hash('# Foo'))
+        stored = {stored_key: {'description_text': 'stored foo'}}
+        descriptions = {'napari-foo': '# Foo', 'napari-bar': '# Bar', 'napari-empty': ''}
+
+        with patch.object(model, 'get_cache', side_effect=stored.get), \
+                patch.object(model, 'cache') as mock_cache:
+            texts = model._render_descriptions_cached(descriptions)
+
+        assert texts == {'napari-foo': 'stored foo', 'napari-bar': model.render_description('# Bar'),
+                         'napari-empty': ''}
+        mock_cache.assert_called_once_with(
+            {'description_text': texts['napari-bar']},
+            model._get_rendered_description_key(model.get_description_hash('# Bar')))
+
+    def test_store_failures_are_not_raised(self):
+        with patch.object(model, 'get_cache', return_value=None), \
+                patch.object(model, 'cache', side_effect=RuntimeError('access denied')):
+            texts = model._render_descriptions_cached({'napari-foo': '# Foo'})
+
+        assert texts == {'napari-foo': model.render_description('# Foo')}
@@ -1,4 +1,5 @@
 import json
+import threading
 import unittest
 from unittest.mock import patch
 
@@ -213,3 +214,87 @@ class TestZulip(unittest.TestCase):
             plugins_used_in_test.add(package)
         # check that we used all the plugins we wanted to 
         assert plugins_used_in_test == currently_used_plugins_no_version_change
+
+
+class TestZulipNotifier(unittest.TestCase):
+
+    @patch('api.zulip.send_zulip_message')
+    @patch('api.zulip.zulip_credentials', 'user:key')
+    @patch('api.zulip.zulip_post_interval', 0)
+    @patch('requests.get', side_effect=mocked_requests_get_release_notes_with_release_v_update)
+    def test_notify_new_packages(self, mock_get, mock_send):
+        from api.zulip import notify_new_packages
+
+        existing = {'napari-demo': '0.0.0', 'removed-plugin': '1.0.0'}
+        new = {'napari-demo': '0.0.1', 'new-napari-plugin': '0.0.2'}
+        notify_new_packages(existing, new, json.loads(metadata_if_code_repository_exists))
+
+        topics = sorted(call.args[2] for call in mock_send.call_args_list)
+        assert topics == ['napari-demo', 'new-napari-plugin', 'removed-plugin']
+        assert 'release notes for [v0.0.1]' in next(call.args[3] for call in mock_send.call_args_list
+                                                    if call.args[2] == 'napari-demo')
+
+    @patch('api.zulip.send_zulip_message')
+    @patch('api.zulip.zulip_credentials', 'user:key')
+    @patch('api.zulip.zulip_digest', True)
+    @patch('requests.get', return_value=FakeResponse(data=response_without_release_notes))
+    def test_notify_new_packages_digest(self, mock_get, mock_send):
+        from api.zulip import DIGEST_TOPIC, notify_new_packages_async
+
+        new = {'napari-demo': '0.0.1', 'new-napari-plugin': '0.0.2'}
+        notify_new_packages_async({'napari-demo': '0.0.0'}, new, json.loads(metadata_if_code_repository_exists)).result()
+
+        mock_send.assert_called_once()
+        assert mock_send.call_args.args[2] == DIGEST_TOPIC
+        assert '**napari-demo**: ' in mock_send.call_args.args[3]
+        assert '**new-napari-plugin**: ' in mock_send.call_args.args[3]
+
+    def test_create_digests_split(self):
+        from api.zulip import MAX_MESSAGE_LENGTH, create_digests
+
+        messages = [(f'plugin-{i}', 'x' * (MAX_MESSAGE_LENGTH // 3)) for i in range(5)]
+        digests = create_digests(messages)
+
+        assert len(digests) == 3
+        assert all(len(digest) <= MAX_MESSAGE_LENGTH for digest in digests)
+
+    @patch('api.zulip._tag_forms', {})
+    @patch('requests.get', side_effect=mocked_requests_get_release_notes_with_release_v_update)
+    def test_tag_form_resolved_once_per_repo(self, mock_get):
+        from api.zulip import get_release_notes_for_version
+
+        assert get_release_notes_for_version('author/napari-demo', '0.0.1') == (existing_release_notes_with_v, True)
+        assert {call.args[0] for call in mock_get.call_args_list} == {
+            'https://api.github.com/repos/author/napari-demo/releases/tags/0.0.1',
+            'https://api.github.com/repos/author/napari-demo/releases/tags/v0.0.1',
+        }
+        mock_get.reset_mock()
+
+        assert get_release_notes_for_version('author/napari-demo', '0.0.1') == (existing_release_notes_with_v, True)
+        mock_get.assert_called_once()
+        assert mock_get.call_args.args[0] == 'https://api.github.com/repos/author/napari-demo/releases/tags/v0.0.1'
+
+    @patch('api.zulip._tag_forms', {})
+    @patch('requests.get')
+    def test_tag_forms_requested_concurrently(self, mock_get):
+        from api.zulip import get_release_notes_for_version
+
+        both_requested = threading.Barrier(2, timeout=5)
+
+        def get_after_both_requested(*args, **kwargs):
+            # blocks until the other tag form is requested too, so a sequential lookup would time out
+            both_requested.wait()
+            return mocked_requests_get_release_notes_with_release_v_update(*args, **kwargs)
+        mock_get.side_effect = get_after_both_requested
+
+        assert get_release_notes_for_version('author/napari-demo', '0.0.1') == (existing_release_notes_with_v, True)
+        assert mock_get.call_count == 2
+
+    @patch('api.zulip.github_auth', 'token-auth')
+    @patch('requests.get', return_value=FakeResponse(data=response_with_release_notes))
+    def test_get_release_notes_authenticated(self, mock_get):
+        from api.zulip import get_release_notes
+
+        get_release_notes('mock_endpoint')
+
+        assert mock_get.call_args.kwargs['auth'] == 'token-auth'
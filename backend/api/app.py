@@ -1,5 +1,6 @@
 import logging
 import os
+from functools import partial
 
 from werkzeug import exceptions
 from apig_wsgi import make_lambda_handler
@@ -13,7 +14,9 @@ from api.model import get_public_plugins, get_index, get_plugin, get_excluded_pl
     move_artifact_to_s3, get_category_mapping, get_categories_mapping, get_manifest, update_activity_data, \
     get_metrics_for_plugin
 from api.models.category import CategoryModel
+from api.preview_jobs import get_preview_job_queue, handle_preview_jobs
 from api.shield import get_shield
+from api.zulip import wait_for_notification
 from utils.utils import send_alert, reformat_ssh_key_to_pem_bytes
 
 GITHUB_APP_ID = os.getenv('GITHUBAPP_ID')
@@ -40,7 +43,15 @@ else:
     preview_app.config['GITHUBAPP_SECRET'] = False
 
 github_app = GitHubApp(preview_app)
-handler = make_lambda_handler(app.wsgi_app)
+preview_job_queue = get_preview_job_queue()
+_wsgi_handler = make_lambda_handler(app.wsgi_app)
+
+
+def handler(event, context):
+    # preview jobs queued by the workflow_run webhook are delivered by SQS to the same lambda
+    if 'Records' in event:
+        return handle_preview_jobs(event, context)
+    return _wsgi_handler(event, context)
 
 logger = logging.getLogger()
 FORMAT = "%(asctime)s [%(levelname)s] %(name)s %(module)s %(funcName)s %(message)s"
@@ -65,8 +76,12 @@ def plugin_index() -> Response:
 
 @app.route('/update', methods=['POST'])
 def update() -> Response:
-    update_cache()
-    return app.make_response(("Complete", 204))
+    notification = update_cache()
+    response = app.make_response(("Complete", 204))
+    if notification:
+        # the process may be frozen once the request completes, so notifications are finished as the response closes
+        response.call_on_close(partial(wait_for_notification, notification))
+    return response
 
 
 @app.route('/plugins')
@@ -77,7 +92,7 @@ def plugins() -> Response:
 @app.route('/plugins/<plugin>', defaults={'version': None})
 @app.route('/plugins/<plugin>/versions/<version>')
 def versioned_plugin(plugin: str, version: str = None) -> Response:
-    return jsonify(get_plugin(plugin, version))
+    return jsonify(get_plugin(plugin, version, use_dynamo=_is_query_param_true('use_dynamo_plugin')))
 
 
 @app.route('/manifest/<plugin>', defaults={'version': None})
@@ -125,7 +140,7 @@ def get_category(category: str, version: str) -> Response:
 
 @app.route('/activity/update', methods=['POST'])
 def update_activity() -> Response:
-    update_activity_data()
+    update_activity_data(use_dynamo_for_plugin=_is_query_param_true('use_dynamo_plugin'))
     return app.make_response(("Complete", 204))
 
 
@@ -156,7 +171,7 @@ def collections() -> Response:
 
 @app.route('/collections/<collection>')
 def collection(collection: str) -> Response:
-    data = get_collection(collection)
+    data = get_collection(collection, use_dynamo=_is_query_param_true('use_dynamo_plugin'))
     if not data:
         return app.make_response(("Collection does not exist", 404))
     return data
@@ -190,7 +205,10 @@ def handle_exception(e) -> Response:
 
 @github_app.on("workflow_run.completed")
 def preview():
-    move_artifact_to_s3(github_app.payload, github_app.installation_client)
+    if preview_job_queue:
+        preview_job_queue.enqueue(github_app.payload)
+    else:
+        move_artifact_to_s3(github_app.payload, github_app.installation_client)
 
 
 @app.before_request
@@ -1,28 +1,45 @@
 from concurrent import futures
 from datetime import date, datetime
+from functools import partial
 import json
 import os
-from typing import Tuple, Dict, List, Callable, Any
+import shutil
+import tempfile
+import threading
+import time
+from typing import Tuple, Dict, List, Callable, Any, Iterable, Optional, IO
 from zipfile import ZipFile
-from io import BytesIO
 from collections import defaultdict
 import pandas as pd
 
-from api.models import github_activity, install_activity
+from api.models import github_activity, install_activity, plugin_metadata as plugin_metadata_model
 from utils.github import get_github_metadata, get_artifact
 from utils.pypi import query_pypi, get_plugin_pypi_metadata
-from api.s3 import get_cache, cache, write_data, get_install_timeline_data, get_latest_commit, get_commit_activity, \
-    get_recent_activity_data
-from utils.utils import render_description, send_alert, get_attribute, get_category_mapping, parse_manifest
+from api.s3 import get_cache, cache, upload_files, write_data, get_install_timeline_data, get_latest_commit, \
+    get_commit_activity, get_recent_activity_data
+from utils.utils import render_description, render_descriptions, send_alert, get_attribute, get_category_mapping, \
+    parse_manifest, precompute_category_mapping, get_categories, get_description_hash
 from utils.datadog import report_metrics
-from api.zulip import notify_new_packages
+from nhcommons.utils.snowflake_pool import get_query_engine, close_query_engine, iter_column_batches
+from nhcommons.utils.task_status import ERROR, TIMED_OUT
+from api.zulip import notify_new_packages_async
 import boto3
-import snowflake.connector as sc
 from dateutil.relativedelta import relativedelta
 import logging
 
 LOGGER = logging.getLogger()
 
+# Chunk size for writing the preview artifact to disk
+ARTIFACT_CHUNK_SIZE = 1024 * 1024
+# Size up to which activity files are built in memory before spilling to disk
+ACTIVITY_SPOOL_SIZE = 32 * 1024 * 1024
+# Version of the fields parsed from manifests, increment when parse_manifest changes to invalidate cached fields
+MANIFEST_METADATA_VERSION = 1
+
+_category_mappings: Dict[str, Dict[str, Dict]] = {}
+_category_mapping_locks = defaultdict(threading.Lock)
+_category_mapping_locks_lock = threading.Lock()
+
 index_subset = {'name', 'summary', 'description_text', 'description_content_type',
                 'authors', 'license', 'python_version', 'operating_system',
                 'release_date', 'version', 'first_released',
@@ -63,11 +80,12 @@ def get_valid_plugins() -> Dict[str, str]:
     return {**get_hidden_plugins(), **get_public_plugins()}
 
 
-def get_plugin(plugin: str, version: str = None) -> dict:
+def get_plugin(plugin: str, version: str = None, use_dynamo: bool = False) -> dict:
     """
     Get plugin and manifest metadata for a particular plugin, get latest if version is None.
     :param plugin: name of the plugin to get
     :param version: version of the plugin
+    :param use_dynamo: fetch data from dynamo if True, else fetch from s3
     :return: plugin metadata dictionary
     """
     plugins = get_valid_plugins()
@@ -75,8 +93,11 @@ def get_plugin(plugin: str, version: str = None) -> dict:
         return {}
     elif version is None:
         version = plugins[plugin]
-    plugin_metadata = get_cache(f'cache/{plugin}/{version}.json')
-    manifest_metadata = get_frontend_manifest_metadata(plugin, version)
+    if use_dynamo:
+        plugin_metadata = plugin_metadata_model.get_plugin_metadata(plugin, version) or {}
+    else:
+        plugin_metadata = get_cache(f'cache/{plugin}/{version}.json')
+    manifest_metadata = get_frontend_manifest_metadata(plugin, version, use_dynamo)
     plugin_metadata.update(manifest_metadata)
     if plugin_metadata:
         return plugin_metadata
@@ -84,23 +105,64 @@ def get_plugin(plugin: str, version: str = None) -> dict:
         return {}
 
 
-def get_frontend_manifest_metadata(plugin, version):
-    """Get manifest from cache, if it exists and parse into frontend fields
+def get_plugins(plugins: Dict[str, Optional[str]], fields: Iterable[str], use_dynamo: bool = False) -> Dict[str, dict]:
+    """
+    Get a subset of plugin and manifest metadata fields for many plugins, get latest for versions that are None.
+    Plugins that are not valid are left out.
+    :param plugins: names of the plugins to get mapped to their versions
+    :param fields: plugin and manifest metadata fields to include
+    :param use_dynamo: fetch data with a single BatchGetItem from dynamo if True, else fetch each plugin from s3
+    :return: dict of plugin name to its metadata subset
+    """
+    fields = set(fields)
+    if not use_dynamo:
+        results = {plugin: get_plugin(plugin, version) for plugin, version in plugins.items()}
+        return {plugin: {k: v for k, v in metadata.items() if k in fields}
+                for plugin, metadata in results.items() if metadata}
+
+    valid_plugins = get_valid_plugins()
+    versions = {plugin: version or valid_plugins[plugin] for plugin, version in plugins.items()
+                if plugin in valid_plugins}
+    if not versions:
+        return {}
+    results = {}
+    for plugin, records in plugin_metadata_model.get_plugins_data(versions, fields).items():
+        plugin_metadata = records.get('METADATA', {})
+        manifest = records.get('DISTRIBUTION')
+        plugin_metadata.update(parse_manifest(manifest if manifest and 'error' not in manifest else None))
+        results[plugin] = {k: v for k, v in plugin_metadata.items() if k in fields}
+    return results
+
+
+def get_frontend_manifest_metadata(plugin, version, use_dynamo: bool = False):
+    """Get frontend fields of the manifest, parsed once when the manifest is
+    first read and cached next to it, as a manifest never changes for a version.
 
     When `error` is in the returned metadata, we return
     default values to the frontend.
 
     :param plugin: name of the plugin to get
     :param version: version of the plugin manifest
+    :param use_dynamo: fetch data from dynamo if True, else fetch from s3
     :return: parsed metadata for the frontend
     """
+    if not use_dynamo:
+        manifest_metadata = get_cache(_get_manifest_metadata_key(plugin, version))
+        if manifest_metadata is not None:
+            return manifest_metadata
     raw_metadata = get_manifest(plugin, version)
     if 'error' in raw_metadata:
-        raw_metadata = None
+        return parse_manifest()
     interpreted_metadata = parse_manifest(raw_metadata)
+    if not use_dynamo:
+        cache(interpreted_metadata, _get_manifest_metadata_key(plugin, version))
     return interpreted_metadata
 
 
+def _get_manifest_metadata_key(plugin: str, version: str) -> str:
+    return f'cache/{plugin}/{version}-manifest-metadata-v{MANIFEST_METADATA_VERSION}.json'
+
+
 def discover_manifest(plugin: str, version: str = None):
     """
     Invoke plugins lambda to generate manifest & write to cache.
@@ -121,6 +183,7 @@ def discover_manifest(plugin: str, version: str = None):
 def get_manifest(plugin: str, version: str = None) -> dict:
     """
     Get plugin manifest file for a particular plugin, get latest if version is None.
+    The discovery status and the manifest are read from the DISTRIBUTION record of the plugin version.
     :param plugin: name of the plugin to get
     :param version: version of the plugin manifest
     :return: plugin manifest dictionary.
@@ -130,22 +193,27 @@ def get_manifest(plugin: str, version: str = None) -> dict:
         return {}
     elif version is None:
         version = plugins[plugin]
-    plugin_metadata = get_cache(f'cache/{plugin}/{version}-manifest.json')
 
-    # plugin_metadata being None indicates manifest is not cached and needs processing 
-    if plugin_metadata is None:
+    manifest_record = plugin_metadata_model.get_manifest_record(plugin, version)
+
+    # no record indicates manifest is not discovered yet and needs processing
+    if manifest_record is None:
         return {'error': 'Manifest not yet processed.'}
 
-    # empty dict indicates some lambda error in processing e.g. timed out
-    if plugin_metadata == {}:
+    status, manifest = manifest_record['status'], manifest_record['manifest']
+    if status in (ERROR, TIMED_OUT):
+        return {'error': manifest.get('error') or f'Manifest discovery {status}.'}
+
+    # empty dict indicates discovery started but never finished, e.g. the lambda failed
+    if manifest == {}:
         return {'error': 'Processing manifest failed due to external error.'}
 
-    # error written to file indicates manifest discovery failed
-    if 'error' in plugin_metadata:
-        return {'error': plugin_metadata['error']}
+    # error written to the record indicates manifest discovery failed
+    if 'error' in manifest:
+        return {'error': manifest['error']}
 
     # correct plugin manifest
-    return plugin_metadata
+    return manifest
 
 
 def get_index() -> dict:
@@ -183,21 +251,28 @@ def get_excluded_plugins() -> Dict[str, str]:
 
 
 def build_manifest_metadata(plugin: str, version: str) -> Tuple[str, dict]:
+    metadata = get_cache(_get_manifest_metadata_key(plugin, version))
+    if metadata is not None:
+        return plugin, metadata
     manifest = get_manifest(plugin, version)
     if 'error' in manifest:
         if 'Manifest not yet processed' in manifest['error']:
             # this will invoke the plugins lambda & write manifest to cache
             discover_manifest(plugin, version)
-        # return just default values for now
+        # return just default values for now, without caching them so a later
+        # successful discovery is picked up
         metadata = parse_manifest()
     else:
         metadata = parse_manifest(manifest)
+        cache(metadata, _get_manifest_metadata_key(plugin, version))
     return plugin, metadata
 
 
-def build_plugin_metadata(plugin: str, version: str) -> Tuple[str, dict]:
+def build_plugin_metadata(plugin: str, version: str, render: bool = True) -> Tuple[str, dict]:
     """
     Build plugin metadata from multiple sources, reuse cached ones if available.
+    :param render: render the description and cache the metadata, otherwise description_text of new
+    metadata is set to None, and rendering and caching are left to the caller
     :return: dict for aggregated plugin metadata
     """
     cached_plugin = get_cache(f'cache/{plugin}/{version}.json')
@@ -209,26 +284,85 @@ def build_plugin_metadata(plugin: str, version: str) -> Tuple[str, dict]:
     github_repo_url = metadata.get('code_repository')
     if github_repo_url:
         metadata = {**metadata, **get_github_metadata(github_repo_url)}
-    if 'description' in metadata:
+    if not render:
+        metadata['description_text'] = None
+    elif 'description' in metadata:
         metadata['description_text'] = render_description(metadata.get('description'))
     if 'labels' in metadata:
-        category_mappings = get_categories_mapping(metadata['labels']['ontology'])
-        categories = defaultdict(list)
-        category_hierarchy = defaultdict(list)
-        for category in metadata['labels']['terms']:
-            mapped_category = get_category_mapping(category, category_mappings)
-            for match in mapped_category:
-                if match['label'] not in categories[match['dimension']]:
-                    categories[match['dimension']].append(match['label'])
-                match['hierarchy'][0] = match['label']
-                category_hierarchy[match['dimension']].append(match['hierarchy'])
+        categories, category_hierarchy = get_plugin_categories(metadata['labels']['terms'],
+                                                               metadata['labels']['ontology'])
         metadata['category'] = categories
         metadata['category_hierarchy'] = category_hierarchy
         del metadata['labels']
-    cache(metadata, f'cache/{plugin}/{version}.json')
+    if render:
+        cache(metadata, f'cache/{plugin}/{version}.json')
     return plugin, metadata
 
 
+def _get_rendered_description_key(description_hash: str) -> str:
+    return f'cache/rendered-descriptions/{description_hash}.json'
+
+
+def _render_descriptions_cached(descriptions: Dict[str, str]) -> Dict[str, str]:
+    """
+    Render descriptions, reusing text rendered by earlier runs for the same description
+    content, e.g. of a previous release, and caching newly rendered text in s3.
+
+    :param descriptions: raw descriptions by plugin name
+    :return: rendered description text by plugin name
+    """
+    hashes = {plugin: get_description_hash(description) for plugin, description in descriptions.items()
+              if description != ''}
+    unique_hashes = set(hashes.values())
+    with futures.ThreadPoolExecutor(max_workers=32) as executor:
+        stored = dict(zip(unique_hashes, executor.map(
+            lambda description_hash: get_cache(_get_rendered_description_key(description_hash)), unique_hashes)))
+    rendered = {plugin: stored[hashes[plugin]]['description_text'] for plugin in hashes
+                if stored[hashes[plugin]] and 'description_text' in stored[hashes[plugin]]}
+    LOGGER.info(f'Reusing {len(rendered)} of {len(descriptions)} rendered descriptions')
+
+    missing = {plugin: description for plugin, description in descriptions.items() if plugin not in rendered}
+    new_texts = render_descriptions(missing)
+    new_stored = {hashes[plugin]: text for plugin, text in new_texts.items() if plugin in hashes}
+    try:
+        with futures.ThreadPoolExecutor(max_workers=32) as executor:
+            for future in [executor.submit(cache, {'description_text': text},
+                                           _get_rendered_description_key(description_hash))
+                           for description_hash, text in new_stored.items()]:
+                future.result()
+    except Exception:
+        # rendered text is only reused by later runs, failing to store it doesn't fail the update
+        LOGGER.exception('Failed caching rendered descriptions')
+    return {**new_texts, **rendered}
+
+
+def _render_and_cache_plugin_metadata(plugins: Dict[str, str], plugins_metadata: Dict[str, dict]):
+    """
+    Render the descriptions of metadata built without rendering in bulk, and cache the metadata.
+
+    :param plugins: plugin names and versions
+    :param plugins_metadata: plugin metadata, updated in place
+    """
+    pending = {plugin: metadata for plugin, metadata in plugins_metadata.items()
+               if metadata and 'description_text' in metadata and metadata['description_text'] is None}
+    if not pending:
+        return
+    start = time.perf_counter()
+    descriptions = _render_descriptions_cached({plugin: metadata['description']
+                                                for plugin, metadata in pending.items() if 'description' in metadata})
+    LOGGER.info(f'Rendered {len(descriptions)} descriptions time_taken={(time.perf_counter() - start) * 1000}ms')
+    for plugin, metadata in pending.items():
+        if plugin in descriptions:
+            metadata['description_text'] = descriptions[plugin]
+        else:
+            del metadata['description_text']
+    with futures.ThreadPoolExecutor(max_workers=32) as executor:
+        cache_futures = [executor.submit(cache, metadata, f'cache/{plugin}/{plugins[plugin]}.json')
+                         for plugin, metadata in pending.items()]
+    for future in cache_futures:
+        future.result()
+
+
 def generate_index(plugins_metadata: Dict[str, Any]):
     """
     Adds total_installs to plugins, and slice index to only include specified indexing related columns
@@ -242,7 +376,7 @@ def generate_index(plugins_metadata: Dict[str, Any]):
     return slice_metadata_to_index_columns(list(plugins_metadata.values()))
 
 
-def update_cache():
+def update_cache() -> Optional[futures.Future]:
     """
     Update existing caches to reflect new/updated plugins. Files updated:
     - excluded_plugins.json (overwrite)
@@ -250,9 +384,14 @@ def update_cache():
     - cache/hidden-plugins.json (overwrite)
     - cache/index.json (overwrite)
     - cache/{plugin}/{version}.json (skip if exists)
+
+    :return: future for the zulip notification of the updates, still running when the caches are updated, if any
     """
     plugins = query_pypi()
-    plugins_metadata = get_plugin_metadata_async(plugins, build_plugin_metadata)
+    plugins_metadata = get_plugin_metadata_async(plugins, partial(build_plugin_metadata, render=False))
+    _render_and_cache_plugin_metadata(plugins, plugins_metadata)
+    # pypi and github metadata, before manifest fields are merged in, for the dynamo METADATA records
+    dynamo_metadata = {plugin: dict(metadata) for plugin, metadata in plugins_metadata.items() if metadata}
     manifest_metadata = get_plugin_metadata_async(plugins, build_manifest_metadata)
     for plugin in plugins:
         plugins_metadata[plugin].update(manifest_metadata[plugin])
@@ -272,18 +411,43 @@ def update_cache():
 
     if visibility_plugins['public']:
         existing_public_plugins = get_public_plugins()
+        # zulip notifications run alongside the cache writes, and are left to the caller to wait on
+        notification = notify_new_packages_async(existing_public_plugins, visibility_plugins['public'],
+                                                 plugins_metadata)
         cache(excluded_plugins, 'excluded_plugins.json')
         cache(visibility_plugins['public'], 'cache/public-plugins.json')
         cache(visibility_plugins['hidden'], 'cache/hidden-plugins.json')
         cache(generate_index(plugins_metadata), 'cache/index.json')
-        notify_new_packages(existing_public_plugins, visibility_plugins['public'], plugins_metadata)
         report_metrics('napari_hub.plugins.count', len(visibility_plugins['public']), ['visibility:public'])
         report_metrics('napari_hub.plugins.count', len(visibility_plugins['hidden']), ['visibility:hidden'])
         report_metrics('napari_hub.plugins.excluded', len(excluded_plugins))
+        _write_plugin_metadata_to_dynamo(plugins, dynamo_metadata)
         LOGGER.info("plugin update successful")
+        return notification
     else:
         send_alert(f"({datetime.now()})Actions Required! Failed to query pypi for "
                    f"napari plugin packages, switching to backup analysis dump")
+        return None
+
+
+def _write_plugin_metadata_to_dynamo(plugins: Dict[str, str], plugins_metadata: Dict[str, dict]):
+    """
+    Write plugin metadata to dynamo for plugin versions without a record, or whose record differs from the metadata
+    built, so that dynamo reads serve the same metadata as the s3 cache. Best-effort, as the s3 cache is the default
+    read path, so failures are logged rather than raised.
+
+    :param plugins: plugin names and their latest versions
+    :param plugins_metadata: plugin metadata built for those versions
+    """
+    try:
+        existing = plugin_metadata_model.get_plugin_metadata_hashes(plugins)
+        changed = {plugin: (version, plugins_metadata[plugin]) for plugin, version in plugins.items()
+                   if plugins_metadata.get(plugin) and
+                   existing.get((plugin, version)) != plugin_metadata_model.get_data_hash(plugins_metadata[plugin])}
+        if changed:
+            plugin_metadata_model.put_plugin_metadata(changed)
+    except Exception:
+        LOGGER.exception('Failed to write plugin metadata to dynamo')
 
 
 def get_updated_plugin_exclusion(plugins_metadata):
@@ -355,29 +519,92 @@ def move_artifact_to_s3(payload, client):
     artifact_url = get_attribute(payload, ["workflow_run", "artifacts_url"])
     curr_clock = datetime.utcnow().isoformat()
     if artifact_url:
+        start = time.perf_counter()
         artifact = get_artifact(artifact_url, client.session.auth.token)
         if artifact:
-            zipfile = ZipFile(BytesIO(artifact.read()))
-            for name in zipfile.namelist():
-                with zipfile.open(name) as file:
-                    if name == "index.html":
-                        cache(file, f'preview/{owner}/{repo}/{pull_request_number}', "text/html")
-                    else:
-                        cache(file, f'preview/{owner}/{repo}/{pull_request_number}/{name}')
-
-            pull_request = client.pull_request(owner, repo, pull_request_number)
-            text = 'Preview page for your plugin is ready here:'
-            comment_found = False
-            for comment in pull_request.issue_comments():
-                if text in comment.body and comment.user.login == 'napari-hub[bot]':
-                    comment_found = True
-                    comment.edit(text + f'\nhttps://preview.napari-hub.org/{owner}/{repo}/{pull_request_number}'
-                                        f'\n_Updated: {curr_clock}_')
-                    break
-            if not comment_found:
-                pull_request.create_comment(
-                    text + f'\nhttps://preview.napari-hub.org/{owner}/{repo}/{pull_request_number}'
-                           f'\n_Created: {curr_clock}_')
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                _upload_preview_artifact(artifact, tmp_dir, f'preview/{owner}/{repo}/{pull_request_number}')
+
+            comment_start = time.perf_counter()
+            _update_preview_comment(client, owner, repo, pull_request_number, curr_clock)
+            LOGGER.info(f'Preview for {owner}/{repo}/{pull_request_number} '
+                        f'comment time_taken={(time.perf_counter() - comment_start) * 1000}ms '
+                        f'total time_taken={(time.perf_counter() - start) * 1000}ms')
+
+
+def _get_preview_comment_key(owner: str, repo: str, pull_request_number: int) -> str:
+    return f'cache/preview-comments/{owner}/{repo}/{pull_request_number}.json'
+
+
+def _update_preview_comment(client, owner: str, repo: str, pull_request_number: int, curr_clock: str):
+    """
+    Create or update the bot comment linking to the preview page. The id of the
+    comment is cached per pull request so updates don't scan every comment.
+
+    :param client: installation client to query GitHub API
+    :param owner: owner of the repository
+    :param repo: name of the repository
+    :param pull_request_number: number of the pull request
+    :param curr_clock: timestamp shown in the comment
+    """
+    text = 'Preview page for your plugin is ready here:'
+    link = f'\nhttps://preview.napari-hub.org/{owner}/{repo}/{pull_request_number}'
+    key = _get_preview_comment_key(owner, repo, pull_request_number)
+
+    comment_id = (get_cache(key) or {}).get('comment_id')
+    if comment_id:
+        comment = client.issue(owner, repo, pull_request_number).comment(comment_id)
+        if comment and comment.edit(text + link + f'\n_Updated: {curr_clock}_'):
+            return
+        LOGGER.info(f'Cached preview comment {comment_id} not found for {owner}/{repo}/{pull_request_number}')
+
+    pull_request = client.pull_request(owner, repo, pull_request_number)
+    for comment in pull_request.issue_comments():
+        if text in comment.body and comment.user.login == 'napari-hub[bot]':
+            comment.edit(text + link + f'\n_Updated: {curr_clock}_')
+            break
+    else:
+        comment = pull_request.create_comment(text + link + f'\n_Created: {curr_clock}_')
+    if comment:
+        cache({'comment_id': comment.id}, key)
+
+
+def _upload_preview_artifact(artifact: IO[bytes], tmp_dir: str, key_prefix: str):
+    """
+    Download the preview artifact zip to disk and upload its files to s3
+    concurrently, so memory use stays bounded for large previews.
+
+    :param artifact: stream of the artifact zip
+    :param tmp_dir: directory to download and extract the artifact into
+    :param key_prefix: key path in s3 of the preview page
+    """
+    start = time.perf_counter()
+    zip_path = os.path.join(tmp_dir, 'artifact.zip')
+    with open(zip_path, 'wb') as zip_file:
+        shutil.copyfileobj(artifact, zip_file, ARTIFACT_CHUNK_SIZE)
+    download_end = time.perf_counter()
+
+    extract_dir = os.path.join(tmp_dir, 'artifact')
+    files = []
+    with ZipFile(zip_path) as zipfile:
+        for info in zipfile.infolist():
+            if info.is_dir():
+                continue
+            filename = zipfile.extract(info, extract_dir)
+            if info.filename == "index.html":
+                files.append((filename, key_prefix, "text/html"))
+            else:
+                files.append((filename, f'{key_prefix}/{info.filename}', None))
+    os.remove(zip_path)
+    extract_end = time.perf_counter()
+
+    upload_files(files)
+    upload_end = time.perf_counter()
+    LOGGER.info(f'Preview artifact for {key_prefix} files={len(files)} '
+                f'size={sum(os.path.getsize(filename) for filename, _, _ in files)} '
+                f'download time_taken={(download_end - start) * 1000}ms '
+                f'extract time_taken={(extract_end - download_end) * 1000}ms '
+                f'upload time_taken={(upload_end - extract_end) * 1000}ms')
 
 
 def get_categories_mapping(version: str) -> Dict[str, List]:
@@ -396,31 +623,57 @@ def get_categories_mapping(version: str) -> Dict[str, List]:
         hierarchy: mapped hierarchy from the top level ontology label to the bottom as a list
         label: mapped napari hub label.
     """
-    mappings = get_cache(f'category/{version.replace(":", "/")}.json')
-    return mappings or {}
+    return _get_category_mapping(version)['mappings']
+
+
+def get_plugin_categories(terms: List[str], version: str) -> Tuple[Dict, Dict]:
+    """
+    Get the categories of a plugin from the ontology terms it is labeled with.
+
+    :param terms: ontology terms of the plugin
+    :param version: version of the category mapping to use
+    :return: category labels and category hierarchies of the plugin, both keyed by dimension
+    """
+    return get_categories(terms, _get_category_mapping(version)['terms'])
+
+
+def _get_category_mapping(version: str) -> Dict[str, Dict]:
+    """
+    Get the mappings and precomputed term categories of a category version.
+    A version never changes once published, so each one is loaded once per
+    process, and concurrent builds wait for a single load instead of each
+    fetching the same file.
+    """
+    category_mapping = _category_mappings.get(version)
+    if category_mapping is not None:
+        return category_mapping
+    with _category_mapping_locks_lock:
+        lock = _category_mapping_locks[version]
+    with lock:
+        category_mapping = _category_mappings.get(version)
+        if category_mapping is None:
+            mappings = get_cache(f'category/{version.replace(":", "/")}.json') or {}
+            category_mapping = {'mappings': mappings, 'terms': precompute_category_mapping(mappings)}
+            # missing versions are retried on the next call
+            if mappings:
+                _category_mappings[version] = category_mapping
+    return category_mapping
 
 
 def _execute_query(query, schema):
-    SNOWFLAKE_USER = os.getenv('SNOWFLAKE_USER')
-    SNOWFLAKE_PASSWORD = os.getenv('SNOWFLAKE_PASSWORD')
-    ctx = sc.connect(
-        user=SNOWFLAKE_USER,
-        password=SNOWFLAKE_PASSWORD,
-        account="CZI-IMAGING",
-        warehouse="IMAGING",
-        database="IMAGING",
-        schema=schema
-    )
-    return ctx.execute_string(query)
+    return get_query_engine().execute(schema, query)
 
 
-def update_activity_data():
+def update_activity_data(use_dynamo_for_plugin: bool = False):
     LOGGER.info("Starting data refresh for metrics")
-    _update_activity_timeline_data()
-    _update_recent_activity_data()
-    repo_to_plugin_dict = _get_repo_to_plugin_dict()
-    _update_latest_commits(repo_to_plugin_dict)
-    _update_commit_activity(repo_to_plugin_dict)
+    try:
+        _update_activity_timeline_data()
+        _update_recent_activity_data()
+        repo_to_plugin_dict = _get_repo_to_plugin_dict(use_dynamo_for_plugin)
+        _update_latest_commits(repo_to_plugin_dict)
+        _update_commit_activity(repo_to_plugin_dict)
+    finally:
+        close_query_engine()
     LOGGER.info("Completed data refresh for metrics successfully")
 
 
@@ -440,11 +693,14 @@ def _update_activity_timeline_data():
         ORDER BY name, month
         """
     cursor_list = _execute_query(query, "PYPI")
-    csv_string = "PROJECT,MONTH,NUM_DOWNLOADS_BY_MONTH\n"
-    for cursor in cursor_list:
-        for row in cursor:
-            csv_string += str(row[0]) + ',' + str(row[1]) + ',' + str(row[2]) + '\n'
-    write_data(csv_string, "activity_dashboard_data/plugin_installs.csv")
+    with tempfile.SpooledTemporaryFile(max_size=ACTIVITY_SPOOL_SIZE) as csv_file:
+        csv_file.write(b"PROJECT,MONTH,NUM_DOWNLOADS_BY_MONTH\n")
+        for cursor in cursor_list:
+            for names, months, counts in iter_column_batches(cursor):
+                csv_file.write(''.join(f'{name},{month},{count}\n'
+                                       for name, month, count in zip(names, months, counts)).encode('utf-8'))
+        csv_file.seek(0)
+        write_data(csv_file, "activity_dashboard_data/plugin_installs.csv")
 
 
 def _process_for_dates(limit):
@@ -512,8 +768,8 @@ def _update_recent_activity_data(number_of_time_periods=30, time_granularity='DA
     cursor_list = _execute_query(query, "PYPI")
     data = {}
     for cursor in cursor_list:
-        for row in cursor:
-            data[row[0]] = row[1]
+        for names, counts in iter_column_batches(cursor):
+            data.update(zip(names, counts))
 
     write_data(json.dumps(data), "activity_dashboard_data/recent_installs.json")
 
@@ -525,18 +781,19 @@ def _update_repo_to_plugin_dict(repo_to_plugin_dict: dict, plugin_obj: dict):
     return repo_to_plugin_dict
 
 
-def _get_repo_to_plugin_dict():
+def _get_repo_to_plugin_dict(use_dynamo: bool = False):
     index_json = get_index()
     hidden_plugins = get_hidden_plugins()
     excluded_plugins = get_excluded_plugins()
     repo_to_plugin_dict = {}
     for public_plugin_obj in index_json:
         repo_to_plugin_dict = _update_repo_to_plugin_dict(repo_to_plugin_dict, public_plugin_obj)
-    for excluded_plugin_name, excluded_plugin_visibility in excluded_plugins.items():
-        if excluded_plugin_visibility == "hidden":
-            excluded_plugin_obj = get_plugin(excluded_plugin_name, hidden_plugins[excluded_plugin_name])
-        else:
-            excluded_plugin_obj = get_plugin(excluded_plugin_name, None)
+    excluded_plugin_versions = {
+        name: hidden_plugins[name] if visibility == "hidden" else None
+        for name, visibility in excluded_plugins.items()
+    }
+    excluded_plugin_objs = get_plugins(excluded_plugin_versions, ['name', 'code_repository'], use_dynamo)
+    for excluded_plugin_obj in excluded_plugin_objs.values():
         repo_to_plugin_dict = _update_repo_to_plugin_dict(repo_to_plugin_dict, excluded_plugin_obj)
     return repo_to_plugin_dict
 
@@ -567,15 +824,22 @@ def _update_latest_commits(repo_to_plugin_dict):
     cursor_list = _execute_query(query, "GITHUB")
     data = {}
     for cursor in cursor_list:
-        for row in cursor:
-            repo = row[0]
-            if repo in repo_to_plugin_dict:
-                plugin = repo_to_plugin_dict[repo]
-                timestamp = int(pd.to_datetime(row[1]).strftime("%s")) * 1000
-                data[plugin] = timestamp
+        for repos, latest_commits in iter_column_batches(cursor):
+            for repo, timestamp in zip(repos, _to_timestamps(latest_commits)):
+                if repo in repo_to_plugin_dict:
+                    data[repo_to_plugin_dict[repo]] = timestamp
     write_data(json.dumps(data), "activity_dashboard_data/latest_commits.json")
 
 
+def _to_timestamps(values: List) -> List[int]:
+    """
+    Convert a batch of dates to timestamps in milliseconds at once.
+    """
+    if not values:
+        return []
+    return (pd.to_datetime(pd.Series(values)).dt.strftime("%s").astype(int) * 1000).tolist()
+
+
 def _update_commit_activity(repo_to_plugin_dict):
     """
     Get the commit activity occurred for the plugin in the past year
@@ -593,12 +857,11 @@ def _update_commit_activity(repo_to_plugin_dict):
     cursor_list = _execute_query(query, "GITHUB")
     data = {}
     for cursor in cursor_list:
-        for repo, month, commit_count in cursor:
-            if repo in repo_to_plugin_dict:
-                plugin = repo_to_plugin_dict[repo]
-                timestamp = int(pd.to_datetime(month).strftime("%s")) * 1000
-                commits = int(commit_count)
-                data.setdefault(plugin, []).append({'timestamp': timestamp, 'commits': commits})
+        for repos, months, commit_counts in iter_column_batches(cursor):
+            for repo, timestamp, commit_count in zip(repos, _to_timestamps(months), commit_counts):
+                if repo in repo_to_plugin_dict:
+                    plugin = repo_to_plugin_dict[repo]
+                    data.setdefault(plugin, []).append({'timestamp': timestamp, 'commits': int(commit_count)})
     for plugin in data:
         data[plugin] = sorted(data[plugin], key=lambda x: (x['timestamp']))
     write_data(json.dumps(data), "activity_dashboard_data/commit_activity.json")
@@ -1,7 +1,16 @@
 from unittest.mock import Mock
 
+import pytest
+
 
 class TestCategory:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        from api.models import category
+
+        category._all_categories_by_version.clear()
+        category._category_by_name_version.clear()
+
     def test_get_category_has_result(self, monkeypatch):
         mock_category = Mock(
             return_value=[
@@ -18,6 +27,8 @@ class TestCategory:
 
         monkeypatch.setattr(CategoryModel, "query", mock_category)
         actual = CategoryModel.get_category("name", "version")
+        assert CategoryModel.get_category("Name", "version") == actual
+        mock_category.assert_called_once()
         expected = [
             {
                 "label": "label1",
@@ -62,8 +73,10 @@ class TestCategory:
 
         from api.models.category import CategoryModel
 
-        monkeypatch.setattr(CategoryModel, "scan", mock_category)
+        monkeypatch.setattr(CategoryModel.version_index, "query", mock_category)
         actual = CategoryModel.get_all_categories("version")
+        assert CategoryModel.get_all_categories("version") == actual
+        mock_category.assert_called_once_with("version")
 
         expected = {
             "name1": [
@@ -88,3 +101,13 @@ class TestCategory:
         }
 
         assert actual == expected
+
+    def test_get_category_not_seeded(self, monkeypatch):
+        mock_category = Mock(return_value=[])
+
+        from api.models.category import CategoryModel
+
+        monkeypatch.setattr(CategoryModel, "query", mock_category)
+        assert CategoryModel.get_category("name", "version") == []
+        assert CategoryModel.get_category("name", "version") == []
+        assert mock_category.call_count == 2
@@ -0,0 +1,78 @@
+import pytest
+from moto import mock_dynamodb
+
+from api.models._tests.conftest import create_dynamo_table
+from api.models import plugin_metadata
+
+PLUGIN_NAME = 'napari-foo'
+VERSION = '0.1.0'
+
+
+class TestPluginMetadata:
+
+    @pytest.fixture()
+    def plugin_metadata_table(self, aws_credentials):
+        with mock_dynamodb():
+            yield create_dynamo_table(plugin_metadata._PluginMetadataModel, 'plugin-metadata')
+
+    def _put_item(self, table, data, status=None, record_type='DISTRIBUTION', name=PLUGIN_NAME):
+        item = {
+            'name': name,
+            'version_type': f'{VERSION}:{record_type}',
+            'version': VERSION,
+            'type': record_type,
+            'data': data,
+        }
+        if status:
+            item['manifest_status'] = status
+        table.put_item(Item=item)
+
+    def test_get_manifest_record_no_record(self, plugin_metadata_table):
+        assert plugin_metadata.get_manifest_record(PLUGIN_NAME, VERSION) is None
+
+    @pytest.mark.parametrize(
+        'data, status', [
+            ({}, 'pending'),
+            ({'name': PLUGIN_NAME, 'contributions': {}}, 'ok'),
+            ({'error': 'HTTP Error 404: Not Found'}, 'error'),
+            ({'error': 'Discovery timed out after 300s'}, 'timed-out'),
+            ({'name': PLUGIN_NAME}, None),
+        ])
+    def test_get_manifest_record(self, plugin_metadata_table, data, status):
+        self._put_item(plugin_metadata_table, data, status)
+
+        assert plugin_metadata.get_manifest_record(PLUGIN_NAME, VERSION) == {'status': status, 'manifest': data}
+
+    def test_get_plugin_metadata(self, plugin_metadata_table):
+        self._put_item(plugin_metadata_table, {'name': PLUGIN_NAME, 'summary': 'foo'}, record_type='METADATA')
+
+        assert plugin_metadata.get_plugin_metadata(PLUGIN_NAME, VERSION) == {'name': PLUGIN_NAME, 'summary': 'foo'}
+        assert plugin_metadata.get_manifest_record(PLUGIN_NAME, VERSION) is None
+
+    def test_get_plugins_data(self, plugin_metadata_table):
+        self._put_item(plugin_metadata_table, {'name': PLUGIN_NAME, 'summary': 'foo', 'authors': []},
+                       record_type='METADATA')
+        self._put_item(plugin_metadata_table, {'display_name': 'Foo', 'contributions': {}}, 'ok')
+        self._put_item(plugin_metadata_table, {'name': 'napari-bar', 'summary': 'bar'},
+                       record_type='METADATA', name='napari-bar')
+        self._put_item(plugin_metadata_table, {'error': 'HTTP Error 404: Not Found'}, 'error', name='napari-bar')
+
+        actual = plugin_metadata.get_plugins_data({PLUGIN_NAME: VERSION, 'napari-bar': VERSION, 'napari-baz': VERSION},
+                                                  ['summary', 'display_name'])
+
+        assert actual == {
+            PLUGIN_NAME: {'METADATA': {'summary': 'foo'}, 'DISTRIBUTION': {'display_name': 'Foo'}},
+            'napari-bar': {'METADATA': {'summary': 'bar'}, 'DISTRIBUTION': {'error': 'HTTP Error 404: Not Found'}},
+        }
+
+    def test_put_plugin_metadata(self, plugin_metadata_table):
+        self._put_item(plugin_metadata_table, {'name': PLUGIN_NAME}, record_type='METADATA')
+
+        assert plugin_metadata.get_plugin_metadata_hashes({PLUGIN_NAME: VERSION, 'napari-bar': VERSION}) == \
+               {(PLUGIN_NAME, VERSION): None}
+
+        plugin_metadata.put_plugin_metadata({'napari-bar': (VERSION, {'name': 'napari-bar'})})
+
+        assert plugin_metadata.get_plugin_metadata('napari-bar', VERSION) == {'name': 'napari-bar'}
+        assert plugin_metadata.get_plugin_metadata_hashes({'napari-bar': VERSION}) == \
+               {('napari-bar', VERSION): plugin_metadata.get_data_hash({'name': 'napari-bar'})}
@@ -4,9 +4,23 @@ import time
 from slugify import slugify
 from collections import defaultdict
 from pynamodb.attributes import ListAttribute, NumberAttribute, UnicodeAttribute
+from pynamodb.indexes import GlobalSecondaryIndex, IncludeProjection
 from pynamodb.models import Model
 from utils.time import get_current_timestamp, print_perf_duration
 
+# Categories of a version never change once seeded, so they are cached by version for the lifetime of the process
+_all_categories_by_version = {}
+_category_by_name_version = {}
+
+
+class _CategoryVersionIndex(GlobalSecondaryIndex):
+    class Meta:
+        index_name = f"{os.environ.get('STACK_NAME')}-category-version"
+        projection = IncludeProjection(["formatted_name", "dimension", "hierarchy", "label"])
+
+    version = UnicodeAttribute(hash_key=True)
+    name = UnicodeAttribute(range_key=True)
+
 
 class CategoryModel(Model):
     class Meta:
@@ -23,6 +37,8 @@ class CategoryModel(Model):
     label = UnicodeAttribute()
     last_updated_timestamp = NumberAttribute(default_for_new=get_current_timestamp)
 
+    version_index = _CategoryVersionIndex()
+
     @classmethod
     def _get_category_from_model(cls, category):
         return {
@@ -37,6 +53,10 @@ class CategoryModel(Model):
         Gets the category data for a particular category and EDAM version.
         """
 
+        key = (slugify(name), version)
+        if key in _category_by_name_version:
+            return _category_by_name_version[key]
+
         category = []
         start = time.perf_counter()
 
@@ -47,6 +67,9 @@ class CategoryModel(Model):
 
         print_perf_duration(start, f"CategoryModel.get_category({name})")
 
+        # categories not seeded yet are looked up again on the next request
+        if category:
+            _category_by_name_version[key] = category
         return category
 
     @classmethod
@@ -55,17 +78,11 @@ class CategoryModel(Model):
         Gets all available category mappings from a particular EDAM version.
         """
 
+        if version in _all_categories_by_version:
+            return _all_categories_by_version[version]
+
         start = time.perf_counter()
-        categories = cls.scan(
-            cls.version == version,
-            attributes_to_get=[
-                "formatted_name",
-                "version",
-                "dimension",
-                "hierarchy",
-                "label",
-            ],
-        )
+        categories = cls.version_index.query(version)
 
         mapped_categories = defaultdict(list)
 
@@ -76,4 +93,6 @@ class CategoryModel(Model):
 
         print_perf_duration(start, "CategoryModel.get_all_categories()")
 
+        if mapped_categories:
+            _all_categories_by_version[version] = mapped_categories
         return mapped_categories
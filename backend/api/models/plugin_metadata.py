@@ -0,0 +1,145 @@
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Iterable, Optional, Tuple
+
+from pynamodb.attributes import MapAttribute, NumberAttribute, UnicodeAttribute
+from pynamodb.models import Model
+
+from api.models.helper import set_ddb_metadata
+
+LOGGER = logging.getLogger()
+
+
+@set_ddb_metadata('plugin-metadata')
+class _PluginMetadataModel(Model):
+    class Meta:
+        pass
+
+    name = UnicodeAttribute(hash_key=True)
+    version_type = UnicodeAttribute(range_key=True)
+    version = UnicodeAttribute(null=True)
+    type = UnicodeAttribute(null=True)
+    manifest_status = UnicodeAttribute(null=True)
+    data = MapAttribute(null=True)
+    data_hash = UnicodeAttribute(null=True)
+    last_updated_timestamp = NumberAttribute(null=True)
+
+
+def _to_version_type(version: str, record_type: str) -> str:
+    return f'{version}:{record_type}'
+
+
+def _get_data(plugin: str, version: str, record_type: str) -> Optional[Dict]:
+    start = time.perf_counter()
+    try:
+        item = _PluginMetadataModel.get(plugin, _to_version_type(version, record_type), attributes_to_get=['data'])
+        return item.data.as_dict() if item.data else {}
+    except _PluginMetadataModel.DoesNotExist:
+        logging.info(f'No {record_type} record found for plugin={plugin} version={version}')
+        return None
+    finally:
+        logging.info(f'get {record_type} for plugin={plugin} version={version} '
+                     f'time_taken={(time.perf_counter() - start) * 1000}ms')
+
+
+def get_manifest_record(plugin: str, version: str) -> Optional[Dict]:
+    """
+    Gets the manifest discovery status and manifest of a plugin version from its DISTRIBUTION record in dynamo
+    :return Optional[Dict]: status of the discovery and manifest as written by the plugins lambda, None if the plugin
+    version has no record. status is None for records written before statuses were recorded.
+
+    :param str plugin: Name of the plugin.
+    :param str version: Version of the plugin.
+    """
+    start = time.perf_counter()
+    try:
+        item = _PluginMetadataModel.get(plugin, _to_version_type(version, 'DISTRIBUTION'),
+                                        attributes_to_get=['manifest_status', 'data'])
+    except _PluginMetadataModel.DoesNotExist:
+        logging.info(f'No DISTRIBUTION record found for plugin={plugin} version={version}')
+        return None
+    finally:
+        logging.info(f'get_manifest_record for plugin={plugin} version={version} '
+                     f'time_taken={(time.perf_counter() - start) * 1000}ms')
+
+    return {'status': item.manifest_status, 'manifest': item.data.as_dict() if item.data else {}}
+
+
+def get_plugin_metadata(plugin: str, version: str) -> Optional[Dict]:
+    """
+    Gets the pypi and github metadata of a plugin version from dynamo
+    :return Optional[Dict]: plugin metadata, None if the plugin version has no record
+
+    :param str plugin: Name of the plugin.
+    :param str version: Version of the plugin.
+    """
+    return _get_data(plugin, version, 'METADATA')
+
+
+def get_plugins_data(plugins: Dict[str, str], fields: Iterable[str]) -> Dict[str, Dict[str, Dict]]:
+    """
+    Gets the metadata and manifest records of many plugin versions with BatchGetItem, projecting only the given
+    fields of their data
+    :return Dict[str, Dict[str, Dict]]: data keyed by plugin name and then record type, METADATA or DISTRIBUTION.
+    Manifests always include the error field when discovery failed.
+
+    :param Dict[str, str] plugins: Plugin names and the versions to fetch.
+    :param Iterable[str] fields: Fields of data to fetch.
+    """
+    keys = [(plugin, _to_version_type(version, record_type))
+            for plugin, version in plugins.items() for record_type in ('METADATA', 'DISTRIBUTION')]
+    attributes = ['name', 'version_type'] + [f'data.{field}' for field in {*fields, 'error'}]
+
+    start = time.perf_counter()
+    results = {}
+    for item in _PluginMetadataModel.batch_get(keys, attributes_to_get=attributes):
+        record_type = item.version_type.rsplit(':', 1)[1]
+        results.setdefault(item.name, {})[record_type] = item.data.as_dict() if item.data else {}
+
+    duration = (time.perf_counter() - start) * 1000
+    logging.info(f'BatchGet for plugins_data count={len(keys)} time_taken={duration}ms')
+    return results
+
+
+def get_data_hash(data: Dict) -> str:
+    """
+    Hash of the data of a record, independent of key order, to find records that changed without reading their data
+    """
+    return hashlib.sha256(json.dumps(data, sort_keys=True, default=str).encode('utf-8')).hexdigest()
+
+
+def get_plugin_metadata_hashes(plugins: Dict[str, str]) -> Dict[Tuple[str, str], Optional[str]]:
+    """
+    Finds which plugin versions already have a metadata record in dynamo, and the hash of their data
+    :return Dict[Tuple[str, str], Optional[str]]: hash of the data by plugin name and version pairs with a record,
+    None for records written before hashes were recorded
+
+    :param Dict[str, str] plugins: Plugin names and the versions to check.
+    """
+    keys = [(plugin, _to_version_type(version, 'METADATA')) for plugin, version in plugins.items()]
+    items = _PluginMetadataModel.batch_get(keys, attributes_to_get=['name', 'version_type', 'data_hash'])
+    return {(item.name, item.version_type.rsplit(':', 1)[0]): item.data_hash for item in items}
+
+
+def put_plugin_metadata(plugins_metadata: Dict[str, Tuple[str, Dict]]) -> None:
+    """
+    Writes the pypi and github metadata of plugin versions to dynamo
+
+    :param Dict[str, Tuple[str, Dict]] plugins_metadata: Plugin names mapped to their version and metadata.
+    """
+    start = time.perf_counter()
+    timestamp = round(time.time() * 1000)
+    with _PluginMetadataModel.batch_write() as batch:
+        for plugin, (version, metadata) in plugins_metadata.items():
+            batch.save(_PluginMetadataModel(name=plugin,
+                                            version_type=_to_version_type(version, 'METADATA'),
+                                            version=version,
+                                            type='METADATA',
+                                            data=metadata,
+                                            data_hash=get_data_hash(metadata),
+                                            last_updated_timestamp=timestamp))
+
+    duration = (time.perf_counter() - start) * 1000
+    logging.info(f'BatchWrite for plugin_metadata count={len(plugins_metadata)} time_taken={duration}ms')
@@ -1,5 +1,5 @@
 import yaml
-from api.model import get_plugin
+from api.model import get_plugins
 from utils.github import get_file
 
 COLLECTIONS_CONTENTS = "https://api.github.com/repos/chanzuckerberg/napari-hub-collections/contents/collections"
@@ -52,22 +52,26 @@ def get_collection_preview(collection_name):
     }
 
 
-def get_collection(collection_name):
+def get_collection(collection_name, use_dynamo=False):
     """Return full collection data for /collections/{collection}."""
     data = get_yaml_data(collection_name=collection_name, visibility_requirements=["public", "hidden"])
     if not data:
         return None
     # Get plugin-specific data
-    plugins = get_plugin_data(data["plugins"])
+    plugins = get_plugin_data(data["plugins"], use_dynamo)
     data["plugins"] = list(plugins)
     return data
 
 
-def get_plugin_data(collection_plugins):
+def get_plugin_data(collection_plugins, use_dynamo=False):
     """Return plugin-specific data for each plugin specified in a collection."""
+    plugins = get_plugins(
+        {collection_plugin["name"]: None for collection_plugin in collection_plugins},
+        ["summary", "authors", "display_name", "visibility"],
+        use_dynamo,
+    )
     for collection_plugin in collection_plugins:
-        plugin_name = collection_plugin["name"]
-        plugin = get_plugin(plugin_name)
+        plugin = plugins.get(collection_plugin["name"])
         # Only include plugins that are set to public
         if plugin and plugin.get("visibility", "public") == "public":
             collection_plugin["summary"] = plugin.get("summary", "")
@@ -0,0 +1,134 @@
+import json
+import logging
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent import futures
+from typing import Callable, Optional
+
+import boto3
+from github3 import GitHub
+
+from api.model import move_artifact_to_s3
+from utils.utils import reformat_ssh_key_to_pem_bytes
+
+LOGGER = logging.getLogger()
+
+# Environment variables set through ecs stack terraform module
+# Where workflow_run webhooks are processed: unset to process them in the request, local for an in-process
+# worker, or sqs to process them from PREVIEW_QUEUE_URL
+preview_queue_mode = os.getenv('PREVIEW_QUEUE', '')
+preview_queue_url = os.getenv('PREVIEW_QUEUE_URL')
+# Number of preview jobs a worker processes at once
+preview_worker_concurrency = int(os.getenv('PREVIEW_WORKER_CONCURRENCY', '4'))
+
+
+def _get_installation_client(installation_id: int) -> GitHub:
+    client = GitHub()
+    client.login_as_app_installation(reformat_ssh_key_to_pem_bytes(os.getenv('GITHUBAPP_KEY')),
+                                     int(os.getenv('GITHUBAPP_ID')),
+                                     installation_id)
+    return client
+
+
+def process_preview_job(payload: dict):
+    """
+    Move the preview artifact of a workflow_run webhook payload to s3, outside of the webhook request.
+
+    :param payload: json body from the github webhook
+    """
+    start = time.perf_counter()
+    client = _get_installation_client(payload['installation']['id'])
+    move_artifact_to_s3(payload, client)
+    LOGGER.info(f"Processed preview job for {payload.get('repository', {}).get('full_name')} "
+                f"time_taken={(time.perf_counter() - start) * 1000}ms")
+
+
+class PreviewJobQueue(ABC):
+    """Queue of workflow_run webhook payloads waiting to be processed."""
+
+    @abstractmethod
+    def enqueue(self, payload: dict):
+        """
+        Queue a payload to be processed by process_preview_job.
+
+        :param payload: json body from the github webhook
+        """
+
+
+class LocalPreviewJobQueue(PreviewJobQueue):
+    """
+    In-process queue, jobs are processed by a bounded pool of worker threads.
+    Meant for local development and tests, as queued jobs are lost when the
+    process exits.
+    """
+
+    def __init__(self, handler: Callable[[dict], None] = process_preview_job,
+                 max_workers: int = preview_worker_concurrency):
+        self._handler = handler
+        self._executor = futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._futures = []
+
+    def _process(self, payload: dict):
+        try:
+            self._handler(payload)
+        except Exception:
+            LOGGER.exception("Failed to process preview job")
+            raise
+
+    def enqueue(self, payload: dict):
+        self._futures.append(self._executor.submit(self._process, payload))
+
+    def join(self):
+        """Wait for all jobs enqueued so far to be processed."""
+        futures.wait(self._futures)
+        self._futures = [future for future in self._futures if not future.done()]
+
+
+class SQSPreviewJobQueue(PreviewJobQueue):
+    """Queue backed by SQS, jobs are processed by handle_preview_jobs."""
+
+    def __init__(self, queue_url: str):
+        self._queue_url = queue_url
+        self._client = boto3.client('sqs')
+
+    def enqueue(self, payload: dict):
+        self._client.send_message(QueueUrl=self._queue_url, MessageBody=json.dumps(payload))
+
+
+def get_preview_job_queue() -> Optional[PreviewJobQueue]:
+    """
+    Get the queue for workflow_run webhooks configured for this environment.
+
+    :return: queue to enqueue webhook payloads to, None to process them in the request
+    """
+    if preview_queue_mode == 'local':
+        return LocalPreviewJobQueue()
+    if preview_queue_mode == 'sqs':
+        if not preview_queue_url:
+            raise ValueError('PREVIEW_QUEUE_URL is required when PREVIEW_QUEUE is sqs')
+        return SQSPreviewJobQueue(preview_queue_url)
+    return None
+
+
+def handle_preview_jobs(event: dict, context, handler: Callable[[dict], None] = process_preview_job) -> dict:
+    """
+    Process a batch of preview jobs delivered by SQS, up to PREVIEW_WORKER_CONCURRENCY at once.
+
+    :param event: SQS event with a webhook payload per record
+    :param context: lambda context
+    :param handler: function processing a webhook payload
+    :return: ids of the messages that failed, so only those are retried
+    """
+    records = [record for record in event.get('Records', []) if 'body' in record]
+    failures = []
+    with futures.ThreadPoolExecutor(max_workers=preview_worker_concurrency) as executor:
+        jobs = {executor.submit(handler, json.loads(record['body'])): record['messageId'] for record in records}
+        for future in futures.as_completed(jobs):
+            try:
+                future.result()
+            except Exception:
+                LOGGER.exception(f"Failed to process preview job message={jobs[future]}")
+                failures.append({'itemIdentifier': jobs[future]})
+    LOGGER.info(f"Processed {len(records)} preview jobs failures={len(failures)}")
+    return {'batchItemFailures': failures}
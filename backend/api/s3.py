@@ -7,10 +7,11 @@ import os.path
 import time
 from datetime import datetime
 from io import StringIO
-from typing import Union, IO, List, Dict, Any
+from typing import Union, IO, List, Dict, Any, Optional, Tuple
 
 import boto3
 import pandas as pd
+from boto3.s3.transfer import TransferConfig, create_transfer_manager
 from botocore.client import Config
 from botocore.exceptions import ClientError
 from utils.utils import send_alert
@@ -22,6 +23,12 @@ bucket_path = os.environ.get('BUCKET_PATH', '')
 endpoint_url = os.environ.get('BOTO_ENDPOINT_URL', None)
 
 s3_client = boto3.client("s3", endpoint_url=endpoint_url, config=Config(max_pool_connections=50))
+# Number of files uploaded concurrently by upload_files, within the client's connection pool
+UPLOAD_CONCURRENCY = 32
+
+# Types of preview page assets that older mimetypes databases don't know
+mimetypes.add_type('font/woff2', '.woff2')
+mimetypes.add_type('application/json', '.map')
 
 
 def get_cache(key: str) -> Union[Dict, List, None]:
@@ -68,11 +75,35 @@ def cache(content: Union[dict, list, IO[bytes]], key: str, mime: str = None):
                                      Key=os.path.join(bucket_path, key), ExtraArgs=extra_args)
 
 
+def upload_files(files: List[Tuple[str, str, Optional[str]]]):
+    """
+    Upload local files concurrently through the s3 transfer manager, streaming
+    each file from disk.
+
+    :param files: local filename, key path in s3 and type of the file, guessed from the key when None
+    """
+    if bucket is None:
+        send_alert(f"({datetime.now()}) Unable to find bucket for lambda "
+                   f"configuration, skipping caching for napari hub."
+                   f"Check terraform setup to add environment variable for "
+                   f"napari hub lambda")
+        return
+    config = TransferConfig(max_concurrency=UPLOAD_CONCURRENCY, use_threads=True)
+    with create_transfer_manager(s3_client, config) as manager:
+        transfer_futures = []
+        for filename, key, mime in files:
+            mime = mime or mimetypes.guess_type(key)[0]
+            extra_args = {'ContentType': mime} if mime else None
+            transfer_futures.append(manager.upload(filename, bucket, os.path.join(bucket_path, key), extra_args))
+        for future in transfer_futures:
+            future.result()
+
+
 def _get_complete_path(path):
     return os.path.join(bucket_path, path)
 
 
-def write_data(data: str, path: str):
+def write_data(data: Union[str, IO[bytes]], path: str):
     s3_client.put_object(Body=data, Bucket=bucket, Key=_get_complete_path(path))
 
 
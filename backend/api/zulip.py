@@ -1,15 +1,35 @@
 import json
+import logging
 import os
-from typing import Dict
+import time
+import threading
+from concurrent import futures
+from typing import Dict, List, Tuple
 
 import requests
 from requests.auth import HTTPBasicAuth
 from requests.exceptions import HTTPError
 
+from utils.github import auth as github_auth
 from utils.test_utils import message_separator
 
 # Environment variable set through ecs stack terraform module
 zulip_credentials = os.environ.get('ZULIP_CREDENTIALS', "")
+# Send a single digest message per run instead of a message per plugin
+zulip_digest = os.environ.get('ZULIP_DIGEST', 'false').lower() == 'true'
+# Minimum seconds between messages, to stay within zulip's rate limits
+zulip_post_interval = float(os.environ.get('ZULIP_POST_INTERVAL_SECONDS', '0.5'))
+# Number of plugins to look up release notes for concurrently
+RELEASE_NOTES_WORKERS = 16
+# Zulip rejects messages longer than this
+MAX_MESSAGE_LENGTH = 10000
+DIGEST_TOPIC = 'napari hub updates'
+
+# Whether release tags of a repo have a v in front, by '{owner name}/{plugin name}'
+_tag_forms: Dict[str, bool] = {}
+_tag_forms_lock = threading.Lock()
+
+LOGGER = logging.getLogger()
 
 
 def notify_new_packages(existing_packages: Dict[str, str], new_packages: Dict[str, str], packages_metadata: dict):
@@ -20,25 +40,90 @@ def notify_new_packages(existing_packages: Dict[str, str], new_packages: Dict[st
     :param new_packages: new packages found
     :param packages_metadata: metadata for the packages, contains information about github links
     """
+    start = time.perf_counter()
     username = None
     key = None
     if zulip_credentials is not None and len(zulip_credentials.split(":")) == 2:
         username = zulip_credentials.split(":")[0]
         key = zulip_credentials.split(":")[1]
-    for package, version in new_packages.items():
-        message = create_message(package, version, existing_packages, packages_metadata)
-        if username and key and message:
-            send_zulip_message(username, key, package, message)
+
+    # release notes lookups are independent, so messages are created concurrently
+    with futures.ThreadPoolExecutor(max_workers=RELEASE_NOTES_WORKERS) as executor:
+        created_messages = executor.map(lambda item: (item[0], create_message(item[0], item[1], existing_packages,
+                                                                              packages_metadata)),
+                                        new_packages.items())
+        messages = [(package, message) for package, message in created_messages if message]
+
+    for package in existing_packages:
+        if package not in new_packages:
+            messages.append((package, 'This plugin is no longer available on the [napari hub](https://napari-hub.org) :('))
+
+    if zulip_digest:
+        messages = [(DIGEST_TOPIC, digest) for digest in create_digests(messages)]
+
+    last_post = None
+    for topic, message in messages:
+        if username and key:
+            # posts are spaced out to respect zulip's rate limit
+            if last_post is not None:
+                time.sleep(max(0.0, last_post + zulip_post_interval - time.monotonic()))
+            last_post = time.monotonic()
+            send_zulip_message(username, key, topic, message)
         else:
             print(message)
+    LOGGER.info(f'Sent {len(messages)} zulip messages time_taken={(time.perf_counter() - start) * 1000}ms')
+
+
+def notify_new_packages_async(existing_packages: Dict[str, str], new_packages: Dict[str, str],
+                              packages_metadata: dict) -> futures.Future:
+    """
+    Notify zulip about new packages in a background thread, so that release
+    notes lookups and rate limited posts don't hold up the caller.
+
+    :param existing_packages: existing packages in cache
+    :param new_packages: new packages found
+    :param packages_metadata: metadata for the packages, contains information about github links
+    :return: future for the notification, to wait on with wait_for_notification before the process may exit
+    """
+    executor = futures.ThreadPoolExecutor(max_workers=1)
+    future = executor.submit(notify_new_packages, existing_packages, new_packages, packages_metadata)
+    executor.shutdown(wait=False)
+    return future
+
+
+def wait_for_notification(notification: futures.Future):
+    """
+    Wait for a notification started by notify_new_packages_async, logging rather than raising its failure.
+
+    :param notification: future returned by notify_new_packages_async
+    """
+    try:
+        notification.result()
+    except Exception:
+        LOGGER.exception("Failed to notify zulip of plugin updates")
+
+
+def create_digests(messages: List[Tuple[str, str]]) -> List[str]:
+    """
+    Combine the messages of a run into as few digest messages as fit in zulip's message length limit.
+
+    :param messages: topic and message pairs
+    :return: digest messages
+    """
+    digests = []
+    current = ''
+    for topic, message in messages:
+        entry = f'**{topic}**: {message}'
+        if len(entry) > MAX_MESSAGE_LENGTH:
+            entry = entry[:MAX_MESSAGE_LENGTH - 3] + '...'
+        if current and len(current) + len(message_separator) + len(entry) > MAX_MESSAGE_LENGTH:
+            digests.append(current)
+            current = ''
+        current = f'{current}{message_separator}{entry}' if current else entry
+    if current:
+        digests.append(current)
+    return digests
 
-    for package, version in existing_packages.items():
-        if package not in new_packages:
-            message = f'This plugin is no longer available on the [napari hub](https://napari-hub.org) :('
-            if username and key:
-                send_zulip_message(username, key, package, message)
-            else:
-                print(message)
 
 def create_message(package: str, version: str, existing_packages: Dict[str, str], packages_metadata: dict):
     """
@@ -97,23 +182,16 @@ def generate_release_notes_and_link_to_release(package: str, version: str, packa
     if packages_metadata[package].get("code_repository"):
         github_link = packages_metadata[package]["code_repository"]
         owner_and_name = get_owner_and_name(github_link)
-        github_api_endpoint = create_github_endpoint(owner_and_name, version, with_v = False)
-        release_notes = get_release_notes(github_api_endpoint)
         # there is a slight mismatch between pypi package version and github tag version
         # sometimes the github tag version version has a v in the front, but versions from pypi metadata never have a v in the front
-        # can't tell if release notes exist without trying both possibilities due to format of github api responses, hence the need to call the github api twice 
-        if not release_notes:
-            github_api_endpoint_with_v = create_github_endpoint(owner_and_name, version, with_v = True)
-            release_notes = get_release_notes(github_api_endpoint_with_v)
-            # if the 2nd attempt gets release notes, we make a link with v in the version
-            if release_notes:
-                link_to_release = f'[v{version}]({github_link}/releases/tag/v{version})'
-            # if the 2nd attempt fails to get release notes, we default to using the napari-hub link
-            else:
-                link_to_release = f'[{version}](https://napari-hub.org/plugins/{package})'
-        # if release notes were found, we know the version without v is the right one
+        # repos are consistent in their tag form, so the form found for a repo is tried first and the other only when it fails
+        release_notes, with_v = get_release_notes_for_version(owner_and_name, version)
+        if release_notes:
+            tag = f'v{version}' if with_v else version
+            link_to_release = f'[{tag}]({github_link}/releases/tag/{tag})'
+        # if no release notes were found, we default to using the napari-hub link
         else:
-            link_to_release = f'[{version}]({github_link}/releases/tag/{version})'
+            link_to_release = f'[{version}](https://napari-hub.org/plugins/{package})'
     else:
         # link to napari hub will be used unstead of link to github if the plugin doesn't have a github repo
         release_notes = ''
@@ -129,6 +207,38 @@ def get_owner_and_name(github_link):
     """
     return github_link.replace('https://github.com/', '')
 
+def get_release_notes_for_version(owner_and_name: str, version: str) -> Tuple[str, bool]:
+    """
+    Look up the release notes of a version. The tag form last found for the repo is tried first, otherwise the tags
+    with and without a v are requested concurrently and the first form with release notes is used.
+    The form of the tag the release notes were found under is remembered for the repo.
+
+    :param owner_and_name: a string containing the owner of the repo and the name of the plugin in the form '{owner name}/{plugin name}'
+    :param version: current version of the plugin
+    :return: release notes, or an empty string if none were found, and whether the tag has a v
+    """
+    with _tag_forms_lock:
+        known = _tag_forms.get(owner_and_name)
+    if known is not None:
+        release_notes = get_release_notes(create_github_endpoint(owner_and_name, version, with_v = known))
+        if release_notes:
+            return release_notes, known
+
+    forms = (False, True) if known is None else (not known,)
+    executor = futures.ThreadPoolExecutor(max_workers=len(forms))
+    lookups = {executor.submit(get_release_notes, create_github_endpoint(owner_and_name, version, with_v = with_v)):
+               with_v for with_v in forms}
+    # the lookup of the other form is left to finish in the background once release notes are found
+    executor.shutdown(wait=False)
+    for lookup in futures.as_completed(lookups):
+        release_notes = lookup.result()
+        if release_notes:
+            with_v = lookups[lookup]
+            with _tag_forms_lock:
+                _tag_forms[owner_and_name] = with_v
+            return release_notes, with_v
+    return '', False
+
 def create_github_endpoint(owner_and_name, version, with_v = False):
     """
     Creates a link to a github api endpoint that could be used to get release notes
@@ -152,7 +262,7 @@ def get_release_notes(endpoint: str):
     :param endpoint: Github actions endpoint
     """
     try:
-        response = requests.get(endpoint)
+        response = requests.get(endpoint, auth=github_auth)
         if response.status_code != requests.codes.ok:
             response.raise_for_status()
         info = json.loads(response.text.strip())
@@ -0,0 +1,91 @@
+"""
+Benchmark generating the hub category mappings of the EDAM-bioimaging
+ontology with iterate_parent and with OntologyEngine.
+
+Usage, from the backend directory:
+    python -m benchmarks.bench_edam_mapping [--version alpha06] [--csv PATH]
+    python -m benchmarks.bench_edam_mapping --synthetic-depth 14
+
+The full ontology csv is downloaded from edamontology.org unless a local copy
+is given. A synthetic layered ontology can be used instead to see how both
+scale with the number of ancestors per label.
+"""
+import argparse
+import json
+import os
+import random
+import time
+
+from category.edam import OntologyEngine, get_edam_ontology, iterate_parent
+
+HUB_MAPPING_PATH = os.path.join(os.path.dirname(__file__), '..', 'category', 'data', 'EDAM-BIOIMAGING',
+                                'hub-mapping-{version}.json')
+
+
+def _synthetic_ontology(depth: int, width: int = 40, parents: int = 3, seed: int = 0):
+    rng = random.Random(seed)
+    layers = [[f'term {layer}.{i}' for i in range(width)] for layer in range(depth)]
+    ontology = {label: [] for label in layers[0]}
+    for previous, layer in zip(layers, layers[1:]):
+        for label in layer:
+            ontology[label] = rng.sample(previous, parents)
+    # hub terms only near the top, so most of the graph is walked to find them
+    hub_mapping = {label: {'label': label, 'dimension': 'Operation'} for label in rng.sample(layers[1], 4)}
+    return ontology, hub_mapping
+
+
+def _time(func):
+    start = time.perf_counter()
+    result = func()
+    return result, round((time.perf_counter() - start) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--version', default='alpha06', help='EDAM-bioimaging version')
+    parser.add_argument('--csv', help='local copy of the EDAM-bioimaging csv')
+    parser.add_argument('--synthetic-depth', type=int, help='use a synthetic ontology with this many layers')
+    parser.add_argument('--skip-baseline', action='store_true', help='do not run iterate_parent')
+    args = parser.parse_args()
+
+    if args.synthetic_depth:
+        ontology, hub_mapping = _synthetic_ontology(args.synthetic_depth)
+        source = f'synthetic depth={args.synthetic_depth}'
+    else:
+        ontology = get_edam_ontology(args.version, args.csv)
+        with open(HUB_MAPPING_PATH.format(version=args.version)) as hub_mapping_json:
+            hub_mapping = json.load(hub_mapping_json)
+        source = f'EDAM-bioimaging {args.version}'
+
+    results = {}
+    engine = OntologyEngine(ontology)
+    edam_mappings, results['OntologyEngine.generate'] = _time(lambda: engine.generate(hub_mapping))
+
+    if not args.skip_baseline:
+        def _iterate_parent():
+            baseline = {}
+            for label in ontology:
+                mapped = iterate_parent(label, ontology, [], hub_mapping)
+                if mapped:
+                    baseline[label] = mapped
+            return baseline
+
+        baseline, results['iterate_parent'] = _time(_iterate_parent)
+        assert baseline == edam_mappings, 'OntologyEngine and iterate_parent mappings differ'
+
+    changed_label = next(iter(hub_mapping))
+    changed_hub_mapping = {**hub_mapping, changed_label: {**hub_mapping[changed_label], 'label': 'Renamed'}}
+    _, results['OntologyEngine.regenerate (one hub term changed)'] = _time(
+        lambda: engine.regenerate(changed_hub_mapping, hub_mapping, edam_mappings))
+
+    print(json.dumps({
+        'ontology': source,
+        'labels': len(ontology),
+        'mapped_labels': len(edam_mappings),
+        'hierarchies': sum(len(mapped) for mapped in edam_mappings.values()),
+        'time_ms': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
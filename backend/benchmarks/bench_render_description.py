@@ -0,0 +1,115 @@
+"""
+Benchmark description rendering on the READMEs of real plugins, as published
+to PyPI.
+
+Usage, from the backend directory:
+    python -m benchmarks.bench_render_description [--plugins N] [--corpus DIR]
+
+Descriptions are downloaded into the corpus directory on the first run, so
+later runs work offline and compare the same inputs.
+"""
+import argparse
+import json
+import os
+import time
+from concurrent import futures
+
+import requests
+
+from utils import utils
+from utils.pypi import query_pypi
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(__file__), '.corpus', 'descriptions')
+# Used when the PyPI search can't be queried
+KNOWN_PLUGINS = [
+    'napari-aicsimageio', 'napari-animation', 'napari-apr-viewer', 'napari-assistant',
+    'napari-brightness-contrast', 'napari-clusters-plotter', 'napari-crop', 'napari-curtain', 'napari-czifile2',
+    'napari-accelerated-pixel-and-object-classification', 'napari-ome-zarr', 'napari-plot-profile',
+    'napari-pyclesperanto-assistant', 'napari-segment-blobs-and-things-with-membranes',
+    'napari-simpleitk-image-processing', 'napari-skimage-regionprops', 'napari-stl-exporter',
+    'napari-time-slicer', 'napari-tools-menu', 'napari-workflow-inspector', 'napari-workflows',
+    'napari-sim-processor', 'napari-lattice', 'napari-mm3', 'napari-nd2-folder-viewer', 'napari-console',
+    'napari-svg', 'napari-tifffile-reader', 'napari-imc', 'napari-mat-images', 'napari-bioformats',
+    'napari-stardist', 'stardist-napari', 'cellpose-napari', 'napari-cellseg3d', 'napari-em-reader',
+    'napari-omero', 'napari-hdf5-labels-io', 'napari-label-interpolator', 'napari-properties-plotter',
+    'napari-properties-viewer', 'napari-matplotlib', 'napari-threedee', 'napari-sc3d-viewer',
+    'napari-spreadsheet', 'napari-feature-classifier', 'napari-tracks-reader', 'btrack', 'napari-mri',
+    'devbio-napari', 'affinder', 'napari-allencell-segmenter', 'napari-blob-detection', 'napari-boids',
+    'napari-dvid', 'napari-dzi-zarr', 'napari-geojson', 'napari-error-reporter', 'napari-n2v',
+    'napari-nikon-nd2', 'napari-plugin-search', 'napari-pssr', 'napari-roi', 'napari-sediment',
+    'napari-serialcellpose', 'napari-splinedist', 'napari-yolov5', 'napari-zelda', 'napari-bil-data-viewer',
+    'napari-3d-ortho-viewer', 'napari-arboretum', 'napari-annotator', 'napari-buds', 'napari-cool-tools-io',
+    'napari-layer-details-display', 'napari-mouse-controls', 'napari-nifti', 'napari-pdr-reader',
+    'napari-video', 'napari-compressed-labels-io', 'napari-hello', 'napari-demo', 'empanada-napari',
+    'napari-deepfinder',
+]
+
+
+def _download_corpus(corpus: str, count: int):
+    os.makedirs(corpus, exist_ok=True)
+    plugins = sorted(query_pypi() or KNOWN_PLUGINS)[:count]
+
+    def _download(plugin):
+        path = os.path.join(corpus, f'{plugin}.md')
+        if not os.path.exists(path):
+            response = requests.get(f'https://pypi.org/pypi/{plugin}/json')
+            if response.status_code != requests.codes.ok:
+                return
+            with open(path, 'w') as f:
+                f.write(response.json()['info']['description'] or '')
+
+    with futures.ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(_download, plugins))
+
+
+def _load_corpus(corpus: str, count: int) -> dict:
+    names = sorted(os.listdir(corpus))[:count]
+    descriptions = {}
+    for name in names:
+        with open(os.path.join(corpus, name)) as f:
+            descriptions[name[:-len('.md')]] = f.read()
+    return descriptions
+
+
+def _time(label: str, func, results: dict):
+    utils._rendered_descriptions.clear()
+    start = time.perf_counter()
+    func()
+    results[label] = round((time.perf_counter() - start) * 1000, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--plugins', type=int, default=200, help='number of plugin descriptions to render')
+    parser.add_argument('--corpus', default=DEFAULT_CORPUS, help='directory with one <plugin>.md per description')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes for the process pool')
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.corpus) or not os.listdir(args.corpus):
+        _download_corpus(args.corpus, args.plugins)
+    descriptions = _load_corpus(args.corpus, args.plugins)
+
+    results = {}
+    for extractor in ('markdown', 'plain'):
+        def _threads():
+            with futures.ThreadPoolExecutor(max_workers=32) as executor:
+                list(executor.map(lambda d: utils.render_description(d, extractor), descriptions.values()))
+
+        _time(f'{extractor} threads(32)', _threads, results)
+        _time(f'{extractor} processes', lambda: utils.render_descriptions(descriptions, extractor, args.workers),
+              results)
+        utils.render_descriptions(descriptions, extractor)
+        start = time.perf_counter()
+        utils.render_descriptions(descriptions, extractor)
+        results[f'{extractor} memoized'] = round((time.perf_counter() - start) * 1000, 1)
+
+    print(json.dumps({
+        'descriptions': len(descriptions),
+        'total_bytes': sum(len(d) for d in descriptions.values()),
+        'cpu_count': os.cpu_count(),
+        'time_ms': results,
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import random
+
+import pytest
+
+from category.edam import OntologyCycleError, OntologyEngine, iterate_parent
+
+ONTOLOGY = {
+    'Manual segmentation': ['Image segmentation', 'Dense image annotation'],
+    'Semi-automatic segmentation': ['Image segmentation'],
+    'Image segmentation': ['Image analysis'],
+    'Dense image annotation': ['Image annotation'],
+    'Sparse image annotation': ['Image annotation'],
+    'Image annotation': ['Image analysis'],
+    'Image analysis': [],
+}
+HUB_MAPPING = {
+    'Image segmentation': {'label': 'Image Segmentation', 'dimension': 'Operation'},
+    'Image annotation': {'label': 'Image annotation', 'dimension': 'Operation'},
+}
+
+
+def _generate_with_iterate_parent(ontology, hub_mapping):
+    edam_mappings = {}
+    for label in ontology:
+        mapped = iterate_parent(label, ontology, [], hub_mapping)
+        if mapped:
+            edam_mappings[label] = mapped
+    return edam_mappings
+
+
+def _random_ontology(size, seed):
+    rng = random.Random(seed)
+    labels = [f'term {i}' for i in range(size)]
+    ontology = {label: rng.sample(labels[:i], min(i, rng.randint(0, 3))) for i, label in enumerate(labels)}
+    hub_mapping = {label: {'label': label.title(), 'dimension': rng.choice(['Operation', 'Image modality'])}
+                   for label in rng.sample(labels, size // 5)}
+    return ontology, hub_mapping
+
+
+def test_generate():
+    expected = _generate_with_iterate_parent(ONTOLOGY, HUB_MAPPING)
+
+    assert OntologyEngine(ONTOLOGY).generate(HUB_MAPPING) == expected
+    assert expected['Manual segmentation'][1]['hierarchy'] == [
+        'Image annotation', 'Dense image annotation', 'Manual segmentation'
+    ]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_generate_matches_iterate_parent(seed):
+    ontology, hub_mapping = _random_ontology(60, seed)
+
+    assert OntologyEngine(ontology).generate(hub_mapping) == _generate_with_iterate_parent(ontology, hub_mapping)
+
+
+def test_cycle_detected():
+    ontology = {**ONTOLOGY, 'Image analysis': ['Manual segmentation']}
+
+    with pytest.raises(OntologyCycleError, match='Manual segmentation'):
+        OntologyEngine(ontology).generate({})
+
+
+def test_cycle_above_mapped_label_ignored():
+    ontology = {**ONTOLOGY, 'Image analysis': ['Manual segmentation']}
+
+    assert OntologyEngine(ontology).generate(HUB_MAPPING) == _generate_with_iterate_parent(ontology, HUB_MAPPING)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_regenerate(seed):
+    ontology, previous_hub_mapping = _random_ontology(60, seed)
+    engine = OntologyEngine(ontology)
+    previous_edam_mappings = engine.generate(previous_hub_mapping)
+    hub_mapping = dict(list(previous_hub_mapping.items())[2:])
+    hub_mapping['term 30'] = {'label': 'Added', 'dimension': 'Operation'}
+    changed = next(iter(hub_mapping))
+    hub_mapping[changed] = {**hub_mapping[changed], 'label': 'Renamed'}
+
+    actual = engine.regenerate(hub_mapping, previous_hub_mapping, previous_edam_mappings)
+
+    assert actual == engine.generate(hub_mapping)
@@ -1,15 +1,19 @@
+import argparse
 import json
 import csv
 import requests
-from typing import Dict, List
+from collections import deque
+from typing import Dict, List, Optional, Set, Tuple
 
 
-def get_edam_ontology(version: str) -> Dict[str, List[str]]:
+def get_edam_ontology(version: str, csv_path: Optional[str] = None) -> Dict[str, List[str]]:
     """
     Parameters
     ----------
     version : str
         version of edam ontology to get.
+    csv_path : str, optional
+        local copy of the ontology csv to read instead of downloading it.
 
     Returns
     -------
@@ -28,18 +32,23 @@ def get_edam_ontology(version: str) -> Dict[str, List[str]]:
             ]
         }
     """
-    version = f"_{version}" if version else version
-    url = f'https://edamontology.org/EDAM-bioimaging{version}.csv'
-    response = requests.get(url)
-    if response.status_code != requests.codes.ok:
-        response.raise_for_status()
+    if csv_path:
+        with open(csv_path, encoding='utf-8') as csv_file:
+            lines = csv_file.read().splitlines()
+    else:
+        version = f"_{version}" if version else version
+        url = f'https://edamontology.org/EDAM-bioimaging{version}.csv'
+        response = requests.get(url)
+        if response.status_code != requests.codes.ok:
+            response.raise_for_status()
+        lines = response.content.decode('utf-8').splitlines()
 
     ontology = {
         category['Class ID']: {
             "label": category['Preferred Label'],
             "parents": category['Parents'].split("|")
         }
-        for category in csv.DictReader(response.content.decode('utf-8').splitlines())
+        for category in csv.DictReader(lines)
     }
 
     return {
@@ -105,26 +114,169 @@ def iterate_parent(ontology_label: str, ontology: Dict[str, List[str]],
     return all_families
 
 
+class OntologyCycleError(ValueError):
+    """Raised when a label is its own ancestor in the ontology."""
+
+
+class OntologyEngine:
+    """
+    Computes the hierarchies from every ontology label up to the hub terms it
+    maps to, like iterate_parent, but walks the parent DAG once.
+
+    The hierarchies of a label are built from the memoized hierarchies of its
+    parents, so shared ancestors are not walked again for every label below
+    them and no partial family trees are copied at each branch.
+
+    Parameters
+    ----------
+    ontology
+        name to parents mappings.
+    """
+
+    def __init__(self, ontology: Dict[str, List[str]]):
+        self._ontology = ontology
+        self._children = None
+
+    def _get_paths(self, label: str, hub_mapping: Dict[str, Dict[str, str]],
+                   paths: Dict[str, Tuple[Tuple[str, ...], ...]]) -> Tuple[Tuple[str, ...], ...]:
+        if label in paths:
+            return paths[label]
+        # iterative post-order walk of the ancestors not memoized yet, with the
+        # labels on the stack tracked to detect cycles
+        stack = [(label, iter(self._ontology.get(label, [])))]
+        on_stack = {label}
+        while stack:
+            current, parents = stack[-1]
+            if current not in hub_mapping:
+                parent = next((parent for parent in parents if parent not in paths), None)
+                if parent is not None:
+                    if parent in on_stack:
+                        cycle = [entry for entry, _ in stack]
+                        cycle = cycle[cycle.index(parent):] + [parent]
+                        raise OntologyCycleError(f"Cycle in ontology: {' -> '.join(cycle)}")
+                    stack.append((parent, iter(self._ontology.get(parent, []))))
+                    on_stack.add(parent)
+                    continue
+            stack.pop()
+            on_stack.remove(current)
+            if current in hub_mapping:
+                paths[current] = ((current,),)
+            else:
+                paths[current] = tuple(path + (current,)
+                                       for parent in self._ontology.get(current, [])
+                                       for path in paths[parent])
+        return paths[label]
+
+    @staticmethod
+    def _to_mapping(path: Tuple[str, ...], hub_mapping: Dict[str, Dict[str, str]]) -> Dict:
+        return {
+            "label": hub_mapping[path[0]]["label"],
+            "dimension": hub_mapping[path[0]]["dimension"],
+            "hierarchy": list(path),
+        }
+
+    def _generate(self, labels, hub_mapping: Dict[str, Dict[str, str]]) -> Dict[str, List[Dict]]:
+        paths = {}
+        edam_mappings = {}
+        for label in labels:
+            label_paths = self._get_paths(label, hub_mapping, paths)
+            if label_paths:
+                edam_mappings[label] = [self._to_mapping(path, hub_mapping) for path in label_paths]
+        return edam_mappings
+
+    def generate(self, hub_mapping: Dict[str, Dict[str, str]]) -> Dict[str, List[Dict]]:
+        """
+        Generate the hub term mappings of all ontology labels.
+
+        Parameters
+        ----------
+        hub_mapping
+            ontology label to hub term/dimension mappings.
+
+        Returns
+        -------
+        ontology label to its list of mapped dictionaries of label, dimension, and hierarchy, for labels with
+        at least one mapping, in the same format as iterate_parent.
+        """
+        return self._generate(self._ontology.keys(), hub_mapping)
+
+    def get_descendants(self, labels: Set[str]) -> Set[str]:
+        """
+        Get the given labels and all labels below them in the ontology.
+        """
+        if self._children is None:
+            self._children = {}
+            for label, parents in self._ontology.items():
+                for parent in parents:
+                    self._children.setdefault(parent, []).append(label)
+        descendants = set(labels)
+        queue = deque(labels)
+        while queue:
+            for child in self._children.get(queue.popleft(), []):
+                if child not in descendants:
+                    descendants.add(child)
+                    queue.append(child)
+        return descendants
+
+    def regenerate(self, hub_mapping: Dict[str, Dict[str, str]], previous_hub_mapping: Dict[str, Dict[str, str]],
+                   previous_edam_mappings: Dict[str, List[Dict]]) -> Dict[str, List[Dict]]:
+        """
+        Regenerate mappings after the hub mapping changed, for an unchanged ontology.
+        Only labels at or below a hub term that was added, removed or changed are
+        walked again, the mappings of all other labels are reused.
+
+        Parameters
+        ----------
+        hub_mapping
+            ontology label to hub term/dimension mappings.
+        previous_hub_mapping
+            hub mapping the previous mappings were generated with.
+        previous_edam_mappings
+            mappings generated with the previous hub mapping.
+
+        Returns
+        -------
+        same as generate.
+        """
+        changed = {label for label in hub_mapping.keys() | previous_hub_mapping.keys()
+                   if hub_mapping.get(label) != previous_hub_mapping.get(label)}
+        affected = self.get_descendants(changed)
+        edam_mappings = {label: mapped for label, mapped in previous_edam_mappings.items()
+                         if label not in affected}
+        edam_mappings.update(self._generate([label for label in self._ontology if label in affected], hub_mapping))
+        # keep the ontology order of generate
+        return {label: edam_mappings[label] for label in self._ontology if label in edam_mappings}
+
+
 if __name__ == "__main__":
     # Generate mapping json from edam ontology for a particular version
-    edam_version = 'alpha06'
+    parser = argparse.ArgumentParser(description="Generate the hub category mappings of an EDAM version")
+    parser.add_argument("--version", default="alpha06", help="EDAM-bioimaging version")
+    parser.add_argument("--csv", help="local copy of the EDAM-bioimaging csv, downloaded if not given")
+    parser.add_argument("--previous-hub-mapping",
+                        help="hub mapping the existing mappings were generated with, to only regenerate the labels "
+                             "affected by the changes to the hub mapping")
+    args = parser.parse_args()
+    edam_version = args.version
 
     # the dimension mapping file is curated specifically for a particular version
     # the edam-alpha06 version can be found in here:
     # https://airtable.com/appWpxrq1iPzzxyFE/tblwIaRmQjEkMD1pm/viw2CboXiF0JQqxdr
-    with open(f"data/EDAM-BIOIMAGING/hub-mapping-{edam_version}.json") as hub_mapping_json, \
-            open(f"data/EDAM-BIOIMAGING/{edam_version}.json", "w") as edam_mappings_json:
-
+    with open(f"data/EDAM-BIOIMAGING/hub-mapping-{edam_version}.json") as hub_mapping_json:
         edam_to_hub = json.load(hub_mapping_json)
 
-        # load edam terms
-        edam = get_edam_ontology(edam_version)
+    # load edam terms
+    edam = get_edam_ontology(edam_version, args.csv)
+    engine = OntologyEngine(edam)
 
-        # generate hub term mapping for all edam terms with hierarchy
-        edam_mappings = {}
-        for label in edam.keys():
-            mapped = iterate_parent(label, edam, [], edam_to_hub)
-            if mapped:
-                edam_mappings[label] = mapped
+    # generate hub term mapping for all edam terms with hierarchy
+    if args.previous_hub_mapping:
+        with open(args.previous_hub_mapping) as previous_hub_mapping_json, \
+                open(f"data/EDAM-BIOIMAGING/{edam_version}.json") as previous_edam_mappings_json:
+            edam_mappings = engine.regenerate(edam_to_hub, json.load(previous_hub_mapping_json),
+                                              json.load(previous_edam_mappings_json))
+    else:
+        edam_mappings = engine.generate(edam_to_hub)
 
+    with open(f"data/EDAM-BIOIMAGING/{edam_version}.json", "w") as edam_mappings_json:
         json.dump(edam_mappings, edam_mappings_json, indent=2)
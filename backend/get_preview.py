@@ -7,6 +7,9 @@ parser.add_argument('repo_pth', action='store', help='Path to GitHub repository
 parser.add_argument('dest', action='store', help='Path to destination directory (must exist).')
 parser.add_argument('--local', action='store_true', help='Use if repo_pth is path to a local repository.')
 parser.add_argument('--branch', action='store', nargs='?', default='HEAD', help='specify branch for the repository')
+parser.add_argument('--shallow', action='store_true', help='Clone only the files and history needed for the preview.')
+parser.add_argument('--always-build', action='store_true', help='Build the distribution even when package metadata is static.')
+parser.add_argument('--cache-dir', action='store', default=os.getenv('PREVIEW_CACHE_DIR'), help='Path to directory caching built wheels and metadata across runs.')
 
 if __name__ == '__main__':
     args = parser.parse_args()
@@ -14,4 +17,6 @@ if __name__ == '__main__':
     if args.local:
         repo_pth = os.path.abspath(args.repo_pth)
     dest_pth = os.path.abspath(args.dest)
-    get_plugin_preview(repo_pth, dest_pth, args.local, args.branch)
+    metadata_source = get_plugin_preview(repo_pth, dest_pth, args.local, args.branch, args.cache_dir, args.shallow,
+                                         static=not args.always_build)
+    print(f'Package metadata read from {metadata_source}')
@@ -0,0 +1,37 @@
+import os
+import logging
+import argparse
+from preview.batch import get_plugin_previews, write_report, DEFAULT_MAX_WORKERS, DEFAULT_TIMEOUT_SECONDS
+
+parser = argparse.ArgumentParser(description='Write preview metadata of many repositories to JSON.')
+parser.add_argument('repos', action='store', help='Path to file listing a GitHub repository URL per line, optionally followed by a branch.')
+parser.add_argument('dest', action='store', help='Path to destination directory (must exist).')
+parser.add_argument('--max-workers', action='store', type=int, default=DEFAULT_MAX_WORKERS, help='Maximum number of previews running at once.')
+parser.add_argument('--timeout', action='store', type=float, default=DEFAULT_TIMEOUT_SECONDS, help='Time limit per preview in seconds.')
+parser.add_argument('--shallow', action='store_true', help='Clone only the files and history needed for the preview.')
+parser.add_argument('--cache-dir', action='store', default=os.getenv('PREVIEW_CACHE_DIR'), help='Path to directory caching built wheels and metadata across runs.')
+parser.add_argument('--clone-cache-dir', action='store', help='Path to directory keeping a mirror of each repository across runs.')
+
+
+def read_repos(pth):
+    repos = []
+    with open(pth) as f:
+        for line in f:
+            fields = line.split('#', 1)[0].split()
+            if fields:
+                repos.append((fields[0], fields[1] if len(fields) > 1 else 'HEAD'))
+    return repos
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    args = parser.parse_args()
+    dest_pth = os.path.abspath(args.dest)
+    report = get_plugin_previews(read_repos(args.repos), dest_pth,
+                                 max_workers=args.max_workers,
+                                 timeout=args.timeout,
+                                 cache_dir=args.cache_dir and os.path.abspath(args.cache_dir),
+                                 clone_cache_dir=args.clone_cache_dir and os.path.abspath(args.clone_cache_dir),
+                                 shallow=args.shallow)
+    print(f'Report written to {write_report(report, dest_pth)}')
+    print(report['summary'])
@@ -0,0 +1,65 @@
+import os
+import time
+from unittest.mock import patch
+
+from git import Actor, Repo
+
+from preview import batch
+
+AUTHOR = Actor('napari-hub', 'hub@example.com')
+
+
+def _fake_preview(code_url, branch, preview_dir, cache_dir, clone_cache_dir, shallow):
+    if code_url.endswith('broken'):
+        raise RuntimeError('Could not build distribution')
+    if code_url.endswith('slow'):
+        time.sleep(10)
+    os.makedirs(preview_dir, exist_ok=True)
+    return 'static'
+
+
+@patch.object(batch, '_preview_repo', _fake_preview)
+def test_get_plugin_previews(tmpdir):
+    repos = [('https://github.com/foo/napari-foo', 'HEAD'),
+             ('https://github.com/foo/napari-foo', 'feature'),
+             ('https://github.com/foo/broken', 'HEAD'),
+             ('https://github.com/foo/slow', 'HEAD')]
+
+    start = time.perf_counter()
+    report = batch.get_plugin_previews(repos, str(tmpdir), max_workers=4, timeout=1)
+
+    assert time.perf_counter() - start < 5
+    results = {(result['repo'], result['branch']): result for result in report['results']}
+    assert results[repos[0]]['status'] == batch.OK
+    assert results[repos[0]]['metadata_source'] == 'static'
+    assert results[repos[1]]['preview_meta'] == os.path.join(str(tmpdir), 'foo_napari-foo@feature',
+                                                             'preview_meta.json')
+    assert results[repos[2]]['status'] == batch.ERROR
+    assert results[repos[2]]['error'] == 'Could not build distribution'
+    assert results[repos[3]]['status'] == batch.TIMED_OUT
+    assert {key: report['summary'][key] for key in (batch.OK, batch.ERROR, batch.TIMED_OUT, 'metadata_static')} == {
+        batch.OK: 2, batch.ERROR: 1, batch.TIMED_OUT: 1, 'metadata_static': 2,
+    }
+
+
+def test_clone_from_cache(tmpdir):
+    origin = Repo.init(str(tmpdir.mkdir('origin')))
+    readme = os.path.join(origin.working_tree_dir, 'README.md')
+    with open(readme, 'w') as f:
+        f.write('first')
+    origin.index.add(['README.md'])
+    origin.index.commit('first', author=AUTHOR, committer=AUTHOR)
+    clone_cache_dir = str(tmpdir.join('clones'))
+
+    first = batch.clone_from_cache(origin.working_tree_dir, str(tmpdir.mkdir('first')), clone_cache_dir)
+    with open(readme, 'w') as f:
+        f.write('second')
+    origin.index.add(['README.md'])
+    origin.index.commit('second', author=AUTHOR, committer=AUTHOR)
+    second = batch.clone_from_cache(origin.working_tree_dir, str(tmpdir.mkdir('second')), clone_cache_dir)
+
+    assert len([name for name in os.listdir(clone_cache_dir) if name.endswith('.git')]) == 1
+    with open(os.path.join(first, 'README.md')) as f:
+        assert f.read() == 'first'
+    with open(os.path.join(second, 'README.md')) as f:
+        assert f.read() == 'second'
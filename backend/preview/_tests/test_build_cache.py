@@ -0,0 +1,147 @@
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from git import Actor, Repo
+
+from preview import preview
+from preview.build_cache import BuildCache, get_packaging_files, get_tree_hash, has_dynamic_version
+
+SETUP_CFG = """[metadata]
+name = napari-foo
+
+[options.entry_points]
+napari.manifest =
+    napari-foo = napari_foo:custom.yaml
+"""
+
+
+@pytest.fixture
+def repo_pth(tmpdir):
+    repo = tmpdir.mkdir('napari-foo')
+    repo.join('setup.cfg').write(SETUP_CFG)
+    repo.join('README.md').write('# napari-foo')
+    package = repo.mkdir('src').mkdir('napari_foo')
+    package.join('custom.yaml').write('name: napari-foo')
+    package.join('_widget.py').write('def widget(): pass')
+    repo.mkdir('.napari-hub').join('DESCRIPTION.md').write('description')
+    return str(repo)
+
+
+def test_packaging_files(repo_pth):
+    assert get_packaging_files(repo_pth) == [
+        os.path.join('.napari-hub', 'DESCRIPTION.md'),
+        'README.md',
+        'setup.cfg',
+        os.path.join('src', 'napari_foo', 'custom.yaml'),
+    ]
+
+
+def test_tree_hash_ignores_source_changes(repo_pth):
+    digest = get_tree_hash(repo_pth)
+    with open(os.path.join(repo_pth, 'src', 'napari_foo', '_widget.py'), 'a') as f:
+        f.write('\n# comment')
+    assert get_tree_hash(repo_pth) == digest
+
+
+@pytest.mark.parametrize('filename', [
+    'setup.cfg', os.path.join('src', 'napari_foo', 'custom.yaml'), os.path.join('.napari-hub', 'DESCRIPTION.md'),
+])
+def test_tree_hash_changes_with_packaging_files(repo_pth, filename):
+    digest = get_tree_hash(repo_pth)
+    with open(os.path.join(repo_pth, filename), 'a') as f:
+        f.write('\n')
+    assert get_tree_hash(repo_pth) != digest
+
+
+def test_tree_hash_includes_referenced_files(repo_pth):
+    with open(os.path.join(repo_pth, 'setup.cfg'), 'a') as f:
+        f.write('\n[metadata]\nlong_description = file: README.md, docs/CHANGELOG.md\n')
+    os.mkdir(os.path.join(repo_pth, 'docs'))
+    with open(os.path.join(repo_pth, 'docs', 'CHANGELOG.md'), 'w') as f:
+        f.write('0.1.0')
+
+    assert os.path.join('docs', 'CHANGELOG.md') in get_packaging_files(repo_pth)
+    digest = get_tree_hash(repo_pth)
+    with open(os.path.join(repo_pth, 'docs', 'CHANGELOG.md'), 'a') as f:
+        f.write('\n0.2.0')
+    assert get_tree_hash(repo_pth) != digest
+
+
+@pytest.mark.parametrize('filename, content', [
+    ('pyproject.toml', "[project]\nname = 'napari-foo'\ndynamic = ['version']\n"),
+    ('pyproject.toml', '[build-system]\nrequires = ["setuptools_scm"]\n'),
+    ('setup.cfg', '[metadata]\nversion = attr: napari_foo.__version__\n'),
+    ('setup.cfg', '[metadata]\nversion = file: VERSION\n'),
+    ('setup.py', 'from setuptools import setup\nsetup(version=get_version("src/napari_foo/_version.py"))\n'),
+])
+def test_dynamic_version_not_cacheable_without_git(repo_pth, filename, content):
+    with open(os.path.join(repo_pth, filename), 'w') as f:
+        f.write(content)
+
+    assert has_dynamic_version(repo_pth)
+    assert get_tree_hash(repo_pth) is None
+
+
+def test_static_version(repo_pth):
+    with open(os.path.join(repo_pth, 'setup.py'), 'w') as f:
+        f.write('from setuptools import setup\nsetup(version="0.1.0")\n')
+
+    assert not has_dynamic_version(repo_pth)
+
+
+def test_dynamic_version_hash_changes_with_tags(repo_pth):
+    with open(os.path.join(repo_pth, 'setup.cfg'), 'a') as f:
+        f.write('\n[metadata]\nversion = attr: napari_foo.__version__\n')
+    repo = Repo.init(repo_pth)
+    repo.git.add(A=True)
+    author = Actor('napari', 'napari@example.com')
+    repo.index.commit('initial', author=author, committer=author)
+
+    digest = get_tree_hash(repo_pth)
+    assert digest is not None
+    repo.create_tag('v0.1.0')
+    assert get_tree_hash(repo_pth) != digest
+
+    # uncommitted changes could change the version
+    with open(os.path.join(repo_pth, 'src', 'napari_foo', '_widget.py'), 'a') as f:
+        f.write('\n# comment')
+    assert get_tree_hash(repo_pth) is None
+
+
+def test_build_cache_round_trip(tmpdir):
+    wheel_pth = tmpdir.join('napari_foo-0.1.0-py3-none-any.whl')
+    wheel_pth.write('wheel')
+    cache = BuildCache(tmpdir.join('cache'))
+
+    assert cache.get_meta('digest') is None
+    assert cache.get_wheel('digest', str(tmpdir.mkdir('empty'))) is None
+    cache.put('digest', str(wheel_pth), {'name': 'napari-foo'})
+    # a concurrent run caching the same tree keeps the first entry
+    cache.put('digest', str(wheel_pth), {'name': 'other'})
+
+    assert cache.get_meta('digest') == {'name': 'napari-foo'}
+    copied = cache.get_wheel('digest', str(tmpdir.mkdir('dest')))
+    assert os.path.basename(copied) == 'napari_foo-0.1.0-py3-none-any.whl'
+
+
+@patch.object(preview, 'get_pypi_date_meta')
+@patch.object(preview, 'parse_meta', return_value={'name': 'napari-foo'})
+@patch.object(preview, 'build_dist')
+def test_preview_reuses_cached_build(mock_build_dist, mock_parse_meta, mock_pypi, repo_pth, tmpdir, monkeypatch):
+    monkeypatch.delenv('GITHUB_REPOSITORY', raising=False)
+    wheel_pth = tmpdir.join('napari_foo-0.1.0-py3-none-any.whl')
+    wheel_pth.write('wheel')
+    mock_build_dist.return_value = str(wheel_pth)
+    cache_dir = str(tmpdir.join('cache'))
+
+    for dest in ('first', 'second'):
+        dest_dir = str(tmpdir.mkdir(dest))
+        preview.get_plugin_preview(repo_pth, dest_dir, is_local=True, cache_dir=cache_dir)
+        with open(os.path.join(dest_dir, 'preview_meta.json')) as f:
+            assert json.load(f)['name'] == 'napari-foo'
+
+    mock_build_dist.assert_called_once()
+    mock_parse_meta.assert_called_once()
+    assert os.path.exists(os.path.join(str(tmpdir), 'second', 'napari_foo-0.1.0-py3-none-any.whl'))
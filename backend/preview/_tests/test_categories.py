@@ -0,0 +1,120 @@
+import json
+from unittest.mock import patch
+
+import pytest
+
+from preview import categories
+
+VERSION = 'EDAM-BIOIMAGING:alpha06'
+MAPPINGS = {
+    'Manual segmentation': [
+        {'label': 'Image Segmentation', 'dimension': 'Operation',
+         'hierarchy': ['Image segmentation', 'Manual segmentation']},
+        {'label': 'Image annotation', 'dimension': 'Operation',
+         'hierarchy': ['Image annotation', 'Dense image annotation', 'Manual segmentation']},
+    ],
+    'Fluorescence microscopy': [
+        {'label': 'Fluorescence microscopy', 'dimension': 'Imaging modality',
+         'hierarchy': ['Fluorescence microscopy']},
+    ],
+}
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    categories._precomputed_mappings.clear()
+    yield
+    categories._precomputed_mappings.clear()
+
+
+@pytest.fixture
+def snapshot_dir(tmpdir):
+    return str(tmpdir.join('categories'))
+
+
+@patch.object(categories, 'fetch_mappings')
+def test_snapshot_skips_api(mock_fetch_mappings, snapshot_dir):
+    assert categories.refresh_snapshot(VERSION, MAPPINGS, categories.SOURCE_EDAM, snapshot_dir)
+
+    category, category_hierarchy = categories.get_plugin_categories(
+        ['Manual segmentation', 'Fluorescence microscopy', 'Unknown'], VERSION, snapshot_dir)
+    categories.get_plugin_categories(['Manual segmentation'], VERSION, snapshot_dir)
+
+    mock_fetch_mappings.assert_not_called()
+    assert category == {'Operation': ['Image Segmentation', 'Image annotation'],
+                        'Imaging modality': ['Fluorescence microscopy']}
+    assert category_hierarchy['Operation'] == [['Image Segmentation', 'Manual segmentation'],
+                                               ['Image annotation', 'Dense image annotation', 'Manual segmentation']]
+
+
+@patch.object(categories, 'fetch_mappings', return_value=MAPPINGS)
+def test_api_fallback_without_snapshot(mock_fetch_mappings, snapshot_dir):
+    categories.get_plugin_categories(['Manual segmentation'], VERSION, snapshot_dir)
+    categories.get_plugin_categories(['Fluorescence microscopy'], VERSION, snapshot_dir)
+
+    mock_fetch_mappings.assert_called_once_with(VERSION)
+
+
+@patch.object(categories, 'fetch_mappings', return_value=MAPPINGS)
+def test_api_fallback_on_checksum_mismatch(mock_fetch_mappings, snapshot_dir):
+    categories.refresh_snapshot(VERSION, MAPPINGS, categories.SOURCE_EDAM, snapshot_dir)
+    snapshot_path = categories.get_snapshot_path(VERSION, snapshot_dir)
+    with open(snapshot_path) as f:
+        snapshot = json.load(f)
+    snapshot['mappings']['Manual segmentation'] = []
+    with open(snapshot_path, 'w') as f:
+        json.dump(snapshot, f)
+
+    assert categories.load_snapshot(VERSION, snapshot_dir) is None
+    categories.get_precomputed_mappings(VERSION, snapshot_dir)
+    mock_fetch_mappings.assert_called_once_with(VERSION)
+
+
+def test_refresh_only_writes_changes(snapshot_dir):
+    assert categories.refresh_snapshot(VERSION, MAPPINGS, categories.SOURCE_EDAM, snapshot_dir)
+    reordered = dict(reversed(list(MAPPINGS.items())))
+    assert not categories.refresh_snapshot(VERSION, reordered, categories.SOURCE_EDAM, snapshot_dir)
+    assert categories.refresh_snapshot(VERSION, {'Manual segmentation': MAPPINGS['Manual segmentation']},
+                                       categories.SOURCE_EDAM, snapshot_dir)
+    snapshot = categories.load_snapshot(VERSION, snapshot_dir)
+    assert snapshot['mappings'] == {'Manual segmentation': MAPPINGS['Manual segmentation']}
+    assert snapshot['version'] == VERSION
+
+
+@patch.object(categories, 'fetch_mappings', return_value=MAPPINGS)
+def test_api_fallback_on_version_mismatch(mock_fetch_mappings, snapshot_dir):
+    categories.refresh_snapshot(VERSION, MAPPINGS, categories.SOURCE_EDAM, snapshot_dir)
+    snapshot_path = categories.get_snapshot_path(VERSION, snapshot_dir)
+    with open(snapshot_path) as f:
+        snapshot = json.load(f)
+    snapshot['version'] = 'EDAM-BIOIMAGING:alpha05'
+    with open(snapshot_path, 'w') as f:
+        json.dump(snapshot, f)
+
+    assert categories.load_snapshot(VERSION, snapshot_dir) is None
+    categories.get_precomputed_mappings(VERSION, snapshot_dir)
+    mock_fetch_mappings.assert_called_once_with(VERSION)
+
+
+@patch.object(categories, 'fetch_mappings', return_value=MAPPINGS)
+def test_hub_term_snapshot_falls_back_for_other_terms(mock_fetch_mappings, snapshot_dir):
+    hub_terms = {'Fluorescence microscopy': MAPPINGS['Fluorescence microscopy']}
+    categories.refresh_snapshot(VERSION, hub_terms, categories.SOURCE_HUB_MAPPING, snapshot_dir)
+
+    category, _ = categories.get_plugin_categories(['Fluorescence microscopy'], VERSION, snapshot_dir)
+    mock_fetch_mappings.assert_not_called()
+    assert category == {'Imaging modality': ['Fluorescence microscopy']}
+
+    category, _ = categories.get_plugin_categories(['Manual segmentation'], VERSION, snapshot_dir)
+    mock_fetch_mappings.assert_called_once_with(VERSION)
+    assert category == {'Operation': ['Image Segmentation', 'Image annotation']}
+
+
+@patch.object(categories, 'fetch_mappings')
+def test_bundled_snapshot(mock_fetch_mappings):
+    snapshot = categories.load_snapshot(VERSION)
+
+    assert snapshot is not None
+    category, _ = categories.get_plugin_categories(['Fluorescence microscopy'], VERSION)
+    mock_fetch_mappings.assert_not_called()
+    assert category == {'Image modality': ['Fluorescence microscopy']}
@@ -0,0 +1,164 @@
+import os
+from unittest.mock import patch
+
+import pytest
+
+from preview import preview
+from preview.static_meta import read_static_metadata
+
+MANIFEST = """name: napari-foo
+display_name: Foo
+contributions:
+  commands:
+    - id: napari-foo.get_reader
+      python_name: napari_foo._reader:get_reader
+      title: Open data with Foo
+  readers:
+    - command: napari-foo.get_reader
+      filename_patterns: ['*.foo']
+      accepts_directories: false
+"""
+PYPROJECT = """[build-system]
+requires = ["setuptools>=61"]
+build-backend = "setuptools.build_meta"
+
+[project]
+name = "napari-foo"
+version = "0.1.0"
+description = "A foo plugin"
+readme = "README.md"
+license = {text = "BSD-3-Clause"}
+authors = [{name = "Jane Doe", email = "jane@example.com"}]
+requires-python = ">=3.8"
+classifiers = ["Framework :: napari", "Operating System :: OS Independent", "Development Status :: 3 - Alpha"]
+dependencies = ["numpy"]
+
+[project.optional-dependencies]
+testing = ["pytest"]
+
+[project.urls]
+"Bug Tracker" = "https://github.com/foo/napari-foo/issues"
+"Source Code" = "https://github.com/foo/napari-foo"
+
+[project.entry-points."napari.manifest"]
+napari-foo = "napari_foo:napari.yaml"
+
+[tool.setuptools.package-data]
+napari_foo = ["napari.yaml"]
+"""
+SETUP_CFG = """[metadata]
+name = napari-foo
+version = 0.1.0
+description = A foo plugin
+long_description = file: README.md
+long_description_content_type = text/markdown
+url = https://github.com/foo/napari-foo
+author = Jane Doe
+author_email = jane@example.com
+license = BSD-3-Clause
+classifiers =
+    Framework :: napari
+    Operating System :: OS Independent
+    Development Status :: 3 - Alpha
+project_urls =
+    Bug Tracker = https://github.com/foo/napari-foo/issues
+    Source Code = https://github.com/foo/napari-foo
+
+[options]
+packages = find:
+package_dir =
+    =src
+python_requires = >=3.8
+install_requires =
+    numpy
+include_package_data = True
+
+[options.packages.find]
+where = src
+
+[options.extras_require]
+testing =
+    pytest
+
+[options.entry_points]
+napari.manifest =
+    napari-foo = napari_foo:napari.yaml
+
+[options.package_data]
+* = *.yaml
+"""
+
+
+def _create_plugin(tmpdir, layout):
+    repo = tmpdir.mkdir(f'napari-foo-{layout}')
+    repo.join('README.md').write('# napari-foo\n\nA foo plugin')
+    if layout == 'pyproject':
+        repo.join('pyproject.toml').write(PYPROJECT)
+        package = repo.mkdir('napari_foo')
+    else:
+        repo.join('setup.cfg').write(SETUP_CFG)
+        repo.join('setup.py').write('import setuptools\n\nsetuptools.setup()\n')
+        package = repo.mkdir('src').mkdir('napari_foo')
+    package.join('__init__.py').write('')
+    package.join('napari.yaml').write(MANIFEST)
+    return str(repo)
+
+
+@pytest.mark.parametrize('layout', ['pyproject', 'setup_cfg'])
+def test_read_static_metadata(tmpdir, layout):
+    repo_pth = _create_plugin(tmpdir, layout)
+    pkg_meta = read_static_metadata(repo_pth)
+
+    assert pkg_meta.name == 'napari-foo'
+    assert pkg_meta.version == '0.1.0'
+    assert pkg_meta.description == '# napari-foo\n\nA foo plugin\n'
+    assert pkg_meta.description_content_type == 'text/markdown'
+    assert pkg_meta.requires_dist == ['numpy', 'pytest; extra == "testing"']
+    assert 'Source Code, https://github.com/foo/napari-foo' in pkg_meta.project_url
+    assert pkg_meta.manifest_pth.endswith(os.path.join('napari_foo', 'napari.yaml'))
+
+
+@pytest.mark.parametrize('layout, filename, content', [
+    ('pyproject', 'pyproject.toml', PYPROJECT.replace('version = "0.1.0"', 'dynamic = ["version"]')),
+    ('setup_cfg', 'setup.cfg', SETUP_CFG.replace('version = 0.1.0', 'version = attr: napari_foo.__version__')),
+    ('setup_cfg', 'setup.py', 'from setuptools import setup\nsetup(use_scm_version=True)\n'),
+    ('setup_cfg', 'pyproject.toml',
+     '[build-system]\nrequires = ["setuptools>=61", "hatch-vcs"]\nbuild-backend = "setuptools.build_meta"\n'),
+])
+def test_dynamic_metadata_needs_build(tmpdir, layout, filename, content):
+    repo_pth = _create_plugin(tmpdir, layout)
+    with open(os.path.join(repo_pth, filename), 'w') as f:
+        f.write(content)
+    assert read_static_metadata(repo_pth) is None
+
+
+def test_missing_manifest_needs_build(tmpdir):
+    repo_pth = _create_plugin(tmpdir, 'pyproject')
+    os.remove(os.path.join(repo_pth, 'napari_foo', 'napari.yaml'))
+    assert read_static_metadata(repo_pth) is None
+
+
+@pytest.mark.parametrize('layout', ['pyproject', 'setup_cfg'])
+def test_static_meta_matches_build(tmpdir, layout):
+    pytest.importorskip('npe2')
+    repo_pth = _create_plugin(tmpdir, layout)
+
+    static_meta = preview.parse_static_meta(repo_pth)
+    built_meta = preview.parse_meta(preview.build_dist(repo_pth, str(tmpdir.mkdir('dist'))))
+
+    assert static_meta == built_meta
+
+
+@patch.object(preview, 'get_pypi_date_meta')
+@patch.object(preview, 'get_github_metadata', return_value={})
+@patch.object(preview, 'build_dist')
+def test_preview_skips_build_for_static_metadata(mock_build_dist, mock_github, mock_pypi, tmpdir, monkeypatch):
+    pytest.importorskip('npe2')
+    monkeypatch.delenv('GITHUB_REPOSITORY', raising=False)
+    repo_pth = _create_plugin(tmpdir, 'pyproject')
+
+    metadata_source = preview.get_plugin_preview(repo_pth, str(tmpdir.mkdir('dest')), is_local=True,
+                                                 cache_dir=None)
+
+    assert metadata_source == 'static'
+    mock_build_dist.assert_not_called()
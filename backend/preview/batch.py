@@ -0,0 +1,139 @@
+import fcntl
+import json
+import logging
+import os
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from git import Repo
+from nhcommons.utils.process_pool import run_isolated
+from nhcommons.utils.task_status import OK, ERROR, TIMED_OUT
+
+from preview.preview import get_plugin_preview
+
+LOGGER = logging.getLogger()
+
+DEFAULT_TIMEOUT_SECONDS = 600
+DEFAULT_MAX_WORKERS = os.cpu_count() or 1
+
+
+def _get_repo_name(code_url: str) -> str:
+    return re.sub(r'\.git$', '', code_url.rstrip('/').rsplit('/', 1)[-1])
+
+
+def get_preview_dir(dest_dir: str, code_url: str, branch: Optional[str]) -> str:
+    """Get the directory the preview of a repository branch is written to.
+
+    :param dest_dir: path to destination directory of the batch
+    :param code_url: url to the code repository
+    :param branch: branch of the repository
+    :return: path to the preview directory
+    """
+    name = re.sub(r'[^\w.-]', '_', re.sub(r'^\w+://(github\.com/)?', '', code_url.rstrip('/')))
+    if branch and branch != 'HEAD':
+        name += '@' + re.sub(r'[^\w.-]', '_', branch)
+    return os.path.join(dest_dir, name)
+
+
+def clone_from_cache(code_url: str, dest_dir: str, clone_cache_dir: str, branch: Optional[str] = None) -> str:
+    """Clone a repository to dest_dir through a mirror in clone_cache_dir.
+
+    The mirror is fetched once and updated on reuse, so previews of several
+    branches of a repository, or repeated batches, only fetch new objects.
+    Access to each mirror is serialized with a file lock, as the cache is
+    shared by the batch processes.
+
+    :param code_url: url to the code repository
+    :param dest_dir: path to destination directory
+    :param clone_cache_dir: path to the directory of mirrors
+    :param branch: branch to check out
+    :return: path to the working tree
+    """
+    os.makedirs(clone_cache_dir, exist_ok=True)
+    mirror_pth = os.path.join(clone_cache_dir, re.sub(r'[^\w.-]', '_', code_url.rstrip('/')) + '.git')
+    with open(f'{mirror_pth}.lock', 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            if os.path.exists(mirror_pth):
+                Repo(mirror_pth).git.remote('update', '--prune')
+            else:
+                Repo.clone_from(code_url, mirror_pth, mirror=True)
+        except Exception:
+            raise RuntimeError(f"Could not clone repo from {code_url}")
+        repo = Repo.clone_from(mirror_pth, os.path.join(dest_dir, _get_repo_name(code_url)))
+    if branch:
+        repo.git.checkout(branch)
+    return repo.working_tree_dir
+
+
+def _preview_repo(code_url: str, branch: Optional[str], preview_dir: str, cache_dir: Optional[str],
+                  clone_cache_dir: Optional[str], shallow: bool) -> str:
+    os.makedirs(preview_dir, exist_ok=True)
+    if clone_cache_dir:
+        repo_pth = clone_from_cache(code_url, preview_dir, clone_cache_dir, branch)
+        return get_plugin_preview(repo_pth, preview_dir, is_local=True, branch=branch, cache_dir=cache_dir)
+    return get_plugin_preview(code_url, preview_dir, branch=branch, cache_dir=cache_dir, shallow=shallow)
+
+
+def get_plugin_previews(repos: Iterable[Tuple[str, Optional[str]]], dest_dir: str,
+                        max_workers: int = DEFAULT_MAX_WORKERS, timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                        cache_dir: Optional[str] = None, clone_cache_dir: Optional[str] = None,
+                        shallow: bool = False) -> dict:
+    """Get plugin preview metadata of many repositories concurrently.
+
+    Each preview runs in its own child process and process group, with at
+    most max_workers running at once, and the group is killed once it has run
+    for longer than timeout seconds. Previews are written to a directory per repository branch in
+    dest_dir, see `get_preview_dir`, and share the build and clone caches.
+
+    :param repos: (code url, branch) pairs to preview
+    :param dest_dir: path to destination directory (must exist)
+    :param max_workers: maximum number of concurrent previews
+    :param timeout: wall-clock limit per preview in seconds
+    :param cache_dir: path to the build cache directory, None to always build
+    :param clone_cache_dir: path to the directory of repository mirrors, None to clone from GitHub every time
+    :param shallow: clone only what the preview needs, when not cloning through clone_cache_dir
+    :return: per repository status, metadata source and duration, and a summary of the batch
+    """
+    batch_start = time.perf_counter()
+    tasks = [(code_url, branch, get_preview_dir(dest_dir, code_url, branch), cache_dir, clone_cache_dir, shallow)
+             for code_url, branch in repos]
+    results = []
+    for task_result in run_isolated(_preview_repo, tasks, max_workers, timeout, label='Preview'):
+        code_url, branch, preview_dir, *_ = task_result['task']
+        status = task_result['status']
+        result = {'repo': code_url, 'branch': branch, 'status': status, 'duration_ms': task_result['duration_ms'],
+                  'preview_meta': os.path.join(preview_dir, 'preview_meta.json') if status == OK else None}
+        if status == OK:
+            result['metadata_source'] = task_result['body']
+        else:
+            result['error'] = task_result['body']
+        results.append(result)
+
+    return {'results': results, 'summary': _summarize(results, (time.perf_counter() - batch_start) * 1000)}
+
+
+def _summarize(results: List[dict], duration: float) -> Dict:
+    durations = sorted(result['duration_ms'] for result in results)
+    summary = {status: sum(1 for result in results if result['status'] == status) for status in (OK, ERROR, TIMED_OUT)}
+    for result in results:
+        if 'metadata_source' in result:
+            key = f'metadata_{result["metadata_source"]}'
+            summary[key] = summary.get(key, 0) + 1
+    summary['total_duration_ms'] = duration
+    if durations:
+        summary['median_duration_ms'] = durations[len(durations) // 2]
+        summary['max_duration_ms'] = durations[-1]
+    return summary
+
+
+def write_report(report: dict, dest_dir: str) -> str:
+    """Write the report of a batch to preview_report.json in dest_dir.
+
+    :return: path to the report
+    """
+    report_pth = os.path.join(dest_dir, 'preview_report.json')
+    with open(report_pth, 'w') as f:
+        json.dump(report, f, indent=2)
+    return report_pth
@@ -0,0 +1,201 @@
+import glob
+import hashlib
+import json
+import os
+import re
+import shutil
+import tempfile
+from typing import List, Optional, Union
+
+from git import GitCommandError, InvalidGitRepositoryError, Repo
+
+# Bump when the cached content or the way it is parsed changes, to invalidate existing entries
+CACHE_VERSION = 2
+# Files at the root of a repository that determine how it is packaged
+PACKAGING_FILES = ['pyproject.toml', 'setup.py', 'setup.cfg', 'MANIFEST.in', 'README.md', 'README.rst', 'README.txt']
+# Hub specific metadata read by the preview
+HUB_DIR = '.napari-hub'
+DEFAULT_MANIFEST_NAME = 'napari.yaml'
+_manifest_reference_pattern = re.compile(r':\s*([\w./-]+\.ya?ml)\b')
+_scm_version_pattern = re.compile(r'setuptools[_-]scm|versioneer|hatch-vcs')
+# Versions that are not a literal in the packaging files, e.g. read from a module or derived from git
+_dynamic_version_patterns = {
+    'pyproject.toml': re.compile(r'dynamic\s*=\s*\[[^\]]*["\']version["\']'),
+    'setup.cfg': re.compile(r'^\s*version\s*=\s*(attr|file)\s*:', re.MULTILINE),
+    'setup.py': re.compile(r"use_scm_version|\bversion\s*=\s*(?![\s'\"])"),
+}
+# Files referenced by the packaging files, e.g. long_description = file: README.rst or readme = "docs/README.md"
+_file_reference_patterns = {
+    'setup.cfg': re.compile(r'^\s*\w+\s*=\s*file:\s*(.+)$', re.MULTILINE),
+    'pyproject.toml': re.compile(r'\b(?:readme|file)\s*=\s*(["\'][^"\']+["\']|\[[^\]]*\])'),
+}
+
+
+def _get_manifest_names(repo_pth: str) -> List[str]:
+    """Get the file names of npe2 manifests the repository could declare.
+
+    :param repo_pth: path to root of the repository
+    :return: manifest file names, napari.yaml and any yaml referenced by an entry point
+    """
+    names = {DEFAULT_MANIFEST_NAME}
+    for filename in ('setup.cfg', 'pyproject.toml', 'setup.py'):
+        path = os.path.join(repo_pth, filename)
+        if os.path.isfile(path):
+            with open(path, encoding='utf-8', errors='replace') as f:
+                names.update(os.path.basename(name) for name in _manifest_reference_pattern.findall(f.read()))
+    return sorted(names)
+
+
+def _read_packaging_file(repo_pth: str, filename: str) -> str:
+    path = os.path.join(repo_pth, filename)
+    if not os.path.isfile(path):
+        return ''
+    with open(path, encoding='utf-8', errors='replace') as f:
+        return f.read()
+
+
+def _get_referenced_files(repo_pth: str) -> List[str]:
+    """Get the files the packaging files read their fields from.
+
+    :param repo_pth: path to root of the repository
+    :return: paths relative to repo_pth of the referenced files within the repository
+    """
+    names = []
+    for filename, pattern in _file_reference_patterns.items():
+        for reference in pattern.findall(_read_packaging_file(repo_pth, filename)):
+            names += re.split(r'[\s,]+', reference.strip('[]').replace('"', ' ').replace("'", ' '))
+    repo_root = os.path.realpath(repo_pth)
+    files = []
+    for name in filter(None, names):
+        path = os.path.realpath(os.path.join(repo_pth, name))
+        if path.startswith(repo_root + os.sep) and os.path.isfile(path):
+            files.append(os.path.relpath(path, repo_root))
+    return files
+
+
+def has_dynamic_version(repo_pth: str) -> bool:
+    """Check whether the version of a repository is only known once it is built.
+
+    :param repo_pth: path to root of the repository
+    :return: True if the version is derived from git or read from another file
+    """
+    for filename, pattern in _dynamic_version_patterns.items():
+        content = _read_packaging_file(repo_pth, filename)
+        if pattern.search(content) or _scm_version_pattern.search(content):
+            return True
+    return False
+
+
+def get_packaging_files(repo_pth: str) -> List[str]:
+    """Get the files of a repository that the preview metadata is derived from.
+
+    :param repo_pth: path to root of the repository
+    :return: sorted paths relative to repo_pth
+    """
+    files = [filename for filename in PACKAGING_FILES if os.path.isfile(os.path.join(repo_pth, filename))]
+    files += _get_referenced_files(repo_pth)
+    for name in _get_manifest_names(repo_pth):
+        files += [os.path.relpath(path, repo_pth)
+                  for path in glob.glob(os.path.join(repo_pth, '**', name), recursive=True)
+                  if os.path.isfile(path)]
+    hub_dir = os.path.join(repo_pth, HUB_DIR)
+    for root, _, filenames in os.walk(hub_dir):
+        files += [os.path.relpath(os.path.join(root, filename), repo_pth) for filename in filenames]
+    return sorted(set(files))
+
+
+def _get_version_key(repo_pth: str) -> Optional[str]:
+    """Identify the git state a dynamic version is derived from.
+
+    :param repo_pth: path to root of the repository
+    :return: head commit and its description relative to the latest tag, None
+    if the repository is not a git repository or has uncommitted changes
+    """
+    try:
+        repo = Repo(repo_pth)
+        if repo.is_dirty():
+            return None
+        return f'{repo.head.commit.hexsha} {repo.git.describe("--tags", "--always", "--long")}'
+    except (InvalidGitRepositoryError, GitCommandError, ValueError):
+        return None
+
+
+def get_tree_hash(repo_pth: str) -> Optional[str]:
+    """Hash the packaging relevant files of a repository.
+
+    Dynamic versions, e.g. derived from git through setuptools_scm or read
+    from a module with attr:, can change without any packaging file changing,
+    so for those the head commit and the tags describing it are part of the
+    hash. Without a clean git repository such versions can't be identified,
+    and the repository is not cacheable.
+
+    :param repo_pth: path to root of the repository
+    :return: hex digest identifying the packaging state of the repository, None if it is not cacheable
+    """
+    digest = hashlib.sha256(f'v{CACHE_VERSION}'.encode('utf-8'))
+    for filename in get_packaging_files(repo_pth):
+        with open(os.path.join(repo_pth, filename), 'rb') as f:
+            content = f.read()
+        digest.update(filename.encode('utf-8') + b'\0' + hashlib.sha256(content).digest())
+    if has_dynamic_version(repo_pth):
+        version_key = _get_version_key(repo_pth)
+        if version_key is None:
+            return None
+        digest.update(version_key.encode('utf-8'))
+    return digest.hexdigest()
+
+
+class BuildCache:
+    """Wheels and parsed metadata of previewed repositories, keyed by the hash
+    of their packaging relevant files. Entries are written atomically so the
+    cache directory can be shared by concurrent preview runs.
+    """
+
+    def __init__(self, cache_dir: Union[str, os.PathLike]):
+        self._cache_dir = os.fspath(cache_dir)
+
+    def _get_entry_dir(self, digest: str) -> str:
+        return os.path.join(self._cache_dir, digest)
+
+    def get_meta(self, digest: str) -> Optional[dict]:
+        """Get the cached metadata for a tree hash.
+
+        :param digest: hash of the packaging relevant files
+        :return: metadata parsed from the wheel if cached, None otherwise
+        """
+        try:
+            with open(os.path.join(self._get_entry_dir(digest), 'meta.json')) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def get_wheel(self, digest: str, dest_dir: str) -> Optional[str]:
+        """Copy the cached wheel for a tree hash to dest_dir.
+
+        :param digest: hash of the packaging relevant files
+        :param dest_dir: path to destination directory
+        :return: path to the copied wheel if cached, None otherwise
+        """
+        wheels = glob.glob(os.path.join(self._get_entry_dir(digest), '*.whl'))
+        if not wheels:
+            return None
+        return shutil.copy2(wheels[0], dest_dir)
+
+    def put(self, digest: str, wheel_pth: str, meta: dict):
+        """Cache the wheel and its parsed metadata for a tree hash.
+
+        :param digest: hash of the packaging relevant files
+        :param wheel_pth: path to the built wheel
+        :param meta: metadata parsed from the wheel
+        """
+        os.makedirs(self._cache_dir, exist_ok=True)
+        entry_dir = self._get_entry_dir(digest)
+        tmp_dir = tempfile.mkdtemp(dir=self._cache_dir, prefix=f'.{digest}-')
+        try:
+            shutil.copy2(wheel_pth, tmp_dir)
+            with open(os.path.join(tmp_dir, 'meta.json'), 'w') as f:
+                json.dump(meta, f)
+            os.replace(tmp_dir, entry_dir)
+        except OSError:
+            # another run cached the same tree first
+            shutil.rmtree(tmp_dir, ignore_errors=True)
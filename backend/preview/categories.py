@@ -0,0 +1,178 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from utils.utils import get_categories, precompute_category_mapping
+
+LOGGER = logging.getLogger()
+
+# Snapshots of the category mappings of each version, bundled with the preview tool
+SNAPSHOT_DIR = os.path.join(os.path.dirname(__file__), 'data', 'categories')
+CATEGORIES_API_URL = os.getenv('PREVIEW_CATEGORIES_API_URL', 'https://api.napari-hub.org/categories')
+API_TIMEOUT_SECONDS = 30
+
+# Where the mappings of a snapshot were generated from. Snapshots generated from the curated
+# hub mapping alone only cover the hub terms, not the ontology terms below them.
+SOURCE_EDAM = 'edam'
+SOURCE_API = 'api'
+SOURCE_HUB_MAPPING = 'hub-mapping'
+COMPLETE_SOURCES = {SOURCE_EDAM, SOURCE_API}
+
+_precomputed_mappings = {}
+_precomputed_mappings_lock = threading.Lock()
+
+
+def get_checksum(mappings: Dict[str, List]) -> str:
+    """Hash category mappings independently of key order and formatting.
+
+    :param mappings: category mappings of a version
+    :return: sha256 hex digest of the mappings
+    """
+    return hashlib.sha256(json.dumps(mappings, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+def get_snapshot_path(version: str, snapshot_dir: str = SNAPSHOT_DIR) -> str:
+    return os.path.join(snapshot_dir, f'{version.replace(":", "-")}.json')
+
+
+def load_snapshot(version: str, snapshot_dir: str = SNAPSHOT_DIR) -> Optional[Dict]:
+    """Load the bundled category snapshot of a version.
+
+    :param version: category version, e.g. EDAM-BIOIMAGING:alpha06
+    :param snapshot_dir: path to the snapshot directory
+    :return: snapshot with its version, source, checksum and mappings, None if there is no snapshot,
+    it is for another version or it doesn't match its checksum
+    """
+    try:
+        with open(get_snapshot_path(version, snapshot_dir)) as f:
+            snapshot = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        LOGGER.warning(f'Unable to read category snapshot for {version}: {e}')
+        return None
+
+    if snapshot.get('version') != version:
+        LOGGER.warning(f'Category snapshot for {version} is for version {snapshot.get("version")}')
+        return None
+    if get_checksum(snapshot.get('mappings', {})) != snapshot.get('checksum'):
+        LOGGER.warning(f'Category snapshot for {version} does not match its checksum')
+        return None
+    return snapshot
+
+
+def fetch_mappings(version: str) -> Dict[str, List]:
+    """Fetch the category mappings of a version from the napari hub api.
+
+    :param version: category version, e.g. EDAM-BIOIMAGING:alpha06
+    :return: category mappings
+    """
+    response = requests.get(CATEGORIES_API_URL, params={'version': version}, timeout=API_TIMEOUT_SECONDS)
+    response.raise_for_status()
+    return response.json()
+
+
+def get_precomputed_mappings(version: str, snapshot_dir: Optional[str] = SNAPSHOT_DIR) -> Tuple[Dict, bool]:
+    """Get the precomputed category mappings of a version, loaded once per process.
+
+    The bundled snapshot is used when it matches the version and its checksum, the napari hub api otherwise.
+
+    :param version: category version, e.g. EDAM-BIOIMAGING:alpha06
+    :param snapshot_dir: path to the snapshot directory, None to use the napari hub api
+    :return: precomputed mappings, see precompute_category_mapping, and whether they cover the whole ontology
+    """
+    key = (version, snapshot_dir)
+    with _precomputed_mappings_lock:
+        if key not in _precomputed_mappings:
+            snapshot = load_snapshot(version, snapshot_dir) if snapshot_dir else None
+            if snapshot is None:
+                LOGGER.info(f'No category snapshot for {version}, fetching from {CATEGORIES_API_URL}')
+                snapshot = {'source': SOURCE_API, 'mappings': fetch_mappings(version)}
+            _precomputed_mappings[key] = (precompute_category_mapping(snapshot['mappings']),
+                                          snapshot['source'] in COMPLETE_SOURCES)
+        return _precomputed_mappings[key]
+
+
+def get_plugin_categories(terms: List[str], version: str, snapshot_dir: str = SNAPSHOT_DIR) -> Tuple[Dict, Dict]:
+    """Get the categories of a plugin from its ontology terms.
+
+    Terms missing from a snapshot that only covers the hub terms are looked up in the napari hub api mappings.
+
+    :param terms: ontology terms the plugin is labeled with
+    :param version: category version of the terms
+    :param snapshot_dir: path to the snapshot directory
+    :return: category labels and category hierarchies of the plugin, both keyed by dimension
+    """
+    precomputed, complete = get_precomputed_mappings(version, snapshot_dir)
+    if not complete and any(term not in precomputed for term in terms):
+        try:
+            precomputed, _ = get_precomputed_mappings(version, None)
+        except requests.RequestException as e:
+            LOGGER.warning(f'Unable to fetch category mappings for {version}, using the hub terms only: {e}')
+    return get_categories(terms, precomputed)
+
+
+def refresh_snapshot(version: str, mappings: Optional[Dict[str, List]] = None, source: str = SOURCE_API,
+                     snapshot_dir: str = SNAPSHOT_DIR) -> bool:
+    """Update the bundled category snapshot of a version when its mappings changed.
+
+    :param version: category version, e.g. EDAM-BIOIMAGING:alpha06
+    :param mappings: category mappings to bundle, fetched from the napari hub api if not given
+    :param source: where the mappings were generated from, one of SOURCE_EDAM, SOURCE_API or SOURCE_HUB_MAPPING
+    :param snapshot_dir: path to the snapshot directory
+    :return: True if the snapshot was written, False if it was already up to date
+    """
+    if mappings is None:
+        mappings, source = fetch_mappings(version), SOURCE_API
+    if not mappings:
+        raise ValueError(f'No category mappings for {version}')
+    checksum = get_checksum(mappings)
+    snapshot = load_snapshot(version, snapshot_dir)
+    if snapshot and snapshot['checksum'] == checksum and snapshot.get('source') == source:
+        return False
+
+    os.makedirs(snapshot_dir, exist_ok=True)
+    with open(get_snapshot_path(version, snapshot_dir), 'w') as f:
+        json.dump({'version': version, 'source': source, 'checksum': checksum, 'mappings': mappings},
+                  f, indent=2, sort_keys=True)
+        f.write('\n')
+    return True
+
+
+def generate_hub_term_mappings(hub_mapping: Dict[str, Dict[str, str]]) -> Dict[str, List[Dict]]:
+    """Generate the category mappings of the hub terms themselves, without the ontology below them.
+
+    :param hub_mapping: ontology label to hub term/dimension mappings, see category/data
+    :return: category mappings in the format of category/edam.py
+    """
+    from category.edam import OntologyEngine
+
+    return OntologyEngine({label: [] for label in hub_mapping}).generate(hub_mapping)
+
+
+if __name__ == '__main__':
+    # Refresh the bundled snapshot of category mappings
+    parser = argparse.ArgumentParser(description='Refresh the category mappings bundled with the preview tool.')
+    parser.add_argument('--version', default='EDAM-BIOIMAGING:alpha06', help='category version')
+    source_group = parser.add_mutually_exclusive_group()
+    source_group.add_argument('--from-file', help='mappings generated by category/edam.py')
+    source_group.add_argument('--hub-mapping', help='curated hub mapping, to bundle the hub terms only when the '
+                                                    'EDAM ontology is not available')
+    args = parser.parse_args()
+
+    category_mappings, category_source = None, SOURCE_API
+    if args.from_file:
+        with open(args.from_file) as mappings_json:
+            category_mappings, category_source = json.load(mappings_json), SOURCE_EDAM
+    elif args.hub_mapping:
+        with open(args.hub_mapping) as hub_mapping_json:
+            category_mappings = generate_hub_term_mappings(json.load(hub_mapping_json))
+        category_source = SOURCE_HUB_MAPPING
+    updated = refresh_snapshot(args.version, category_mappings, category_source)
+    print(f'Category snapshot for {args.version} {"updated" if updated else "already up to date"}')
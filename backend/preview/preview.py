@@ -1,44 +1,78 @@
-from typing import Union
+from typing import Optional, Union
 from git import Repo
-from collections import defaultdict
 import datetime
+import shutil
 import subprocess
 import sys
 import glob
 import os
 import json
-import requests
-from utils.utils import get_category_mapping, parse_manifest
+import logging
+from utils.utils import parse_manifest
 from utils.github import github_pattern, get_github_metadata, get_github_repo_url
 from utils.pypi import get_plugin_pypi_metadata
+from preview.build_cache import BuildCache, get_tree_hash, has_dynamic_version
+from preview.categories import get_plugin_categories
+from preview.static_meta import read_static_metadata
 
+# Directory to cache wheels and parsed metadata in across preview runs, unset to disable caching
+PREVIEW_CACHE_DIR = os.getenv('PREVIEW_CACHE_DIR')
 
-def get_plugin_preview(repo_pth: str, dest_dir: str, is_local: bool = False, branch: str = 'HEAD'):
+
+def get_plugin_preview(repo_pth: str, dest_dir: str, is_local: bool = False, branch: str = 'HEAD',
+                       cache_dir: Optional[str] = PREVIEW_CACHE_DIR, shallow: bool = False,
+                       static: bool = True) -> str:
     """Get plugin preview metadata of package at repo_pth.
 
     If is_local is not True, first clone the repository from GitHub
-    URL repo_pth. Once repository is present locally, build distribution
-    and parse metadata. Reuses backend functions for parsing additional
-    hub specific metadata. Parsed metadata is saved to JSON file in dest_dir
-    alongside the repository itself (if cloned) and the built distribution.
+    URL repo_pth. Once repository is present locally, read static metadata
+    from the source tree or, when it's only known at build time, build
+    distribution and parse metadata. Reuses backend functions for parsing
+    additional hub specific metadata. Parsed metadata is saved to JSON file
+    in dest_dir alongside the repository itself (if cloned) and the built
+    distribution (if built).
+
+    When cache_dir is set, the wheel and its parsed metadata are cached keyed by
+    the hash of the packaging relevant files, and reused while those are unchanged.
 
     :param repo_pth: path to plugin repository (URL unless is_local is True)
     :param dest_dir: path to destination directory (must exist)
     :param is_local: True if repo_pth is to local directory, otherwise False
     :param branch: Use a branch if specified
+    :param cache_dir: path to the build cache directory, None to always build
+    :param shallow: clone only the commit of branch and fetch file contents on checkout
+    :param static: False to always build the distribution, even when metadata is static
+    :return: how package metadata was read, static, cache or build
     """
     # clone repository from URL (if repo is not local)
     if not is_local:
-        repo = clone_repo(repo_pth, dest_dir)
+        repo = clone_repo(repo_pth, dest_dir, shallow=shallow, branch=branch)
         repo_pth = repo.working_tree_dir
         if branch:
             repo.git.checkout(branch)
 
-    # build distribution for plugin repository
-    wheel_pth = build_dist(repo_pth, dest_dir)
-
-    # parse metadata from wheel
-    meta = parse_meta(wheel_pth)
+    meta = parse_static_meta(repo_pth) if static else None
+    metadata_source = 'static'
+    tree_hash = None
+    if meta is None and cache_dir:
+        build_cache = BuildCache(cache_dir)
+        tree_hash = get_tree_hash(repo_pth)
+        if tree_hash is not None:
+            meta = build_cache.get_meta(tree_hash)
+            metadata_source = 'cache'
+        if meta is not None:
+            build_cache.get_wheel(tree_hash, dest_dir)
+
+    if meta is None:
+        # build distribution for plugin repository
+        wheel_pth = build_dist(repo_pth, dest_dir)
+
+        # parse metadata from wheel
+        meta = parse_meta(wheel_pth)
+        metadata_source = 'build'
+        if tree_hash is not None:
+            build_cache.put(tree_hash, wheel_pth, meta)
+    logging.info(f"Read package metadata of {repo_pth} from {metadata_source}")
 
     # parse additional metadata from URL
     action_github_repo = os.getenv("GITHUB_REPOSITORY")
@@ -53,17 +87,8 @@ def get_plugin_preview(repo_pth: str, dest_dir: str, is_local: bool = False, bra
         github_metadata = {}
 
     if 'labels' in github_metadata:
-        ontology = github_metadata['labels']['ontology']
-        category_mappings = json.loads(requests.get(f'https://api.napari-hub.org/categories?version={ontology}').text)
-        categories = defaultdict(list)
-        category_hierarchy = defaultdict(list)
-        for category in github_metadata['labels']['terms']:
-            mapped_category = get_category_mapping(category, category_mappings)
-            for match in mapped_category:
-                if match['label'] not in categories[match['dimension']]:
-                    categories[match['dimension']].append(match['label'])
-                match['hierarchy'][0] = match['label']
-                category_hierarchy[match['dimension']].append(match['hierarchy'])
+        categories, category_hierarchy = get_plugin_categories(github_metadata['labels']['terms'],
+                                                               github_metadata['labels']['ontology'])
         github_metadata['category'] = categories
         github_metadata['category_hierarchy'] = category_hierarchy
         del github_metadata['labels']
@@ -75,13 +100,22 @@ def get_plugin_preview(repo_pth: str, dest_dir: str, is_local: bool = False, bra
     # write json
     with open(os.path.join(dest_dir, "preview_meta.json"), "w") as f:
         json.dump(meta, f)
+    return metadata_source
 
 
-def clone_repo(code_url: str, dest_dir: str) -> Union['Repo', None]:
+def clone_repo(code_url: str, dest_dir: str, shallow: bool = False, branch: str = None) -> Union['Repo', None]:
     """Clone repository at code_url to dest_dir.
 
+    A shallow clone only fetches the latest commit of branch, or when branch
+    can't be cloned directly (e.g. HEAD or a commit sha) a blobless clone
+    that fetches file contents on checkout. Versions derived from git need
+    the history and tags of branch, so for those the rest of the history is
+    fetched after the latest commit.
+
     :param code_url: url to GitHub code repository
     :param dest_dir: path to destination directory
+    :param shallow: True to skip fetching history and file contents not needed for the preview
+    :param branch: branch to clone when shallow
     :return: cloned repo or None
     """
     github_match = github_pattern.match(code_url)
@@ -93,8 +127,21 @@ def clone_repo(code_url: str, dest_dir: str) -> Union['Repo', None]:
     except IndexError:
         plugin_name = "plugin"
 
+    repo_dir = os.path.join(dest_dir, plugin_name)
+    if shallow and branch and branch != 'HEAD':
+        try:
+            repo = Repo.clone_from(code_url, repo_dir, depth=1, branch=branch, multi_options=['--filter=blob:none'])
+            if has_dynamic_version(repo.working_tree_dir):
+                repo.git.fetch('--unshallow', '--tags')
+            return repo
+        except Exception:
+            shutil.rmtree(repo_dir, ignore_errors=True)
+
     try:
-        repo = Repo.clone_from(code_url, os.path.join(dest_dir, plugin_name))
+        if shallow:
+            repo = Repo.clone_from(code_url, repo_dir, multi_options=['--filter=blob:none'])
+        else:
+            repo = Repo.clone_from(code_url, repo_dir)
     except Exception:
         raise RuntimeError(f"Could not clone repo from {code_url}")
 
@@ -151,6 +198,43 @@ def parse_meta(pkg_pth):
     :param pkg_pth: path to wheel
     :return: dictionary matching fields to the parsed values
     """
+    # to avoid depending on npe2 in the backend, we delay this import to runtime
+    # this dependency will be satisfied by the preview action
+    # see https://github.com/chanzuckerberg/napari-hub-preview-action
+    from npe2 import get_manifest_from_wheel
+    manifest = get_manifest_from_wheel(pkg_pth)
+    return _parse_package_meta(manifest.package_metadata, manifest)
+
+
+def parse_static_meta(repo_pth: str) -> Optional[dict]:
+    """Parses and returns metadata of the package at repo_pth without building it.
+
+    Reads static metadata from pyproject.toml or setup.cfg and the npe2 manifest
+    from the source tree, see `read_static_metadata`.
+
+    :param repo_pth: path to root of python package
+    :return: dictionary matching fields to the parsed values, None if the package has to be built
+    """
+    pkg_meta = read_static_metadata(repo_pth)
+    if pkg_meta is None:
+        return None
+
+    from npe2 import PluginManifest
+    try:
+        manifest = PluginManifest.from_file(pkg_meta.manifest_pth)
+    except Exception as e:
+        logging.info(f"Could not read manifest {pkg_meta.manifest_pth}: {e}")
+        return None
+    return _parse_package_meta(pkg_meta, manifest)
+
+
+def _parse_package_meta(pkg_meta, manifest) -> dict:
+    """Parses core metadata and npe2 manifest of a package into preview metadata.
+
+    :param pkg_meta: core metadata of the package
+    :param manifest: npe2 manifest of the package
+    :return: dictionary matching fields to the parsed values
+    """
     meta_needed = {
         "name": "name",
         "summary": "summary",
@@ -173,12 +257,6 @@ def parse_meta(pkg_pth):
         "code_repository": "Source Code",
     }
 
-    # to avoid depending on npe2 in the backend, we delay this import to runtime
-    # this dependency will be satisfied by the preview action
-    # see https://github.com/chanzuckerberg/napari-hub-preview-action
-    from npe2 import get_manifest_from_wheel
-    manifest = get_manifest_from_wheel(pkg_pth)
-    pkg_meta = manifest.package_metadata
     all_meta = dict([(key, getattr(pkg_meta, attr_name, None)) for key, attr_name in meta_needed.items()])
     all_meta.update(parse_manifest(json.loads(manifest.json())))
     
@@ -0,0 +1,256 @@
+import configparser
+import logging
+import os
+import re
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+try:
+    import tomllib
+except ImportError:
+    try:
+        import tomli as tomllib
+    except ImportError:
+        tomllib = None
+
+from preview.build_cache import has_dynamic_version
+
+LOGGER = logging.getLogger()
+
+SETUPTOOLS_BACKENDS = {'setuptools.build_meta', 'setuptools.build_meta:__legacy__'}
+README_CONTENT_TYPES = {'.md': 'text/markdown', '.rst': 'text/x-rst'}
+# matched against setup.py with comments and whitespace removed
+_trivial_setup_py_pattern = re.compile(
+    r'(importsetuptools|fromsetuptoolsimportsetup)'
+    r'(if__name__==[\'"]__main__[\'"]:)?'
+    r'(setuptools\.)?setup\(\)'
+)
+
+
+def _read_file(repo_pth: str, filename: str) -> str:
+    with open(os.path.join(repo_pth, filename), encoding='utf-8') as f:
+        return f.read()
+
+
+def _read_files(repo_pth: str, filenames: List[str]) -> str:
+    return '\n'.join(_read_file(repo_pth, filename) for filename in filenames)
+
+
+def _is_trivial_setup_py(repo_pth: str) -> bool:
+    """Check the setup.py of a repository, if any, only calls setup() without arguments.
+
+    :param repo_pth: path to root of the repository
+    """
+    if not os.path.isfile(os.path.join(repo_pth, 'setup.py')):
+        return True
+    lines = [line.split('#', 1)[0] for line in _read_file(repo_pth, 'setup.py').splitlines()]
+    return bool(_trivial_setup_py_pattern.fullmatch(re.sub(r'\s+', '', ''.join(lines))))
+
+
+def _get_content_type(filename: str) -> str:
+    return README_CONTENT_TYPES.get(os.path.splitext(filename)[1].lower(), 'text/plain')
+
+
+def _with_extra(requirement: str, extra: str) -> str:
+    if ';' in requirement:
+        requirement, marker = requirement.split(';', 1)
+        return f'{requirement.strip()}; ({marker.strip()}) and extra == "{extra}"'
+    return f'{requirement}; extra == "{extra}"'
+
+
+def _format_authors(authors: List[Dict[str, str]]) -> Dict[str, Optional[str]]:
+    """Convert PEP 621 authors to core metadata Author and Author-email, the way setuptools does."""
+    names = [author['name'] for author in authors if 'name' in author and 'email' not in author]
+    emails = [f'{author["name"]} <{author["email"]}>' if 'name' in author else author['email']
+              for author in authors if 'email' in author]
+    return {'author': ', '.join(names) or None, 'author_email': ', '.join(emails) or None}
+
+
+def _read_pyproject_metadata(repo_pth: str, project: dict) -> Optional[dict]:
+    """Read core metadata from the PEP 621 [project] table of pyproject.toml.
+
+    :return: core metadata, None if any of it is dynamic
+    """
+    if project.get('dynamic'):
+        return None
+
+    readme = project.get('readme')
+    description, content_type = None, None
+    if isinstance(readme, str):
+        description, content_type = _read_file(repo_pth, readme), _get_content_type(readme)
+    elif isinstance(readme, dict):
+        description = readme['text'] if 'text' in readme else _read_file(repo_pth, readme['file'])
+        content_type = readme.get('content-type')
+
+    license_ = project.get('license')
+    if isinstance(license_, dict):
+        license_ = license_['text'] if 'text' in license_ else _read_file(repo_pth, license_['file'])
+
+    requires_dist = list(project.get('dependencies', []))
+    for extra, requirements in project.get('optional-dependencies', {}).items():
+        requires_dist += [_with_extra(requirement, extra) for requirement in requirements]
+
+    return {
+        'name': project.get('name'),
+        'version': project.get('version'),
+        'summary': project.get('description'),
+        'description': description,
+        'description_content_type': content_type,
+        **_format_authors(project.get('authors', [])),
+        'license': license_,
+        'requires_python': project.get('requires-python'),
+        'classifier': project.get('classifiers') or None,
+        'requires_dist': requires_dist or None,
+        'home_page': None,
+        'project_url': [f'{label}, {url}' for label, url in project.get('urls', {}).items()] or None,
+    }
+
+
+def _get_cfg(section, key: str, default=None):
+    for option in (key, key.replace('_', '-')):
+        if section is not None and option in section:
+            return section[option]
+    return default
+
+
+def _get_cfg_list(value: Optional[str], comma_separated: bool = False) -> List[str]:
+    if not value:
+        return []
+    lines = [line.strip() for line in value.strip().splitlines()]
+    if comma_separated and len(lines) == 1:
+        lines = lines[0].split(',')
+    return [line.strip() for line in lines if line.strip() and not line.strip().startswith('#')]
+
+
+def _get_cfg_value(repo_pth: str, value: Optional[str]) -> Optional[str]:
+    """Resolve a setup.cfg value, reading file: directives.
+
+    :raises ValueError: if the value is only known at build time (attr:)
+    """
+    if value is None:
+        return None
+    value = value.strip()
+    if value.startswith('attr:'):
+        raise ValueError(f'dynamic value {value}')
+    if value.startswith('file:'):
+        return _read_files(repo_pth, [filename.strip() for filename in value[len('file:'):].split(',')])
+    return value
+
+
+def _read_setup_cfg_metadata(repo_pth: str, config: configparser.ConfigParser) -> Optional[dict]:
+    """Read core metadata from the [metadata] and [options] sections of setup.cfg.
+
+    :return: core metadata, None if any of it is dynamic
+    """
+    metadata = config['metadata'] if config.has_section('metadata') else None
+    options = config['options'] if config.has_section('options') else None
+    try:
+        version = _get_cfg_value(repo_pth, _get_cfg(metadata, 'version'))
+        description = _get_cfg_value(repo_pth, _get_cfg(metadata, 'long_description'))
+        classifiers = _get_cfg_value(repo_pth, _get_cfg(metadata, 'classifiers'))
+    except ValueError:
+        return None
+    if not version:
+        return None
+
+    description_content_type = _get_cfg(metadata, 'long_description_content_type')
+    long_description = _get_cfg(metadata, 'long_description', '')
+    if not description_content_type and long_description.strip().startswith('file:'):
+        description_content_type = _get_content_type(long_description.split(',')[0].strip())
+
+    requires_dist = _get_cfg_list(_get_cfg(options, 'install_requires'))
+    if config.has_section('options.extras_require'):
+        for extra, requirements in config['options.extras_require'].items():
+            requires_dist += [_with_extra(requirement, extra) for requirement in _get_cfg_list(requirements)]
+
+    project_urls = [line.split('=', 1) for line in _get_cfg_list(_get_cfg(metadata, 'project_urls'))]
+    return {
+        'name': _get_cfg(metadata, 'name'),
+        'version': version,
+        'summary': _get_cfg(metadata, 'description'),
+        'description': description,
+        'description_content_type': description_content_type,
+        'author': _get_cfg(metadata, 'author'),
+        'author_email': _get_cfg(metadata, 'author_email'),
+        'license': _get_cfg(metadata, 'license'),
+        'requires_python': _get_cfg(options, 'python_requires'),
+        'classifier': _get_cfg_list(classifiers, comma_separated=True) or None,
+        'requires_dist': requires_dist or None,
+        'home_page': _get_cfg(metadata, 'url'),
+        'project_url': [f'{label.strip()}, {url.strip()}' for label, url in project_urls] or None,
+    }
+
+
+def _get_manifest_entry_points(pyproject: dict, config: configparser.ConfigParser) -> List[str]:
+    entry_points = pyproject.get('project', {}).get('entry-points', {}).get('napari.manifest', {})
+    if entry_points:
+        return list(entry_points.values())
+    if config.has_section('options.entry_points'):
+        return [line.split('=', 1)[1].strip()
+                for line in _get_cfg_list(config['options.entry_points'].get('napari.manifest'))]
+    return []
+
+
+def _find_manifest(repo_pth: str, pyproject: dict, config: configparser.ConfigParser) -> Optional[str]:
+    """Find the npe2 manifest file declared by the napari.manifest entry point.
+
+    :return: path to the manifest, None if not declared or not found in the source tree
+    """
+    package_dirs = ['', 'src']
+    package_dir = _get_cfg(config['options'] if config.has_section('options') else None, 'package_dir')
+    if package_dir:
+        package_dirs += [line.split('=', 1)[-1].strip() for line in _get_cfg_list(package_dir)]
+    package_dirs += list(pyproject.get('tool', {}).get('setuptools', {}).get('package-dir', {}).values())
+
+    for entry_point in _get_manifest_entry_points(pyproject, config):
+        module, _, filename = entry_point.partition(':')
+        for package_dir in package_dirs:
+            path = os.path.join(repo_pth, package_dir, *module.strip().split('.'), filename.strip())
+            if os.path.isfile(path):
+                return path
+    return None
+
+
+def read_static_metadata(repo_pth: str) -> Optional[SimpleNamespace]:
+    """Read the core metadata of a package and its npe2 manifest without building it.
+
+    Only static metadata is read: a PEP 621 [project] table without dynamic
+    fields, or a setuptools setup.cfg with a trivial setup.py and a version
+    that isn't derived at build time.
+
+    :param repo_pth: path to root of python package
+    :return: core metadata and the path to the manifest, None if the package has to be built to know them
+    """
+    pyproject = {}
+    if os.path.isfile(os.path.join(repo_pth, 'pyproject.toml')):
+        if tomllib is None:
+            LOGGER.info('tomllib is not available to read pyproject.toml')
+            return None
+        with open(os.path.join(repo_pth, 'pyproject.toml'), 'rb') as f:
+            pyproject = tomllib.load(f)
+    config = configparser.ConfigParser(interpolation=None)
+    if os.path.isfile(os.path.join(repo_pth, 'setup.cfg')):
+        config.read(os.path.join(repo_pth, 'setup.cfg'), encoding='utf-8')
+
+    try:
+        if 'project' in pyproject:
+            pkg_meta = _read_pyproject_metadata(repo_pth, pyproject['project'])
+        elif (pyproject.get('build-system', {}).get('build-backend', 'setuptools.build_meta:__legacy__')
+              in SETUPTOOLS_BACKENDS and config.has_section('metadata')
+              and _is_trivial_setup_py(repo_pth) and not has_dynamic_version(repo_pth)):
+            pkg_meta = _read_setup_cfg_metadata(repo_pth, config)
+        else:
+            pkg_meta = None
+    except (OSError, KeyError, ValueError) as e:
+        LOGGER.info(f'Unable to read static metadata from {repo_pth}: {e}')
+        return None
+    if not pkg_meta or not pkg_meta['name']:
+        return None
+    # setuptools terminates the description in the wheel metadata with a newline
+    if pkg_meta['description'] and not pkg_meta['description'].endswith('\n'):
+        pkg_meta['description'] += '\n'
+
+    manifest_pth = _find_manifest(repo_pth, pyproject, config)
+    if not manifest_pth:
+        return None
+    return SimpleNamespace(**pkg_meta, manifest_pth=manifest_pth)
@@ -1,8 +1,12 @@
 import unittest
 from unittest.mock import patch
+import boto3
 import requests
+from moto import mock_s3
 from backend.utils.github import get_citation_author, get_github_metadata
 
+from utils import github
+from utils.citation_cache import CitationCache
 from utils.github import get_github_repo_url, get_license, get_citations
 from utils.test_utils import (
     FakeResponse, license_response, no_license_response, citation_string, 
@@ -202,3 +206,33 @@ class TestGithub(unittest.TestCase):
         """
         metadata = get_github_metadata("https://github.com")
         assert metadata["authors"] == citations_authors_auth_names_and_name_result
+
+
+class TestCitationCache(unittest.TestCase):
+
+    def setUp(self):
+        self._citation_cache = CitationCache(bucket_name=None)
+
+    def test_citation_converted_once(self):
+        with patch.object(github, 'citation_cache', self._citation_cache), \
+                patch.object(github, 'Citation', wraps=github.Citation) as mock_citation:
+            citations = github.get_citations(citation_string)
+            authors = github.get_citation_author(citation_string)
+
+            assert github.get_citations(citation_string) == citations
+            assert authors == citations_authors_result
+            mock_citation.assert_called_once()
+
+    @patch.dict('os.environ', {'AWS_ACCESS_KEY_ID': 'testing', 'AWS_SECRET_ACCESS_KEY': 'testing',
+                               'AWS_DEFAULT_REGION': 'us-east-1'})
+    def test_citation_shared_through_s3(self):
+        with mock_s3():
+            boto3.client('s3', region_name='us-east-1').create_bucket(Bucket='test-bucket')
+            github_metadata = {}
+            with patch.object(github, 'citation_cache', CitationCache(bucket_name='test-bucket')):
+                github_metadata['citations'] = github.get_citations(citation_string)
+
+            with patch.object(github, 'citation_cache', CitationCache(bucket_name='test-bucket')), \
+                    patch.object(github, 'Citation', side_effect=AssertionError):
+                assert github.get_citations(citation_string) == github_metadata['citations']
+                assert github.get_citation_author(citation_string) == citations_authors_result
@@ -1,5 +1,19 @@
+import os
+
 import pytest
-from utils.utils import parse_manifest
+from unittest.mock import Mock, patch
+
+from utils import utils
+from utils.utils import parse_manifest, extract_description_text, render_description, render_descriptions
+
+_TEST_PID = os.getpid()
+
+
+def _exit_in_worker(description):
+    # kills the pool worker it runs in, breaking the pool, but renders in the test process
+    if os.getpid() != _TEST_PID:
+        os._exit(1)
+    return extract_description_text(description)
 
 
 def test_save_layers_valid():
@@ -20,3 +34,32 @@ def test_save_layers_valid():
     }}
     parsed_attributes = parse_manifest(manifest)
     assert sorted(parsed_attributes['writer_save_layers']) == ['image', 'labels', 'points', 'tracks']
+
+
+def test_extract_description_text():
+    description = ('# napari-foo\n\n[![License](https://img.shields.io/badge.svg)](LICENSE)\n\n'
+                   'A **plugin** for [napari](https://napari.org) with `snake_case` names.\n\n'
+                   '- reads *images*\n- writes labels\n\n```python\nimport napari\n```\n')
+
+    assert extract_description_text(description) == (
+        'napari-foo\n\nA plugin for napari with snake_case names.\n\n'
+        'reads images\nwrites labels\n\nimport napari\n'
+    )
+
+
+@pytest.mark.parametrize('extractor', ['markdown', 'plain'])
+def test_render_descriptions_memoized(extractor):
+    descriptions = {f'napari-{i}': f'# Plugin\n\nDescription {i % 3}' for i in range(20)}
+    expected = {name: render_description(description, extractor) for name, description in descriptions.items()}
+
+    with patch.dict(utils._DESCRIPTION_EXTRACTORS, {extractor: Mock(side_effect=AssertionError)}):
+        assert render_descriptions({**descriptions, 'napari-empty': ''}, extractor) == {**expected, 'napari-empty': ''}
+
+
+def test_render_descriptions_after_broken_pool():
+    descriptions = {f'napari-{i}': f'# Plugin\n\nBroken pool description {i}' for i in range(20)}
+
+    with patch.dict(utils._DESCRIPTION_EXTRACTORS, {'plain': _exit_in_worker}):
+        rendered = render_descriptions(descriptions, 'plain', max_workers=2)
+
+    assert rendered == {name: extract_description_text(description) for name, description in descriptions.items()}
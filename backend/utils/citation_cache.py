@@ -0,0 +1,98 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from importlib import metadata
+from typing import Optional
+
+import boto3
+from botocore.exceptions import BotoCoreError, ClientError
+
+# Environment variables set through ecs stack terraform module, unset when building previews
+bucket = os.environ.get('BUCKET')
+bucket_path = os.environ.get('BUCKET_PATH', '')
+endpoint_url = os.environ.get('BOTO_ENDPOINT_URL', None)
+# Number of parsed citations kept in memory
+MEMORY_CACHE_SIZE = 1024
+
+
+def citation_hash(citation_str: str) -> str:
+    return hashlib.sha256(citation_str.encode('utf-8')).hexdigest()
+
+
+class CitationCache:
+    """
+    Parsed citations keyed by the sha256 of the raw CITATION.cff, kept in memory
+    and, when a bucket is configured, in s3 so each unique citation is converted
+    once across all lambdas. Keys include the cffconvert version, as its output
+    can change between versions.
+    """
+
+    def __init__(self, bucket_name: Optional[str] = bucket, prefix: str = bucket_path):
+        self._bucket = bucket_name
+        self._prefix = os.path.join(prefix, 'cache', 'citations', f'cffconvert-{metadata.version("cffconvert")}')
+        self._s3_client = None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get_s3_client(self):
+        if self._s3_client is None:
+            self._s3_client = boto3.client('s3', endpoint_url=endpoint_url)
+        return self._s3_client
+
+    def _get_key(self, digest: str) -> str:
+        return f'{self._prefix}/{digest}.json'
+
+    def _remember(self, digest: str, entry: dict):
+        with self._lock:
+            self._entries[digest] = entry
+            self._entries.move_to_end(digest)
+            while len(self._entries) > MEMORY_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def get(self, digest: str) -> Optional[dict]:
+        """
+        Get the parsed citation for a hash if cached.
+
+        :param digest: sha256 of the raw citation
+        :return: parsed citation with citations and authors if cached, None otherwise
+        """
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                return entry
+        if not self._bucket:
+            return None
+        try:
+            response = self._get_s3_client().get_object(Bucket=self._bucket, Key=self._get_key(digest))
+            entry = json.loads(response['Body'].read())
+        except ClientError as e:
+            # without s3:ListBucket missing keys are reported as access denied
+            if e.response['Error']['Code'] not in ('404', 'NoSuchKey', '403', 'AccessDenied'):
+                logging.warning(f'Unable to read cached citation {digest}: {e}')
+            return None
+        except BotoCoreError as e:
+            logging.warning(f'Unable to read cached citation {digest}: {e}')
+            return None
+        self._remember(digest, entry)
+        return entry
+
+    def put(self, digest: str, entry: dict):
+        """
+        Cache the parsed citation for a hash.
+
+        :param digest: sha256 of the raw citation
+        :param entry: parsed citation with citations and authors
+        """
+        self._remember(digest, entry)
+        if not self._bucket:
+            return
+        try:
+            self._get_s3_client().put_object(Bucket=self._bucket, Key=self._get_key(digest),
+                                             Body=json.dumps(entry).encode('utf-8'),
+                                             ContentType='application/json')
+        except (BotoCoreError, ClientError) as e:
+            logging.warning(f'Unable to cache citation {digest}: {e}')
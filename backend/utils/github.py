@@ -1,8 +1,9 @@
+import copy
 import json
 import logging
 import os.path
 import re
-from typing import Dict, Union, IO
+from typing import Dict, List, Union, IO
 
 import requests
 import yaml
@@ -12,6 +13,7 @@ from requests.exceptions import HTTPError
 
 from utils.utils import get_attribute, render_description
 from utils.auth import HTTPBearerAuth
+from utils.citation_cache import CitationCache, citation_hash
 
 # Environment variable set through ecs stack terraform module
 github_client_id = os.environ.get('GITHUB_CLIENT_ID', None)
@@ -35,6 +37,7 @@ project_url_names = {
     'Report Issues': 'report_issues',
     'Twitter': 'twitter'
 }
+citation_cache = CitationCache()
 
 
 def get_file(
@@ -174,6 +177,29 @@ def get_citations(citation_str: str) -> Union[Dict[str, str], None]:
     :param citation_str: citation string to parse
     :return: citation dictionary with parsed citation of different formats, None if not valid citation
     """
+    return _get_parsed_citation(citation_str)['citations']
+
+
+def _get_parsed_citation(citation_str: str) -> dict:
+    """
+    Get the converted citation and authors of a citation string, converting
+    each unique citation only once.
+    :param citation_str: citation string to parse
+    :return: dictionary with the citations and authors of the citation
+    """
+    digest = citation_hash(citation_str)
+    parsed_citation = citation_cache.get(digest)
+    if parsed_citation is None:
+        parsed_citation = {
+            'citations': _convert_citation(citation_str),
+            'authors': _parse_citation_author(citation_str),
+        }
+        citation_cache.put(digest, parsed_citation)
+    # cached entries are shared, so callers get their own copy to update
+    return copy.deepcopy(parsed_citation)
+
+
+def _convert_citation(citation_str: str) -> Union[Dict[str, str], None]:
     try:
         citation = Citation(cffstr=citation_str)
         return {
@@ -209,11 +235,17 @@ def get_citation_author(citation_str: str) -> Union[Dict[str, str], None]:
     :param citation_str: citation string to parse
     :return: list of mappings between the string 'name' and the author name
     """
+    return _get_parsed_citation(citation_str)['authors']
+
+
+def _parse_citation_author(citation_str: str) -> List[Dict[str, str]]:
     try:
         citation_yaml = yaml.safe_load(citation_str)
     except yaml.YAMLError as e:
         logging.error(e)
         return []
+    if not isinstance(citation_yaml, dict) or not isinstance(citation_yaml.get('authors'), list):
+        return []
     authors = []
     for author_entry in citation_yaml['authors']:
         if 'given-names' in author_entry and 'family-names' in author_entry and author_entry['given-names'] and author_entry['family-names']:
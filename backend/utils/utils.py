@@ -1,7 +1,13 @@
+import hashlib
+import html
 import os
 import re
+import threading
+from collections import OrderedDict, defaultdict
+from concurrent import futures
+from concurrent.futures.process import BrokenProcessPool
 import requests
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
 from bs4 import BeautifulSoup
 from markdown import markdown
 from requests import HTTPError
@@ -25,6 +31,33 @@ VALID_LAYERS = [
     'vectors',
 ]
 VALID_LAYER_REGEX = rf"({'|'.join([layer_type for layer_type in VALID_LAYERS])}).*"
+# Description text extractor, either markdown (render to html and take its text) or plain (strip markdown syntax)
+DESCRIPTION_TEXT_EXTRACTOR = os.environ.get('DESCRIPTION_TEXT_EXTRACTOR', 'markdown')
+# Number of rendered descriptions memoized by the hash of their body
+DESCRIPTION_CACHE_SIZE = 4096
+# Below this many descriptions to render, starting worker processes costs more than it saves
+MIN_DESCRIPTIONS_FOR_PROCESS_POOL = 16
+# Markdown syntax stripped by the plain text extractor, applied in order
+_MARKDOWN_SYNTAX = [
+    (re.compile(r'<!--.*?-->', re.DOTALL), ''),
+    (re.compile(r'^[ \t]*(```|~~~).*$', re.MULTILINE), ''),
+    (re.compile(r'<[^>\n]+>'), ''),
+    (re.compile(r'!\[[^\]]*\]\([^)]*\)'), ''),
+    (re.compile(r'\[([^\]]*)\]\([^)]*\)'), r'\1'),
+    (re.compile(r'\[([^\]]*)\]\[[^\]]*\]'), r'\1'),
+    (re.compile(r'^[ ]{0,3}\[[^\]]+\]:[ \t]*\S+.*$', re.MULTILINE), ''),
+    (re.compile(r'^[ ]{0,3}([-*_][ \t]*){3,}$', re.MULTILINE), ''),
+    (re.compile(r'^[ ]{0,3}#{1,6}[ \t]*(.*?)[ \t]*#*[ \t]*$', re.MULTILINE), r'\1'),
+    (re.compile(r'^[ ]{0,3}>[ ]?', re.MULTILINE), ''),
+    (re.compile(r'^[ \t]*([-*+]|\d+[.)])[ \t]+', re.MULTILINE), ''),
+    (re.compile(r'(?<!\w)(\*\*|__)(?=\S)(.+?)(?<=\S)\1(?!\w)'), r'\2'),
+    (re.compile(r'(?<!\w)(\*|_)(?=\S)(.+?)(?<=\S)\1(?!\w)'), r'\2'),
+    (re.compile(r'`([^`]*)`'), r'\1'),
+    (re.compile(r'\n{3,}'), '\n\n'),
+]
+
+_rendered_descriptions = OrderedDict()
+_rendered_descriptions_lock = threading.Lock()
 
 
 def get_attribute(obj: dict, path: list):
@@ -58,21 +91,124 @@ def filter_prefix(str_list: List[str], prefix: str) -> list:
     return [string for string in str_list if string.startswith(prefix)]
 
 
-def render_description(description: str) -> str:
+def _markdown_to_text(description: str) -> str:
+    html_description = markdown(description)
+    soup = BeautifulSoup(html_description, 'html.parser')
+    return soup.get_text()
+
+
+def extract_description_text(description: str) -> str:
+    """
+    Extract description text by stripping markdown syntax with regular expressions,
+    a lighter alternative to rendering the markdown to html. The text can differ
+    slightly from the rendered one for nested or unusual markdown.
+
+    :param description: raw description to extract text from
+    :return: description text
     """
-    Render description with beautiful soup to generate html format description text.
+    text = description
+    for pattern, replacement in _MARKDOWN_SYNTAX:
+        text = pattern.sub(replacement, text)
+    return html.unescape(text).strip() + '\n'
+
+
+_DESCRIPTION_EXTRACTORS = {
+    'markdown': _markdown_to_text,
+    'plain': extract_description_text,
+}
+
+
+def _get_rendered_description(key: tuple) -> Optional[str]:
+    with _rendered_descriptions_lock:
+        text = _rendered_descriptions.get(key)
+        if text is not None:
+            _rendered_descriptions.move_to_end(key)
+        return text
+
+
+def _set_rendered_description(key: tuple, text: str):
+    with _rendered_descriptions_lock:
+        _rendered_descriptions[key] = text
+        _rendered_descriptions.move_to_end(key)
+        while len(_rendered_descriptions) > DESCRIPTION_CACHE_SIZE:
+            _rendered_descriptions.popitem(last=False)
+
+
+def _description_key(description: str, extractor: str) -> tuple:
+    return extractor, hashlib.sha256(description.encode('utf-8')).hexdigest()
+
+
+def get_description_hash(description: str, extractor: str = None) -> str:
+    """
+    Hash identifying the text rendered from a description by an extractor, to
+    store rendered text across processes.
+
+    :param description: raw description
+    :param extractor: markdown or plain, defaults to DESCRIPTION_TEXT_EXTRACTOR
+    :return: extractor name and sha256 of the description
+    """
+    return '-'.join(_description_key(description, extractor or DESCRIPTION_TEXT_EXTRACTOR))
+
+
+def render_description(description: str, extractor: str = None) -> str:
+    """
+    Render description with beautiful soup to generate html format description text,
+    or strip its markdown syntax with the plain extractor. Rendered text is memoized
+    by the hash of the description, so unchanged descriptions of new releases are
+    not rendered again.
 
     :param description: raw description to render
+    :param extractor: markdown or plain, defaults to DESCRIPTION_TEXT_EXTRACTOR
     :return: rendered description html text
     """
     if description != '':
-        html = markdown(description)
-        soup = BeautifulSoup(html, 'html.parser')
-        return soup.get_text()
+        extractor = extractor or DESCRIPTION_TEXT_EXTRACTOR
+        key = _description_key(description, extractor)
+        text = _get_rendered_description(key)
+        if text is None:
+            text = _DESCRIPTION_EXTRACTORS[extractor](description)
+            _set_rendered_description(key, text)
+        return text
 
     return ''
 
 
+def render_descriptions(descriptions: Dict[str, str], extractor: str = None,
+                        max_workers: int = None) -> Dict[str, str]:
+    """
+    Render many descriptions at once. Rendering is CPU bound, so descriptions
+    that are not memoized yet are rendered in a process pool instead of
+    threads contending for the GIL. Rendering falls back to the current process
+    where a process pool is unavailable, e.g. on lambda without /dev/shm, and
+    for the descriptions left when a worker process dies.
+
+    :param descriptions: raw descriptions to render by plugin name
+    :param extractor: markdown or plain, defaults to DESCRIPTION_TEXT_EXTRACTOR
+    :param max_workers: number of worker processes, defaults to the cpu count
+    :return: rendered description text by plugin name
+    """
+    extractor = extractor or DESCRIPTION_TEXT_EXTRACTOR
+    keys = {name: _description_key(description, extractor)
+            for name, description in descriptions.items() if description != ''}
+    missing = {}
+    for name, key in keys.items():
+        if key not in missing and _get_rendered_description(key) is None:
+            missing[key] = descriptions[name]
+
+    if len(missing) >= MIN_DESCRIPTIONS_FOR_PROCESS_POOL:
+        try:
+            with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+                texts = executor.map(_DESCRIPTION_EXTRACTORS[extractor], missing.values(), chunksize=8)
+                for key, text in zip(list(missing), texts):
+                    _set_rendered_description(key, text)
+        except (OSError, NotImplementedError) as e:
+            print(f"Process pool unavailable, rendering descriptions in process: {e}")
+        except BrokenProcessPool as e:
+            print(f"Process pool broke, rendering remaining descriptions in process: {e}")
+
+    return {name: render_description(description, extractor) for name, description in descriptions.items()}
+
+
 def send_alert(message: str):
     """
     Send alert to slack with a message.
@@ -144,6 +280,48 @@ def get_category_mapping(category: str, mappings: Dict[str, List]) -> List[Dict]
         return mappings[category]
 
 
+def precompute_category_mapping(mappings: Dict[str, List]) -> Dict[str, Dict[str, Dict[str, List]]]:
+    """
+    Precompute the categories of each ontology term of a mapping, so that
+    assigning categories to a plugin is a lookup per term.
+
+    :param mappings: mappings of a category version, as returned by get_categories_mapping
+    :return: dict of term to its category labels and category hierarchies, both keyed by dimension
+    """
+    precomputed = {}
+    for term, matches in mappings.items():
+        categories = defaultdict(list)
+        category_hierarchy = defaultdict(list)
+        for match in matches:
+            if match['label'] not in categories[match['dimension']]:
+                categories[match['dimension']].append(match['label'])
+            category_hierarchy[match['dimension']].append([match['label'], *match['hierarchy'][1:]])
+        precomputed[term] = {'category': dict(categories), 'category_hierarchy': dict(category_hierarchy)}
+    return precomputed
+
+
+def get_categories(terms: List[str], precomputed: Dict[str, Dict[str, Dict[str, List]]]) -> Tuple[Dict, Dict]:
+    """
+    Get the categories of a plugin from its ontology terms.
+
+    :param terms: ontology terms the plugin is labeled with
+    :param precomputed: precomputed mapping, as returned by precompute_category_mapping
+    :return: category labels and category hierarchies of the plugin, both keyed by dimension
+    """
+    categories = defaultdict(list)
+    category_hierarchy = defaultdict(list)
+    for term in terms:
+        if term not in precomputed:
+            continue
+        for dimension, labels in precomputed[term]['category'].items():
+            for label in labels:
+                if label not in categories[dimension]:
+                    categories[dimension].append(label)
+        for dimension, hierarchies in precomputed[term]['category_hierarchy'].items():
+            category_hierarchy[dimension].extend(list(hierarchy) for hierarchy in hierarchies)
+    return categories, category_hierarchy
+
+
 def parse_manifest(manifest: Optional[dict] = None):
     """
     Convert raw manifest into dictionary of npe2 attributes.
@@ -0,0 +1,74 @@
+import logging
+import threading
+
+from utils.utils import ParameterStoreAdapter
+
+LOGGER = logging.getLogger()
+
+
+class StageCheckpoint:
+    """
+    Tracks the stages of an activity run completed for a window, persisted
+    through the parameter store after each stage. A run following a failed run
+    resumes the same window and skips the stages that already completed,
+    the checkpoint is cleared once the last updated timestamp is advanced.
+    """
+
+    def __init__(
+        self,
+        parameter_store: ParameterStoreAdapter,
+        start_time: int,
+        end_time: int,
+        completed: tuple = (),
+        persist: bool = True,
+    ):
+        self._parameter_store = parameter_store
+        self.start_time = start_time
+        self.end_time = end_time
+        self._completed = set(completed)
+        self._persist = persist
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(
+        cls,
+        parameter_store: ParameterStoreAdapter,
+        start_time: int,
+        current_time: int,
+        persist: bool = True,
+    ) -> "StageCheckpoint":
+        """
+        Resume the checkpoint of the window starting at start_time, or start a
+        new window ending at current_time.
+
+        :param ParameterStoreAdapter parameter_store:
+        :param int start_time: last updated timestamp of the activity data
+        :param int current_time: end of the window if there is nothing to resume
+        :param bool persist: save completed stages, disabled for dry runs
+        """
+        checkpoint = parameter_store.get_checkpoint()
+        if checkpoint and checkpoint.get("start_time") == start_time:
+            completed = tuple(checkpoint.get("completed", []))
+            LOGGER.info(
+                f"Resuming activity run start_time={start_time} "
+                f"end_time={checkpoint['end_time']} completed={sorted(completed)}"
+            )
+            return cls(parameter_store, start_time, checkpoint["end_time"], completed, persist)
+        return cls(parameter_store, start_time, current_time, persist=persist)
+
+    def is_completed(self, stage: str) -> bool:
+        with self._lock:
+            return stage in self._completed
+
+    def complete(self, stage: str) -> None:
+        with self._lock:
+            self._completed.add(stage)
+            if not self._persist:
+                return
+            self._parameter_store.set_checkpoint(
+                {
+                    "start_time": self.start_time,
+                    "end_time": self.end_time,
+                    "completed": sorted(self._completed),
+                }
+            )
@@ -8,7 +8,11 @@ import os
 from pynamodb.models import Model
 from pynamodb.attributes import UnicodeAttribute, NumberAttribute
 
-from utils.utils import get_current_timestamp, date_to_utc_timestamp_in_millis, datetime_to_utc_timestamp_in_millis
+from utils.utils import (
+    get_current_timestamp, date_to_utc_timestamp_in_millis, datetime_to_utc_timestamp_in_millis, is_dry_run
+)
+from utils.dynamo_writer import DynamoBatchWriter
+from utils.sql import chunk_plugins, generate_plugins_cte
 from plugin.helpers import _get_repo_to_plugin_dict
 
 
@@ -41,28 +45,44 @@ class GitHubActivityType(Enum):
 
     def _create_subquery(self, plugins_by_earliest_ts: dict[str, datetime]) -> str:
         if self is GitHubActivityType.MONTH:
-            return " OR ".join(
-                [
-                    f"repo = '{name}' AND TO_TIMESTAMP(commit_author_date) >= "
-                    f"{TIMESTAMP_FORMAT.format(ts.replace(day=1))}"
-                    for name, ts in plugins_by_earliest_ts.items()
-                ]
+            earliest_timestamp = min(plugins_by_earliest_ts.values())
+            return (
+                "TO_TIMESTAMP(commit_author_date) >= plugins.earliest_timestamp "
+                f"AND TO_TIMESTAMP(commit_author_date) >= {TIMESTAMP_FORMAT.format(earliest_timestamp)}"
             )
-        return f"""repo IN ({','.join([f"'{plugin}'" for plugin in plugins_by_earliest_ts.keys()])})"""
+        return "TRUE"
 
-    def get_query(self, plugins_by_earliest_ts: dict[str, datetime]) -> str:
+    def _get_plugins_by_start_timestamp(
+        self, plugins_by_earliest_ts: dict[str, datetime]
+    ) -> dict[str, datetime]:
+        if self is GitHubActivityType.MONTH:
+            return {name: ts.replace(day=1) for name, ts in plugins_by_earliest_ts.items()}
+        return plugins_by_earliest_ts
+
+    def _get_chunk_query(self, plugins_by_earliest_ts: dict[str, datetime]) -> str:
+        plugins_by_timestamp = self._get_plugins_by_start_timestamp(plugins_by_earliest_ts)
         return f"""
+                WITH {generate_plugins_cte(plugins_by_timestamp)}
                 SELECT 
                     {self.query_projection}
                 FROM
                     imaging.github.commits
+                    JOIN plugins ON repo = plugins.plugin_name
                 WHERE 
                     repo_type = 'plugin'
-                    AND {self._create_subquery(plugins_by_earliest_ts)}
+                    AND {self._create_subquery(plugins_by_timestamp)}
                 GROUP BY {self.query_sorting}
                 ORDER BY {self.query_sorting}
                 """
 
+    def get_query(self, plugins_by_earliest_ts: dict[str, datetime]) -> str:
+        """
+        Returns the statements fetching the activity of the plugins, joining the commits on a plugins table staged
+        with the plugins and their earliest timestamps, in a statement per chunk of plugins.
+        :param dict[str, datetime] plugins_by_earliest_ts: plugin name by earliest timestamp of commit record added
+        """
+        return ";".join(self._get_chunk_query(plugins) for plugins in chunk_plugins(plugins_by_earliest_ts))
+
 
 class GitHubActivity(Model):
     class Meta:
@@ -100,10 +120,8 @@ def transform_and_write_to_dynamo(data: dict[str, List], activity_type: GitHubAc
     """
     LOGGER.info(f'Starting item creation for github-activity type={activity_type.name}')
 
-    batch = GitHubActivity.batch_write()
-
     start = time.perf_counter()
-    count = 0
+    items = []
     repo_to_plugin_dict = _get_repo_to_plugin_dict()
     for repo, github_activities in data.items():
         plugin_name = repo_to_plugin_dict.get(repo)
@@ -120,11 +138,10 @@ def transform_and_write_to_dynamo(data: dict[str, List], activity_type: GitHubAc
                 timestamp=activity_type.format_to_timestamp(timestamp),
                 commit_count=commit_count,
                 repo=repo)
-            batch.save(item)
-            count += 1
+            items.append(item)
 
-    batch.commit()
+    DynamoBatchWriter(GitHubActivity).write(items, skip_unchanged=True, dry_run=is_dry_run())
     duration = (time.perf_counter() - start) * 1000
 
-    LOGGER.info(f'Items github-activity type={activity_type.name} count={count}')
+    LOGGER.info(f'Items github-activity type={activity_type.name} count={len(items)}')
     LOGGER.info(f'Transform and write to github-activity type={activity_type.name} timeTaken={duration}ms')
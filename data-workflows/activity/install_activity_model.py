@@ -8,7 +8,8 @@ import os
 from pynamodb.models import Model
 from pynamodb.attributes import UnicodeAttribute, NumberAttribute
 
-from utils.utils import get_current_timestamp, datetime_to_utc_timestamp_in_millis
+from utils.dynamo_writer import DynamoBatchWriter
+from utils.utils import get_current_timestamp, datetime_to_utc_timestamp_in_millis, is_dry_run
 
 LOGGER = logging.getLogger()
 
@@ -62,8 +63,7 @@ class InstallActivity(Model):
 def transform_and_write_to_dynamo(data: dict[str, List],
                                   activity_type: InstallActivityType) -> None:
     LOGGER.info(f'Starting item creation for install-activity type={activity_type.name}')
-    batch = InstallActivity.batch_write()
-    count = 0
+    items = []
     is_total = 'true' if activity_type is InstallActivityType.TOTAL else None
     start = time.perf_counter()
     for plugin_name, install_activities in data.items():
@@ -78,11 +78,13 @@ def transform_and_write_to_dynamo(data: dict[str, List],
                 install_count=activity['count'],
                 is_total=is_total,
             )
-            batch.save(item)
-            count += 1
+            items.append(item)
 
-    batch.commit()
+    # DAY rows are mostly new, MONTH and TOTAL rows are rewritten with the same counts on most runs
+    DynamoBatchWriter(InstallActivity).write(
+        items, skip_unchanged=activity_type is not InstallActivityType.DAY, dry_run=is_dry_run()
+    )
     duration = (time.perf_counter() - start) * 1000
 
-    LOGGER.info(f'Items install-activity type={activity_type.name} count={count}')
+    LOGGER.info(f'Items install-activity type={activity_type.name} count={len(items)}')
     LOGGER.info(f'Transform and write to install-activity type={activity_type.name} timeTaken={duration}ms')
@@ -1,20 +1,33 @@
 import logging
+import os
 from datetime import datetime
+from functools import partial
+from typing import Callable, Iterable, Optional
 
 from activity.install_activity_model import InstallActivityType
 import activity.install_activity_model as install_model
 from activity.github_activity_model import GitHubActivityType
 import activity.github_activity_model as github_model
 import activity.snowflake_adapter as snowflake
-from utils.utils import ParameterStoreAdapter
+from activity.checkpoint import StageCheckpoint
+from utils.utils import ParameterStoreAdapter, is_dry_run
+from nhcommons.utils.snowflake_pool import close_query_engine
+from utils.scheduler import DEFAULT_MAX_CONCURRENT_STAGES, StageScheduler
 import nhcommons
 
 LOGGER = logging.getLogger()
 
 
+MAX_CONCURRENT_STAGES = int(
+    os.getenv("ACTIVITY_MAX_CONCURRENT_STAGES", DEFAULT_MAX_CONCURRENT_STAGES)
+)
+
+
 def _fetch_install_data_and_write_to_dynamo(
     data: dict[str, datetime], install_activity_type: InstallActivityType
 ) -> None:
+    if not data:
+        return
     plugin_install_data = snowflake.get_plugins_install_count_since_timestamp(
         data, install_activity_type
     )
@@ -26,6 +39,8 @@ def _fetch_install_data_and_write_to_dynamo(
 def _fetch_github_data_and_write_to_dynamo(
     data: dict[str, datetime], github_activity_type: GitHubActivityType
 ) -> None:
+    if not data:
+        return
     plugin_commit_data = snowflake.get_plugins_commit_count_since_timestamp(
         data, github_activity_type
     )
@@ -34,37 +49,97 @@ def _fetch_github_data_and_write_to_dynamo(
     )
 
 
-def _update_install_activity(start_time: int, end_time: int) -> None:
+def _get_plugins_with_installs(start_time: int, end_time: int) -> dict[str, datetime]:
     updated_plugins = snowflake.get_plugins_with_installs_in_window(
         start_time, end_time
     )
-    count = len(updated_plugins)
-    LOGGER.info(f"Plugins with new install activity count={count}")
-    if count == 0:
-        return
+    LOGGER.info(f"Plugins with new install activity count={len(updated_plugins)}")
+    return updated_plugins
 
-    _fetch_install_data_and_write_to_dynamo(updated_plugins, InstallActivityType.DAY)
-    _fetch_install_data_and_write_to_dynamo(updated_plugins, InstallActivityType.MONTH)
-    _fetch_install_data_and_write_to_dynamo(updated_plugins, InstallActivityType.TOTAL)
 
-
-def _update_github_activity(start_time: int, end_time: int) -> None:
+def _get_plugins_with_commits(start_time: int, end_time: int) -> dict[str, datetime]:
     updated_plugins = snowflake.get_plugins_with_commits_in_window(
         start_time, end_time
     )
-    count = len(updated_plugins)
-    LOGGER.info(f"Plugins with new github activity count={count}")
-    if count == 0:
+    LOGGER.info(f"Plugins with new github activity count={len(updated_plugins)}")
+    return updated_plugins
+
+
+def _run_stage(
+    checkpoint: StageCheckpoint, stage: str, fetch_and_write: Callable, activity_type, data
+) -> None:
+    fetch_and_write(data, activity_type)
+    checkpoint.complete(stage)
+
+
+def _add_stages(
+    scheduler: StageScheduler,
+    checkpoint: StageCheckpoint,
+    name: str,
+    get_updated_plugins: Callable,
+    fetch_and_write: Callable,
+    activity_types: Iterable,
+) -> None:
+    """
+    Add a stage fetching the plugins updated in the window of the checkpoint,
+    followed by a stage per activity type not completed yet.
+    """
+    stages = {
+        f"{name}.{activity_type.name}": activity_type
+        for activity_type in activity_types
+        if not checkpoint.is_completed(f"{name}.{activity_type.name}")
+    }
+    if not stages:
+        LOGGER.info(f"Stages of {name} already completed")
+        return
+    scheduler.add_stage(
+        name, partial(get_updated_plugins, checkpoint.start_time, checkpoint.end_time)
+    )
+    for stage, activity_type in stages.items():
+        scheduler.add_stage(
+            stage,
+            partial(_run_stage, checkpoint, stage, fetch_and_write, activity_type),
+            depends_on=name,
+        )
+
+
+def update_activity(parameter_store: Optional[ParameterStoreAdapter] = None) -> None:
+    """
+    Update the activity data of plugins with installs or commits since the last
+    updated timestamp, resuming the window of a failed run if there is one.
+
+    :param ParameterStoreAdapter parameter_store: store of the last updated
+    timestamp and checkpoint, the parameter store if not set
+    """
+    parameter_store = parameter_store or ParameterStoreAdapter()
+    checkpoint = StageCheckpoint.load(
+        parameter_store,
+        parameter_store.get_last_updated_timestamp(),
+        nhcommons.utils.get_current_timestamp(),
+        persist=not is_dry_run(),
+    )
+    scheduler = StageScheduler(max_workers=MAX_CONCURRENT_STAGES)
+    _add_stages(
+        scheduler,
+        checkpoint,
+        "install",
+        _get_plugins_with_installs,
+        _fetch_install_data_and_write_to_dynamo,
+        InstallActivityType,
+    )
+    _add_stages(
+        scheduler,
+        checkpoint,
+        "github",
+        _get_plugins_with_commits,
+        _fetch_github_data_and_write_to_dynamo,
+        GitHubActivityType,
+    )
+    try:
+        scheduler.run()
+    finally:
+        close_query_engine()
+    if is_dry_run():
+        LOGGER.info("Dry run, last updated timestamp not advanced")
         return
-    _fetch_github_data_and_write_to_dynamo(updated_plugins, GitHubActivityType.LATEST)
-    _fetch_github_data_and_write_to_dynamo(updated_plugins, GitHubActivityType.MONTH)
-    _fetch_github_data_and_write_to_dynamo(updated_plugins, GitHubActivityType.TOTAL)
-
-
-def update_activity() -> None:
-    parameter_store = ParameterStoreAdapter()
-    last_updated_timestamp = parameter_store.get_last_updated_timestamp()
-    current_timestamp = nhcommons.utils.get_current_timestamp()
-    _update_install_activity(last_updated_timestamp, current_timestamp)
-    _update_github_activity(last_updated_timestamp, current_timestamp)
-    parameter_store.set_last_updated_timestamp(current_timestamp)
+    parameter_store.set_last_updated_timestamp(checkpoint.end_time)
@@ -1,15 +1,15 @@
 import logging
-import time
 from datetime import datetime
-import os
 from functools import reduce
 from typing import List, Any, Callable, Iterable
 
-import snowflake.connector
+import pandas as pd
 from snowflake.connector.cursor import SnowflakeCursor
 
 from activity.install_activity_model import InstallActivityType
 from activity.github_activity_model import GitHubActivityType
+from nhcommons.utils.snowflake_pool import fetch_dataframe, get_query_engine
+from utils.sql import chunk_plugins, generate_plugins_cte
 
 LOGGER = logging.getLogger()
 TIMESTAMP_FORMAT = "TO_TIMESTAMP('{0:%Y-%m-%d %H:%M:%S}')"
@@ -35,22 +35,33 @@ def get_plugins_with_installs_in_window(start_millis: int, end_millis: int) -> d
 
 def get_plugins_install_count_since_timestamp(plugins_by_earliest_ts: dict[str, datetime],
                                               install_activity_type: InstallActivityType) -> dict[str, List]:
-    query = f"""
+    query = ';'.join(
+        _generate_install_count_query(plugins, install_activity_type)
+        for plugins in chunk_plugins(plugins_by_earliest_ts)
+    )
+    LOGGER.info(f'Fetching data for granularity={install_activity_type.name}')
+    return _mapped_query_results(query, 'PYPI', {}, _cursor_to_plugin_activity_mapper)
+
+
+def _generate_install_count_query(plugins_by_earliest_ts: dict[str, datetime],
+                                  install_activity_type: InstallActivityType) -> str:
+    plugins_by_timestamp = _get_plugins_by_start_timestamp(plugins_by_earliest_ts, install_activity_type)
+    return f"""
+            WITH {generate_plugins_cte(plugins_by_timestamp)}
             SELECT 
                 LOWER(file_project) AS name, 
                 {install_activity_type.get_query_timestamp_projection()} AS ts, 
                 COUNT(*) AS count
             FROM
                 imaging.pypi.labeled_downloads
+                JOIN plugins ON LOWER(file_project) = plugins.plugin_name
             WHERE 
                 download_type = 'pip'
                 AND project_type = 'plugin'
-                AND ({_generate_subquery_by_type(plugins_by_earliest_ts, install_activity_type)})
+                AND ({_generate_subquery_by_type(plugins_by_timestamp, install_activity_type)})
             GROUP BY name, ts
             ORDER BY name, ts
             """
-    LOGGER.info(f'Fetching data for granularity={install_activity_type.name}')
-    return _mapped_query_results(query, 'PYPI', {}, _cursor_to_plugin_activity_mapper)
 
 
 def get_plugins_with_commits_in_window(start_millis: int, end_millis: int) -> dict[str, datetime]:
@@ -95,29 +106,30 @@ def get_plugins_commit_count_since_timestamp(plugins_by_earliest_ts: dict[str, d
     )
 
 
+def _get_plugins_by_start_timestamp(plugins_by_timestamp: dict[str, datetime],
+                                    install_activity_type: InstallActivityType) -> dict[str, datetime]:
+    if install_activity_type is InstallActivityType.MONTH:
+        return {plugin: ts.replace(day=1) for plugin, ts in plugins_by_timestamp.items()}
+    return plugins_by_timestamp
+
+
 def _generate_subquery_by_type(plugins_by_timestamp: dict[str, datetime], install_activity_type: InstallActivityType):
     """
-    Returns subquery clause generated from the plugins_by_timestamp data based on the InstallActivityType. It is used to
-    get the install count since a specific starting point for each plugin.
+    Returns subquery clause filtering the installs joined on the plugins table based on the InstallActivityType. It is
+    used to get the install count since a specific starting point for each plugin.
     If InstallActivityType.TOTAL, fetch the sum of installs over all time, so construct subquery without timestamp
     constraint.
-    If InstallActivityType.MONTH, fetch the sum of installs from the beginning of the month of the timestamp specified
-    for each of the plugin.
-    If InstallActivityType.DAY, fetch the sum of installs from the beginning of the day of the timestamp specified
-    for each of the plugin.
-    :param dict[str, datetime] plugins_by_timestamp: plugin name by earliest timestamp of install record added
+    If InstallActivityType.MONTH or InstallActivityType.DAY, fetch the sum of installs from the earliest_timestamp of
+    each plugin, which is the beginning of its month or day. The earliest of these timestamps is also compared against
+    directly, so partitions older than any plugin's starting point can be pruned.
+    :param dict[str, datetime] plugins_by_timestamp: plugin name by starting timestamp, as staged in the plugins table
     :param InstallActivityType install_activity_type:
     """
     if install_activity_type is InstallActivityType.TOTAL:
-        return f"""LOWER(file_project) IN ({','.join([f"'{plugin}'" for plugin in plugins_by_timestamp.keys()])})"""
+        return 'TRUE'
 
-    if install_activity_type is InstallActivityType.MONTH:
-        plugins_by_formatted_timestamp = {plugin: ts.replace(day=1) for plugin, ts in plugins_by_timestamp.items()}
-    else:
-        plugins_by_formatted_timestamp = plugins_by_timestamp
-
-    return ' OR '.join([f"LOWER(file_project) = '{name}' AND timestamp >= "f"{TIMESTAMP_FORMAT.format(ts)}"
-                        for name, ts in plugins_by_formatted_timestamp.items()])
+    earliest_timestamp = min(plugins_by_timestamp.values())
+    return f"timestamp >= plugins.earliest_timestamp AND timestamp >= {TIMESTAMP_FORMAT.format(earliest_timestamp)}"
 
 
 def _format_timestamp(timestamp_millis):
@@ -132,8 +144,22 @@ def _cursor_to_timestamp_by_name_mapper(accumulator: dict[str, datetime], cursor
     :param SnowflakeCursor cursor:
     :returns: Accumulator after data from cursor has been added
     """
-    for name, earliest_timestamp in cursor:
-        accumulator[name] = earliest_timestamp
+    frame = fetch_dataframe(cursor, ["name", "earliest_timestamp"])
+    accumulator.update(frame.set_index("name")["earliest_timestamp"].to_dict())
+    return accumulator
+
+
+def _add_records_by_name(accumulator: dict[str, List], frame: pd.DataFrame) -> dict[str, List]:
+    """
+    Groups the rows of the frame by name, and adds the other columns of each row as a record to the accumulator keyed
+    on name, keeping the order of the rows.
+    :param dict[str, List] accumulator: Accumulator that will be updated with new data
+    :param pd.DataFrame frame: Query result with a name column
+    :returns: Accumulator after data from frame has been added
+    """
+    fields = [column for column in frame.columns if column != "name"]
+    for name, group in frame.groupby("name", sort=False):
+        accumulator.setdefault(name, []).extend(group[fields].to_dict("records"))
     return accumulator
 
 
@@ -146,9 +172,7 @@ def _cursor_to_plugin_activity_mapper(accumulator: dict[str, List], cursor) -> d
     :param SnowflakeCursor cursor:
     :returns: Accumulator after data from cursor has been added
    """
-    for name, timestamp, count in cursor:
-        accumulator.setdefault(name, []).append({'timestamp': timestamp, 'count': count})
-    return accumulator
+    return _add_records_by_name(accumulator, fetch_dataframe(cursor, ["name", "timestamp", "count"]))
 
 
 def _cursor_to_plugin_github_activity_latest_mapper(accumulator: dict[str, List], cursor) -> dict[str, List]:
@@ -160,9 +184,7 @@ def _cursor_to_plugin_github_activity_latest_mapper(accumulator: dict[str, List]
     :param SnowflakeCursor cursor:
     :returns: Accumulator after data from cursor has been added
    """
-    for name, timestamp in cursor:
-        accumulator.setdefault(name, []).append({'timestamp': timestamp})
-    return accumulator
+    return _add_records_by_name(accumulator, fetch_dataframe(cursor, ["name", "timestamp"]))
 
 
 def _cursor_to_plugin_github_activity_total_mapper(accumulator: dict[str, List], cursor) -> dict[str, List]:
@@ -174,28 +196,15 @@ def _cursor_to_plugin_github_activity_total_mapper(accumulator: dict[str, List],
     :param SnowflakeCursor cursor:
     :returns: Accumulator after data from cursor has been added
    """
-    for name, count in cursor:
-        accumulator.setdefault(name, []).append({'count': count})
-    return accumulator
+    return _add_records_by_name(accumulator, fetch_dataframe(cursor, ["name", "count"]))
 
 
 def _execute_query(schema: str, query: str) -> Iterable[SnowflakeCursor]:
-    connection = snowflake.connector.connect(
-        user=os.getenv('SNOWFLAKE_USER'),
-        password=os.getenv('SNOWFLAKE_PASSWORD'),
-        account="CZI-IMAGING",
-        warehouse="IMAGING",
-        database="IMAGING",
-        schema=schema
-    )
-    start = time.perf_counter()
     try:
-        return connection.execute_string(query)
+        return get_query_engine().execute(schema, query)
     except Exception:
         LOGGER.exception(f'Exception when executing query={query}')
-    finally:
-        duration = time.perf_counter() - start
-        LOGGER.info(f'Query execution time={duration * 1000}ms')
+        raise
 
 
 def _mapped_query_results(query: str, schema: str, accumulator: Any, accumulator_updater: Callable) -> Any:
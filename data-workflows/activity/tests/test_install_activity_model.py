@@ -4,6 +4,7 @@ from unittest.mock import Mock
 import pytest
 from dateutil.relativedelta import relativedelta
 
+import activity.install_activity_model
 from activity.install_activity_model import InstallActivityType, InstallActivity
 
 
@@ -65,17 +66,19 @@ class TestInstallActivityModels:
 
     @pytest.fixture(autouse=True)
     def _setup_method(self, monkeypatch):
-        self._batch_write_mock = Mock()
-        monkeypatch.setattr(InstallActivity, 'batch_write', lambda: self._batch_write_mock)
+        self._batch_writer_mock = Mock()
+        monkeypatch.setattr(activity.install_activity_model, 'DynamoBatchWriter', self._batch_writer_mock)
 
-    def _verify(self, expected):
-        _batch_write_save_mock = self._batch_write_mock.save
+    def _verify(self, expected, skip_unchanged=True):
+        self._batch_writer_mock.assert_called_once_with(InstallActivity)
+        _write_mock = self._batch_writer_mock.return_value.write
+        _write_mock.assert_called_once()
+        assert _write_mock.call_args.kwargs == {'skip_unchanged': skip_unchanged, 'dry_run': False}
 
-        assert _batch_write_save_mock.call_count == len(expected)
+        actual = _write_mock.call_args.args[0]
+        assert len(actual) == len(expected)
         for item in expected:
-            _batch_write_save_mock.assert_any_call(item)
-
-        self._batch_write_mock.commit.assert_called_once_with()
+            assert item in actual
 
     def test_transform_to_dynamo_records_for_day(self):
         data = {
@@ -91,7 +94,7 @@ class TestInstallActivityModels:
         transform_and_write_to_dynamo(data, InstallActivityType.DAY)
 
         expected = generate_expected(data, 'DAY', lambda ts: f'DAY:{ts.strftime("%Y%m%d")}', timestamp_format)
-        self._verify(expected)
+        self._verify(expected, skip_unchanged=False)
 
     def test_transform_to_dynamo_records_for_month(self):
         data = {
@@ -9,7 +9,7 @@ import activity.snowflake_adapter as snowflake
 import activity.processor as processor
 from activity.install_activity_model import InstallActivityType
 from activity.github_activity_model import GitHubActivityType
-from utils.utils import ParameterStoreAdapter
+from utils.utils import FileParameterStore, ParameterStoreAdapter
 import nhcommons
 
 START_TIME = 1234567
@@ -57,6 +57,7 @@ class TestActivityProcessor:
         self._parameter_store = Mock(
             spec=ParameterStoreAdapter,
             get_last_updated_timestamp=lambda: START_TIME,
+            get_checkpoint=lambda: None,
         )
         monkeypatch.setattr(processor, "ParameterStoreAdapter",
                             lambda: self._parameter_store)
@@ -110,3 +111,60 @@ class TestActivityProcessor:
 
         assert self._install_transform_and_write_mock.call_count == 0
         assert self._commits_transform_and_write_mock.call_count == 0
+
+
+class TestActivityProcessorCheckpoint:
+    @pytest.fixture(autouse=True)
+    def setup_method(self, monkeypatch, tmp_path):
+        monkeypatch.setattr(nhcommons.utils, "get_current_timestamp", lambda: END_TIME)
+        TestActivityProcessor._setup_snowflake_response(monkeypatch, MOCK_DATA)
+        self._parameter_store = FileParameterStore(str(tmp_path / "config.json"))
+        self._parameter_store.set_last_updated_timestamp(START_TIME)
+        self._written = []
+        monkeypatch.setattr(
+            activity_iam, "transform_and_write_to_dynamo",
+            lambda _, iat: self._written.append(f"install.{iat.name}"),
+        )
+        monkeypatch.setattr(
+            activity_gam, "transform_and_write_to_dynamo", self._write_github
+        )
+        self._failing = {"github.MONTH"}
+
+    def _write_github(self, _, gat):
+        stage = f"github.{gat.name}"
+        if stage in self._failing:
+            raise RuntimeError(f"{stage} failed")
+        self._written.append(stage)
+
+    def test_failed_run_is_resumed_from_incomplete_stages(self, monkeypatch):
+        with pytest.raises(RuntimeError):
+            processor.update_activity(self._parameter_store)
+
+        assert self._parameter_store.get_last_updated_timestamp() == START_TIME
+        assert self._parameter_store.get_checkpoint() == {
+            "start_time": START_TIME,
+            "end_time": END_TIME,
+            "completed": sorted(
+                ["install.DAY", "install.MONTH", "install.TOTAL", "github.LATEST", "github.TOTAL"]
+            ),
+        }
+
+        self._written = []
+        self._failing = set()
+        monkeypatch.setattr(nhcommons.utils, "get_current_timestamp", lambda: END_TIME + 1000)
+        processor.update_activity(self._parameter_store)
+
+        assert self._written == ["github.MONTH"]
+        assert self._parameter_store.get_last_updated_timestamp() == END_TIME
+        assert self._parameter_store.get_checkpoint() is None
+
+    def test_checkpoint_of_other_window_is_ignored(self):
+        self._failing = set()
+        self._parameter_store.set_checkpoint(
+            {"start_time": START_TIME - 1, "end_time": START_TIME, "completed": ["install.DAY"]}
+        )
+
+        processor.update_activity(self._parameter_store)
+
+        assert len(self._written) == 6
+        assert self._parameter_store.get_last_updated_timestamp() == END_TIME
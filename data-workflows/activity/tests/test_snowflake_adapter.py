@@ -1,3 +1,4 @@
+import sqlite3
 from datetime import datetime, timezone
 from unittest.mock import Mock
 
@@ -5,6 +6,8 @@ import pytest
 import snowflake.connector
 
 from activity.install_activity_model import InstallActivityType
+from nhcommons.utils import snowflake_pool
+from nhcommons.utils.snowflake_pool import QueryEngine, close_query_engine
 
 SNOWFLAKE_USER = 'super-secret-username'
 SNOWFLAKE_PASSWORD = 'a-password-that-cant-be-shared'
@@ -12,7 +15,8 @@ START_TIME = 1615705553000
 END_TIME = 1647241553000
 
 CONNECTION_PARAMS = {'user': SNOWFLAKE_USER, 'password': SNOWFLAKE_PASSWORD, 'account': "CZI-IMAGING",
-                     'warehouse': "IMAGING", 'database': "IMAGING", 'schema': "PYPI", }
+                     'warehouse': "IMAGING", 'database': "IMAGING", 'schema': "PYPI",
+                     'client_session_keep_alive': True, 'client_session_keep_alive_heartbeat_frequency': 900, }
 
 
 def to_ts(epoch):
@@ -38,14 +42,16 @@ def get_plugins_with_installs_in_window_query():
             """
 
 
-def get_plugins_install_count_since_timestamp_query(projection, subquery):
+def get_plugins_install_count_since_timestamp_query(projection, values, subquery):
     return f"""
+            WITH plugins (plugin_name, earliest_timestamp) AS (SELECT column1, TO_TIMESTAMP(column2) FROM VALUES {values})
             SELECT 
                 LOWER(file_project) AS name, 
                 {projection} AS ts, 
                 COUNT(*) AS count
             FROM
                 imaging.pypi.labeled_downloads
+                JOIN plugins ON LOWER(file_project) = plugins.plugin_name
             WHERE 
                 download_type = 'pip'
                 AND project_type = 'plugin'
@@ -89,6 +95,8 @@ class TestSnowflakeAdapter:
         monkeypatch.setenv('SNOWFLAKE_USER', SNOWFLAKE_USER)
         monkeypatch.setenv('SNOWFLAKE_PASSWORD', SNOWFLAKE_PASSWORD)
         monkeypatch.setattr(snowflake.connector, 'connect', self._get_mock_snowflake_connect)
+        yield
+        close_query_engine()
 
     def test_get_plugins_with_installs_in_window_no_result(self):
         self._expected_cursor_result = [MockSnowflakeCursor([], 2)]
@@ -128,10 +136,9 @@ class TestSnowflakeAdapter:
         actual = get_plugins_install_count_since_timestamp(PLUGINS_BY_EARLIEST_TS, InstallActivityType.DAY)
 
         assert expected == actual
-        subquery = "LOWER(file_project) = 'foo' AND timestamp >= TO_TIMESTAMP('2021-03-14 00:00:00') OR " \
-                   "LOWER(file_project) = 'bar' AND timestamp >= TO_TIMESTAMP('2022-07-05 00:00:00') OR " \
-                   "LOWER(file_project) = 'baz' AND timestamp >= TO_TIMESTAMP('2023-06-26 00:00:00')"
-        query = get_plugins_install_count_since_timestamp_query("DATE_TRUNC('DAY', timestamp)", subquery)
+        values = "('foo', '2021-03-14 00:00:00'), ('bar', '2022-07-05 00:00:00'), ('baz', '2023-06-26 00:00:00')"
+        subquery = "timestamp >= plugins.earliest_timestamp AND timestamp >= TO_TIMESTAMP('2021-03-14 00:00:00')"
+        query = get_plugins_install_count_since_timestamp_query("DATE_TRUNC('DAY', timestamp)", values, subquery)
         self._connection_mock.execute_string.assert_called_once_with(query)
 
     @pytest.mark.parametrize('expected_cursor_result,expected', [
@@ -152,10 +159,9 @@ class TestSnowflakeAdapter:
         actual = get_plugins_install_count_since_timestamp(PLUGINS_BY_EARLIEST_TS, InstallActivityType.MONTH)
 
         assert expected == actual
-        subquery = "LOWER(file_project) = 'foo' AND timestamp >= TO_TIMESTAMP('2021-03-01 00:00:00') OR " \
-                   "LOWER(file_project) = 'bar' AND timestamp >= TO_TIMESTAMP('2022-07-01 00:00:00') OR " \
-                   "LOWER(file_project) = 'baz' AND timestamp >= TO_TIMESTAMP('2023-06-01 00:00:00')"
-        query = get_plugins_install_count_since_timestamp_query("DATE_TRUNC('MONTH', timestamp)", subquery)
+        values = "('foo', '2021-03-01 00:00:00'), ('bar', '2022-07-01 00:00:00'), ('baz', '2023-06-01 00:00:00')"
+        subquery = "timestamp >= plugins.earliest_timestamp AND timestamp >= TO_TIMESTAMP('2021-03-01 00:00:00')"
+        query = get_plugins_install_count_since_timestamp_query("DATE_TRUNC('MONTH', timestamp)", values, subquery)
         self._connection_mock.execute_string.assert_called_once_with(query)
 
     @pytest.mark.parametrize('expected_cursor_result,expected', [
@@ -177,6 +183,94 @@ class TestSnowflakeAdapter:
         actual = get_plugins_install_count_since_timestamp(PLUGINS_BY_EARLIEST_TS, InstallActivityType.TOTAL)
 
         assert expected == actual
-        subquery = "LOWER(file_project) IN ('foo','bar','baz')"
-        query = get_plugins_install_count_since_timestamp_query("1", subquery)
+        values = "('foo', '2021-03-14 00:00:00'), ('bar', '2022-07-05 00:00:00'), ('baz', '2023-06-26 00:00:00')"
+        query = get_plugins_install_count_since_timestamp_query("1", values, "TRUE")
         self._connection_mock.execute_string.assert_called_once_with(query)
+
+    def test_get_plugins_install_count_since_timestamp_chunks_plugins(self, monkeypatch):
+        self._expected_cursor_result = [
+            MockSnowflakeCursor([['foo', to_ts(1629072000), 2], ['bar', to_ts(1666656000), 8]], 3),
+            MockSnowflakeCursor([['baz', to_ts(1662940800), 10]], 3)
+        ]
+        import utils.sql
+        monkeypatch.setattr(utils.sql, 'PLUGINS_PER_QUERY', 2)
+
+        from activity.snowflake_adapter import get_plugins_install_count_since_timestamp
+        actual = get_plugins_install_count_since_timestamp(PLUGINS_BY_EARLIEST_TS, InstallActivityType.TOTAL)
+
+        assert {
+            'foo': [{'timestamp': to_ts(1629072000), 'count': 2}],
+            'bar': [{'timestamp': to_ts(1666656000), 'count': 8}],
+            'baz': [{'timestamp': to_ts(1662940800), 'count': 10}]
+        } == actual
+        query = ';'.join([
+            get_plugins_install_count_since_timestamp_query(
+                "1", "('foo', '2021-03-14 00:00:00'), ('bar', '2022-07-05 00:00:00')", "TRUE"),
+            get_plugins_install_count_since_timestamp_query("1", "('baz', '2023-06-26 00:00:00')", "TRUE"),
+        ])
+        self._connection_mock.execute_string.assert_called_once_with(query)
+
+
+class SQLiteQueryEngine(QueryEngine):
+    """Local stand-in for snowflake, with a database per schema."""
+
+    def __init__(self):
+        self._connections = {}
+        self.queries = []
+
+    def execute(self, schema, query):
+        connection = self._connections.setdefault(schema, sqlite3.connect(":memory:"))
+        self.queries.append((schema, query))
+        return [connection.execute(query)]
+
+    def close(self):
+        for connection in self._connections.values():
+            connection.close()
+
+
+def test_query_engine_stand_in():
+    engine = SQLiteQueryEngine()
+    snowflake_pool.set_query_engine(engine)
+    try:
+        from activity.snowflake_adapter import _mapped_query_results, _cursor_to_timestamp_by_name_mapper
+
+        actual = _mapped_query_results(
+            "SELECT 'foo' AS name, 1 AS earliest_timestamp", "PYPI", {}, _cursor_to_timestamp_by_name_mapper
+        )
+    finally:
+        close_query_engine()
+
+    assert actual == {"foo": 1}
+    assert engine.queries == [("PYPI", "SELECT 'foo' AS name, 1 AS earliest_timestamp")]
+
+
+class ArrowCursor:
+    def __init__(self, tables):
+        self._tables = tables
+
+    def fetch_arrow_batches(self):
+        return iter(self._tables)
+
+    def __iter__(self):
+        raise AssertionError("rows fetched instead of arrow batches")
+
+
+def test_activity_mapper_from_arrow_batches():
+    pyarrow = pytest.importorskip("pyarrow")
+    from activity.snowflake_adapter import _cursor_to_plugin_activity_mapper
+
+    cursor = ArrowCursor(
+        [
+            pyarrow.table({"NAME": ["foo", "foo"], "TS": [1, 2], "COUNT": [3, 4]}),
+            pyarrow.table({"NAME": ["bar", "foo"], "TS": [1, 3], "COUNT": [5, 6]}),
+        ]
+    )
+
+    assert _cursor_to_plugin_activity_mapper({}, cursor) == {
+        "foo": [
+            {"timestamp": 1, "count": 3},
+            {"timestamp": 2, "count": 4},
+            {"timestamp": 3, "count": 6},
+        ],
+        "bar": [{"timestamp": 1, "count": 5}],
+    }
@@ -0,0 +1,55 @@
+"""
+Benchmark the batch writer of the activity workflows against DynamoDB Local.
+
+Usage, from the data-workflows directory:
+    LOCAL_DYNAMO_HOST=http://localhost:8000 python -m benchmarks.bench_dynamo_writer [ITEMS] [--plugins N]
+
+Items are written to a benchmark-activity table, created on the first run.
+Run it again with --skip-unchanged to measure writes of items that are already stored.
+"""
+import argparse
+import json
+import logging
+import os
+
+from pynamodb.attributes import NumberAttribute, UnicodeAttribute
+from pynamodb.models import Model
+
+from utils.dynamo_writer import DEFAULT_MAX_WORKERS, DynamoBatchWriter
+
+
+class BenchmarkActivity(Model):
+    class Meta:
+        host = os.getenv("LOCAL_DYNAMO_HOST", "http://localhost:8000")
+        region = os.getenv("AWS_REGION", "us-west-2")
+        table_name = "benchmark-activity"
+
+    plugin_name = UnicodeAttribute(hash_key=True)
+    type_timestamp = UnicodeAttribute(range_key=True)
+    install_count = NumberAttribute()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the batch writer.")
+    parser.add_argument("items", type=int, nargs="?", default=10000)
+    parser.add_argument("--plugins", type=int, default=500)
+    parser.add_argument("--max-workers", type=int, default=DEFAULT_MAX_WORKERS)
+    parser.add_argument("--skip-unchanged", action="store_true")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    if not BenchmarkActivity.exists():
+        BenchmarkActivity.create_table(
+            read_capacity_units=100, write_capacity_units=100, wait=True
+        )
+    items = (
+        BenchmarkActivity(f"plugin-{i % args.plugins}", f"DAY:{i}", install_count=i)
+        for i in range(args.items)
+    )
+    writer = DynamoBatchWriter(BenchmarkActivity, args.max_workers)
+    metrics = writer.write(items, skip_unchanged=args.skip_unchanged)
+    print(json.dumps(metrics, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
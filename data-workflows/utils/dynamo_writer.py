@@ -0,0 +1,312 @@
+import logging
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional, Type
+
+import boto3
+from botocore.exceptions import ClientError
+from pynamodb.models import Model
+
+from utils.time import get_perf_duration
+
+LOGGER = logging.getLogger()
+
+# Maximum number of items in a BatchWriteItem request
+BATCH_SIZE = 25
+# Maximum number of keys in a BatchGetItem request
+GET_BATCH_SIZE = 100
+# Attributes that change on every write, ignored when comparing against stored items
+IGNORED_ATTRIBUTES = ("last_updated_timestamp",)
+DEFAULT_MAX_WORKERS = 8
+MAX_ATTEMPTS = 10
+BASE_BACKOFF_SECONDS = 0.05
+MAX_BACKOFF_SECONDS = 5.0
+THROTTLING_ERROR_CODES = {
+    "ProvisionedThroughputExceededException",
+    "RequestLimitExceeded",
+    "ThrottlingException",
+}
+
+
+class AdaptiveRateLimiter:
+    """
+    Limits the rate of requests shared by the writer threads. Requests are
+    unlimited until the first throttling signal, the rate then starts at half
+    of the rate observed so far, is halved on every further throttling signal
+    and grows by increase requests per second on every successful request.
+    """
+
+    def __init__(self, min_rate: float = 1.0, increase: float = 1.0):
+        self._min_rate = min_rate
+        self._increase = increase
+        self._rate: Optional[float] = None
+        self._next_request = 0.0
+        self._start = time.monotonic()
+        self._requests = 0
+        self._lock = threading.Lock()
+
+    @property
+    def rate(self) -> Optional[float]:
+        return self._rate
+
+    def acquire(self) -> None:
+        with self._lock:
+            self._requests += 1
+            if self._rate is None:
+                return
+            now = time.monotonic()
+            delay = self._next_request - now
+            self._next_request = max(now, self._next_request) + 1 / self._rate
+        if delay > 0:
+            time.sleep(delay)
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            if self._rate is None:
+                elapsed = max(time.monotonic() - self._start, 1.0)
+                self._rate = self._requests / elapsed
+            self._rate = max(self._min_rate, self._rate / 2)
+            LOGGER.info(f"Throttled, reduced request rate={self._rate}/s")
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self._rate is not None:
+                self._rate += self._increase
+
+
+def get_backoff(attempt: int) -> float:
+    """Exponential backoff with full jitter for the given retry attempt."""
+    return random.uniform(0, min(MAX_BACKOFF_SECONDS, BASE_BACKOFF_SECONDS * 2 ** attempt))
+
+
+class DynamoBatchWriter:
+    """
+    Writes the items of a pynamodb model with BatchWriteItem requests from
+    several threads. Items are split across threads by partition key, so the
+    writes of a plugin stay on one thread while different plugins are written
+    in parallel. Unprocessed items are retried with jittered backoff, and the
+    request rate adapts to throttling.
+
+    With skip_unchanged, the stored items are read by key first and only
+    items that differ from them, ignoring IGNORED_ATTRIBUTES, are written, so
+    rewriting identical counts costs reads instead of writes.
+
+    Writes go to the host of the model's Meta, so the writer can be
+    benchmarked against DynamoDB Local with LOCAL_DYNAMO_HOST.
+    """
+
+    def __init__(
+        self,
+        model: Type[Model],
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        max_attempts: int = MAX_ATTEMPTS,
+        client=None,
+    ):
+        self._model = model
+        self._table_name = model.Meta.table_name
+        self._max_workers = max_workers
+        self._max_attempts = max_attempts
+        # the default session isn't thread-safe, so each writer creates its
+        # client from its own session, writers may be created from stage threads
+        self._client = client or boto3.session.Session().client(
+            "dynamodb",
+            region_name=getattr(model.Meta, "region", None),
+            endpoint_url=getattr(model.Meta, "host", None),
+        )
+        self._rate_limiter = AdaptiveRateLimiter()
+        self._lock = threading.Lock()
+        self._metrics: dict[str, Any] = {}
+
+    def _get_key_attributes(self, item: dict) -> dict:
+        keys = (self._model._hash_keyname, self._model._range_keyname)
+        return {key: item[key] for key in keys if key}
+
+    def _get_key(self, item: dict) -> tuple:
+        return tuple(str(value) for value in self._get_key_attributes(item).values())
+
+    def _shard(self, items: Iterable[Model]) -> list[list[dict]]:
+        """
+        Split serialized items into a shard per worker by partition key. Items
+        with the same key are written once, the last one wins, as a request
+        can't contain duplicate keys.
+        """
+        shards = [{} for _ in range(self._max_workers)]
+        for item in items:
+            serialized = item.serialize()
+            key = self._get_key(serialized)
+            shards[zlib.crc32(key[0].encode()) % self._max_workers][key] = serialized
+        return [list(shard.values()) for shard in shards if shard]
+
+    def _add_metrics(self, **metrics) -> None:
+        with self._lock:
+            for name, value in metrics.items():
+                self._metrics[name] = self._metrics.get(name, 0) + value
+
+    def _write_batch(self, items: list[dict]) -> None:
+        requests = [{"PutRequest": {"Item": item}} for item in items]
+        for attempt in range(self._max_attempts):
+            if attempt:
+                self._add_metrics(retries=1)
+                time.sleep(get_backoff(attempt))
+            self._rate_limiter.acquire()
+            try:
+                response = self._client.batch_write_item(
+                    RequestItems={self._table_name: requests},
+                    ReturnConsumedCapacity="TOTAL",
+                )
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in THROTTLING_ERROR_CODES:
+                    raise
+                self._add_metrics(requests=1, throttled=1)
+                self._rate_limiter.on_throttle()
+                continue
+
+            consumed = sum(
+                capacity.get("CapacityUnits", 0)
+                for capacity in response.get("ConsumedCapacity", [])
+            )
+            requests = response.get("UnprocessedItems", {}).get(self._table_name, [])
+            self._add_metrics(
+                requests=1,
+                consumed_wcu=consumed,
+                items=len(items) - len(requests),
+            )
+            if not requests:
+                self._rate_limiter.on_success()
+                return
+            items = [request["PutRequest"]["Item"] for request in requests]
+            self._add_metrics(throttled=1)
+            self._rate_limiter.on_throttle()
+
+        raise RuntimeError(
+            f"Unable to write {len(requests)} items to {self._table_name} "
+            f"after {self._max_attempts} attempts"
+        )
+
+    def _get_existing(self, items: list[dict]) -> dict[tuple, dict]:
+        """
+        :returns: the stored items with the keys of items, keyed on key
+        """
+        existing = {}
+        keys = [self._get_key_attributes(item) for item in items]
+        for attempt in range(self._max_attempts):
+            if attempt:
+                self._add_metrics(retries=1)
+                time.sleep(get_backoff(attempt))
+            self._rate_limiter.acquire()
+            try:
+                response = self._client.batch_get_item(
+                    RequestItems={self._table_name: {"Keys": keys}},
+                    ReturnConsumedCapacity="TOTAL",
+                )
+            except ClientError as e:
+                if e.response.get("Error", {}).get("Code") not in THROTTLING_ERROR_CODES:
+                    raise
+                self._add_metrics(throttled=1)
+                self._rate_limiter.on_throttle()
+                continue
+
+            for item in response.get("Responses", {}).get(self._table_name, []):
+                existing[self._get_key(item)] = item
+            self._add_metrics(
+                consumed_rcu=sum(
+                    capacity.get("CapacityUnits", 0)
+                    for capacity in response.get("ConsumedCapacity", [])
+                )
+            )
+            keys = response.get("UnprocessedKeys", {}).get(self._table_name, {}).get("Keys", [])
+            if not keys:
+                self._rate_limiter.on_success()
+                return existing
+            self._add_metrics(throttled=1)
+            self._rate_limiter.on_throttle()
+
+        raise RuntimeError(
+            f"Unable to read {len(keys)} items from {self._table_name} "
+            f"after {self._max_attempts} attempts"
+        )
+
+    @staticmethod
+    def _is_unchanged(item: dict, existing: Optional[dict]) -> bool:
+        if existing is None:
+            return False
+        return {
+            name: value for name, value in item.items() if name not in IGNORED_ATTRIBUTES
+        } == {
+            name: value for name, value in existing.items() if name not in IGNORED_ATTRIBUTES
+        }
+
+    def _get_changed(self, items: list[dict]) -> list[dict]:
+        changed = []
+        for i in range(0, len(items), GET_BATCH_SIZE):
+            batch = items[i:i + GET_BATCH_SIZE]
+            existing = self._get_existing(batch)
+            changed += [
+                item for item in batch
+                if not self._is_unchanged(item, existing.get(self._get_key(item)))
+            ]
+        self._add_metrics(skipped=len(items) - len(changed))
+        return changed
+
+    def _write_shard(self, items: list[dict], skip_unchanged: bool, dry_run: bool) -> None:
+        if skip_unchanged:
+            items = self._get_changed(items)
+        if dry_run:
+            self._add_metrics(would_write=len(items))
+            return
+        for i in range(0, len(items), BATCH_SIZE):
+            self._write_batch(items[i:i + BATCH_SIZE])
+
+    def write(
+        self, items: Iterable[Model], skip_unchanged: bool = False, dry_run: bool = False
+    ) -> dict[str, Any]:
+        """
+        Write items to the model's table.
+
+        :param Iterable[Model] items: items of the writer's model
+        :param bool skip_unchanged: only write items that differ from the stored items
+        :param bool dry_run: report the items that would be written without writing them
+        :returns: the number of items written, skipped as unchanged and that
+        would be written in a dry run, requests, throttled requests, retries,
+        consumed read and write capacity units, duration and items per second
+        :raises RuntimeError: if items are still unprocessed after max_attempts
+        """
+        start = time.perf_counter()
+        self._metrics = {
+            "items": 0, "skipped": 0, "would_write": 0, "requests": 0, "throttled": 0,
+            "retries": 0, "consumed_rcu": 0, "consumed_wcu": 0,
+        }
+        shards = self._shard(items)
+        with ThreadPoolExecutor(max_workers=max(len(shards), 1)) as executor:
+            futures = [
+                executor.submit(self._write_shard, shard, skip_unchanged, dry_run)
+                for shard in shards
+            ]
+            for future in futures:
+                future.result()
+
+        duration = get_perf_duration(start)
+        metrics = {
+            **self._metrics,
+            "duration_ms": duration,
+            "items_per_second": self._metrics["items"] / (duration / 1000) if duration else 0,
+        }
+        if dry_run:
+            LOGGER.info(
+                f"Dry run batch write table={self._table_name} "
+                f"write={metrics['would_write']} skip={metrics['skipped']} "
+                f"consumedRCU={metrics['consumed_rcu']} timeTaken={duration}ms"
+            )
+            return metrics
+        LOGGER.info(
+            f"Batch write table={self._table_name} items={metrics['items']} "
+            f"skipped={metrics['skipped']} requests={metrics['requests']} "
+            f"throttled={metrics['throttled']} retries={metrics['retries']} "
+            f"consumedRCU={metrics['consumed_rcu']} consumedWCU={metrics['consumed_wcu']} "
+            f"itemsPerSecond={metrics['items_per_second']} timeTaken={duration}ms"
+        )
+        return metrics
+
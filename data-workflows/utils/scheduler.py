@@ -0,0 +1,110 @@
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Callable, Optional
+
+from utils.time import get_perf_duration
+
+LOGGER = logging.getLogger()
+
+DEFAULT_MAX_CONCURRENT_STAGES = 6
+
+
+class StageScheduler:
+    """
+    Runs the stages of a workflow on a thread pool, each stage as soon as the
+    stage it depends on has completed, with at most max_workers stages running
+    at once. A stage depending on another is called with that stage's result.
+
+    Stages depending on a failed stage are skipped, every other stage still
+    runs, and the first failure is raised once all stages have finished.
+    """
+
+    def __init__(self, max_workers: int = DEFAULT_MAX_CONCURRENT_STAGES):
+        self._max_workers = max_workers
+        self._stages: dict[str, tuple[Callable, Optional[str]]] = {}
+        self._timings: dict[str, dict[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def add_stage(
+        self, name: str, func: Callable, depends_on: Optional[str] = None
+    ) -> None:
+        """
+        :param str name: unique name of the stage, used in the timing report
+        :param Callable func: called without arguments, or with the result of
+        the depends_on stage
+        :param str depends_on: name of a previously added stage to wait for
+        """
+        if name in self._stages:
+            raise ValueError(f"Stage {name} already added")
+        if depends_on is not None and depends_on not in self._stages:
+            raise ValueError(f"Stage {name} depends on unknown stage {depends_on}")
+        self._stages[name] = (func, depends_on)
+
+    def _run_stage(self, name: str, func: Callable, *args) -> Any:
+        start = time.perf_counter()
+        status = "failed"
+        try:
+            result = func(*args)
+            status = "completed"
+            return result
+        finally:
+            duration = get_perf_duration(start)
+            with self._lock:
+                self._timings[name] = {"status": status, "duration_ms": duration}
+            LOGGER.info(f"Stage name={name} status={status} timeTaken={duration}ms")
+
+    def _get_dependants(self, name: str) -> list[str]:
+        return [
+            stage for stage, (_, depends_on) in self._stages.items()
+            if depends_on == name
+        ]
+
+    def _skip(self, name: str) -> None:
+        for dependant in self._get_dependants(name):
+            with self._lock:
+                self._timings[dependant] = {"status": "skipped", "duration_ms": 0}
+            LOGGER.info(f"Stage name={dependant} status=skipped")
+            self._skip(dependant)
+
+    def run(self) -> dict[str, dict[str, Any]]:
+        """
+        Run all stages and log a timing breakdown.
+
+        :returns: status and duration of each stage keyed on stage name
+        :raises Exception: the first exception raised by a stage
+        """
+        start = time.perf_counter()
+        self._timings = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=self._max_workers) as executor:
+            running: dict[Future, str] = {}
+
+            def submit(stage: str, *args) -> None:
+                func, _ = self._stages[stage]
+                running[executor.submit(self._run_stage, stage, func, *args)] = stage
+
+            for stage, (_, depends_on) in self._stages.items():
+                if depends_on is None:
+                    submit(stage)
+
+            while running:
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    if future.exception() is not None:
+                        LOGGER.error(f"Stage name={stage} failed", exc_info=future.exception())
+                        error = error or future.exception()
+                        self._skip(stage)
+                        continue
+                    for dependant in self._get_dependants(stage):
+                        submit(dependant, future.result())
+
+        breakdown = " ".join(
+            f"{name}={timing['duration_ms']}ms" for name, timing in self._timings.items()
+        )
+        LOGGER.info(f"Stages completed {breakdown} timeTaken={get_perf_duration(start)}ms")
+        if error is not None:
+            raise error
+        return dict(self._timings)
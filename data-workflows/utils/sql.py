@@ -0,0 +1,43 @@
+from datetime import datetime
+from itertools import islice
+from typing import Iterator, Optional
+
+# Plugins staged per statement, keeps each statement well under the size limit
+PLUGINS_PER_QUERY = 1000
+TIMESTAMP_LITERAL_FORMAT = "'{0:%Y-%m-%d %H:%M:%S}'"
+
+
+def to_string_literal(value: str) -> str:
+    return "'" + value.replace("\\", "\\\\").replace("'", "''") + "'"
+
+
+def chunk_plugins(
+    plugins_by_timestamp: dict[str, datetime], size: Optional[int] = None
+) -> Iterator[dict[str, datetime]]:
+    """
+    Split plugins into chunks, so the statement for each chunk stays within the
+    statement size limit however many plugins were updated.
+    :param dict[str, datetime] plugins_by_timestamp: plugin name by timestamp
+    :param int size: maximum number of plugins per chunk, PLUGINS_PER_QUERY if not set
+    """
+    size = size or PLUGINS_PER_QUERY
+    items = iter(plugins_by_timestamp.items())
+    while chunk := dict(islice(items, size)):
+        yield chunk
+
+
+def generate_plugins_cte(plugins_by_timestamp: dict[str, datetime]) -> str:
+    """
+    Returns a common table expression named plugins, with a plugin_name and
+    earliest_timestamp row per plugin, to be joined on by the activity queries
+    rather than inlining a predicate per plugin.
+    :param dict[str, datetime] plugins_by_timestamp: plugin name by earliest timestamp
+    """
+    values = ", ".join(
+        f"({to_string_literal(name)}, {TIMESTAMP_LITERAL_FORMAT.format(ts)})"
+        for name, ts in plugins_by_timestamp.items()
+    )
+    return (
+        "plugins (plugin_name, earliest_timestamp) AS ("
+        f"SELECT column1, TO_TIMESTAMP(column2) FROM VALUES {values})"
+    )
@@ -0,0 +1,192 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+import pytest
+from botocore.exceptions import ClientError
+from moto import mock_dynamodb
+from pynamodb.attributes import NumberAttribute, UnicodeAttribute
+from pynamodb.models import Model
+
+import utils.dynamo_writer
+from utils.dynamo_writer import AdaptiveRateLimiter, DynamoBatchWriter
+
+TABLE_NAME = "test-activity"
+
+
+class Activity(Model):
+    class Meta:
+        region = "us-east-1"
+        table_name = TABLE_NAME
+
+    plugin_name = UnicodeAttribute(hash_key=True)
+    type_timestamp = UnicodeAttribute(range_key=True)
+    install_count = NumberAttribute()
+
+
+def generate_items(count, plugins=7):
+    return [Activity(f"plugin-{i % plugins}", f"DAY:{i}", install_count=i) for i in range(count)]
+
+
+class FakeClient:
+    def __init__(self, responses):
+        self._responses = responses
+        self.requests = []
+
+    def batch_write_item(self, RequestItems, ReturnConsumedCapacity):
+        self.requests.append(RequestItems[TABLE_NAME])
+        response = self._responses.pop(0) if self._responses else {}
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    def batch_get_item(self, RequestItems, ReturnConsumedCapacity):
+        response = self._responses.pop(0) if self._responses else {}
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(utils.dynamo_writer, "get_backoff", lambda attempt: 0)
+
+
+@mock_dynamodb
+def test_write_items(aws_credentials):
+    Activity.create_table(read_capacity_units=1, write_capacity_units=1, wait=True)
+
+    metrics = DynamoBatchWriter(Activity, max_workers=4).write(generate_items(120))
+
+    assert metrics["items"] == 120
+    assert metrics["requests"] >= 120 / 25
+    assert metrics["throttled"] == 0
+    assert metrics["items_per_second"] > 0
+    actual = {(item.plugin_name, item.type_timestamp, item.install_count) for item in Activity.scan()}
+    assert actual == {(f"plugin-{i % 7}", f"DAY:{i}", i) for i in range(120)}
+
+
+@mock_dynamodb
+def test_writers_created_concurrently(aws_credentials):
+    Activity.create_table(read_capacity_units=1, write_capacity_units=1, wait=True)
+
+    def write(i):
+        return DynamoBatchWriter(Activity, max_workers=2).write(
+            [Activity(f"plugin-{i}", "TOTAL:", install_count=i)]
+        )
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        metrics = list(executor.map(write, range(16)))
+
+    assert [metric["items"] for metric in metrics] == [1] * 16
+    assert {item.plugin_name for item in Activity.scan()} == {f"plugin-{i}" for i in range(16)}
+
+
+def test_write_keeps_last_item_per_key():
+    client = FakeClient([])
+
+    DynamoBatchWriter(Activity, max_workers=1, client=client).write(
+        [Activity("foo", "TOTAL:", install_count=1), Activity("foo", "TOTAL:", install_count=2)]
+    )
+
+    assert client.requests == [[{"PutRequest": {"Item": Activity("foo", "TOTAL:", install_count=2).serialize()}}]]
+
+
+def test_write_retries_unprocessed_items_and_sums_capacity():
+    items = generate_items(3, plugins=1)
+    unprocessed = [{"PutRequest": {"Item": items[2].serialize()}}]
+    client = FakeClient([
+        {"UnprocessedItems": {TABLE_NAME: unprocessed}, "ConsumedCapacity": [{"CapacityUnits": 2.0}]},
+        {"ConsumedCapacity": [{"CapacityUnits": 1.0}]},
+    ])
+
+    metrics = DynamoBatchWriter(Activity, max_workers=1, client=client).write(items)
+
+    assert client.requests[1] == unprocessed
+    assert metrics["items"] == 3
+    assert metrics["requests"] == 2
+    assert metrics["retries"] == 1
+    assert metrics["throttled"] == 1
+    assert metrics["consumed_wcu"] == 3.0
+
+
+def test_write_retries_throttling_errors():
+    error = ClientError({"Error": {"Code": "ProvisionedThroughputExceededException"}}, "BatchWriteItem")
+    client = FakeClient([error, {}])
+
+    metrics = DynamoBatchWriter(Activity, max_workers=1, client=client).write(generate_items(1))
+
+    assert metrics["items"] == 1
+    assert metrics["throttled"] == 1
+
+
+def test_write_raises_other_errors():
+    error = ClientError({"Error": {"Code": "ValidationException"}}, "BatchWriteItem")
+
+    with pytest.raises(ClientError):
+        DynamoBatchWriter(Activity, max_workers=1, client=FakeClient([error])).write(generate_items(1))
+
+
+def test_skip_unchanged_raises_access_denied():
+    error = ClientError({"Error": {"Code": "AccessDeniedException"}}, "BatchGetItem")
+    client = FakeClient([error])
+
+    with pytest.raises(ClientError):
+        DynamoBatchWriter(Activity, max_workers=1, client=client).write(generate_items(3), skip_unchanged=True)
+    assert client.requests == []
+
+
+def test_write_raises_when_items_stay_unprocessed():
+    items = generate_items(1)
+    unprocessed = {"UnprocessedItems": {TABLE_NAME: [{"PutRequest": {"Item": items[0].serialize()}}]}}
+    client = FakeClient([unprocessed] * 3)
+
+    with pytest.raises(RuntimeError):
+        DynamoBatchWriter(Activity, max_workers=1, max_attempts=3, client=client).write(items)
+
+
+def test_rate_limiter_adapts_to_throttling():
+    limiter = AdaptiveRateLimiter(min_rate=1.0, increase=1.0)
+    assert limiter.rate is None
+
+    limiter.on_throttle()
+    limiter.on_throttle()
+    assert limiter.rate == 1.0
+
+    limiter.on_success()
+    assert limiter.rate == 2.0
+
+
+@mock_dynamodb
+def test_write_skips_unchanged_items(aws_credentials):
+    Activity.create_table(read_capacity_units=1, write_capacity_units=1, wait=True)
+    DynamoBatchWriter(Activity).write(generate_items(150))
+    items = generate_items(160)
+    items[3].install_count = 42
+
+    metrics = DynamoBatchWriter(Activity, max_workers=4).write(items, skip_unchanged=True)
+
+    assert metrics["items"] == 11
+    assert metrics["skipped"] == 149
+    assert Activity.get("plugin-3", "DAY:3").install_count == 42
+    assert Activity.count() == 160
+
+
+@mock_dynamodb
+def test_write_dry_run(aws_credentials):
+    Activity.create_table(read_capacity_units=1, write_capacity_units=1, wait=True)
+    DynamoBatchWriter(Activity).write(generate_items(10))
+
+    metrics = DynamoBatchWriter(Activity).write(generate_items(30), skip_unchanged=True, dry_run=True)
+
+    assert metrics["would_write"] == 20
+    assert metrics["skipped"] == 10
+    assert metrics["items"] == 0
+    assert Activity.count() == 10
+
+
+def test_is_unchanged_ignores_last_updated_timestamp():
+    item = {"plugin_name": {"S": "foo"}, "install_count": {"N": "1"}, "last_updated_timestamp": {"N": "2"}}
+
+    assert DynamoBatchWriter._is_unchanged(item, {**item, "last_updated_timestamp": {"N": "1"}})
+    assert not DynamoBatchWriter._is_unchanged(item, {**item, "install_count": {"N": "2"}})
+    assert not DynamoBatchWriter._is_unchanged(item, None)
@@ -0,0 +1,69 @@
+import threading
+
+import pytest
+
+from utils.scheduler import StageScheduler
+
+
+def test_run_passes_dependency_results():
+    calls = []
+    scheduler = StageScheduler(max_workers=2)
+    scheduler.add_stage("window", lambda: {"foo": 1})
+    scheduler.add_stage("day", lambda data: calls.append(("day", data)), depends_on="window")
+    scheduler.add_stage("month", lambda data: calls.append(("month", data)), depends_on="window")
+
+    timings = scheduler.run()
+
+    assert sorted(calls) == [("day", {"foo": 1}), ("month", {"foo": 1})]
+    assert {name: timing["status"] for name, timing in timings.items()} == {
+        "window": "completed", "day": "completed", "month": "completed"
+    }
+
+
+def test_run_is_concurrent():
+    barrier = threading.Barrier(3, timeout=5)
+    scheduler = StageScheduler(max_workers=3)
+    for name in ("a", "b", "c"):
+        scheduler.add_stage(name, barrier.wait)
+
+    scheduler.run()
+
+
+def test_run_caps_concurrent_stages():
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def stage():
+        with lock:
+            running.append(1)
+            max_running.append(len(running))
+        threading.Event().wait(0.01)
+        with lock:
+            running.pop()
+
+    scheduler = StageScheduler(max_workers=2)
+    for i in range(6):
+        scheduler.add_stage(f"stage{i}", stage)
+    scheduler.run()
+
+    assert max(max_running) <= 2
+
+
+def test_run_skips_dependants_of_failed_stage_and_raises():
+    calls = []
+    scheduler = StageScheduler()
+    scheduler.add_stage("install", lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+    scheduler.add_stage("install.DAY", lambda _: calls.append("install.DAY"), depends_on="install")
+    scheduler.add_stage("github", lambda: {"foo": 1})
+    scheduler.add_stage("github.TOTAL", lambda _: calls.append("github.TOTAL"), depends_on="github")
+
+    with pytest.raises(RuntimeError, match="boom"):
+        scheduler.run()
+
+    assert calls == ["github.TOTAL"]
+
+
+def test_add_stage_with_unknown_dependency():
+    with pytest.raises(ValueError):
+        StageScheduler().add_stage("day", lambda _: None, depends_on="window")
@@ -0,0 +1,30 @@
+from datetime import datetime
+
+from utils.sql import chunk_plugins, generate_plugins_cte, to_string_literal
+
+
+def test_to_string_literal_escapes_quotes():
+    assert to_string_literal("it's") == "'it''s'"
+    assert to_string_literal("back\\slash") == "'back\\\\slash'"
+
+
+def test_chunk_plugins():
+    plugins = {f"plugin-{i}": datetime(2023, 1, i + 1) for i in range(5)}
+
+    chunks = list(chunk_plugins(plugins, 2))
+
+    assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+    assert {name: ts for chunk in chunks for name, ts in chunk.items()} == plugins
+
+
+def test_chunk_plugins_empty():
+    assert list(chunk_plugins({})) == []
+
+
+def test_generate_plugins_cte():
+    plugins = {"foo": datetime(2021, 3, 14), "bar": datetime(2022, 7, 5, 10, 30)}
+
+    assert generate_plugins_cte(plugins) == (
+        "plugins (plugin_name, earliest_timestamp) AS (SELECT column1, TO_TIMESTAMP(column2) FROM VALUES "
+        "('foo', '2021-03-14 00:00:00'), ('bar', '2022-07-05 10:30:00'))"
+    )
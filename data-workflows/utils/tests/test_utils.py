@@ -53,6 +53,37 @@ class TestParameterStore:
         actual = json.loads(response['Parameter']['Value']).get('last_activity_fetched_timestamp')
         assert actual == timestamp
 
+    @mock_ssm
+    def test_set_checkpoint_keeps_last_updated_timestamp(self, aws_credentials):
+        self._client = boto3.client("ssm")
+        self._client.put_parameter(Name=EXPECTED_PARAMETER_NAME, Value=PARAMETER_STORE_VALUE, Type='SecureString')
+        checkpoint = {'start_time': TIMESTAMP, 'end_time': TIMESTAMP + 1, 'completed': ['install.DAY']}
+
+        from utils.utils import ParameterStoreAdapter
+        parameter_store = ParameterStoreAdapter()
+        parameter_store.set_checkpoint(checkpoint)
+
+        assert parameter_store.get_checkpoint() == checkpoint
+        assert parameter_store.get_last_updated_timestamp() == TIMESTAMP
+
+        parameter_store.set_last_updated_timestamp(TIMESTAMP + 1)
+        assert parameter_store.get_checkpoint() is None
+
+
+class TestFileParameterStore:
+
+    def test_file_parameter_store(self, tmp_path):
+        from utils.utils import FileParameterStore
+        parameter_store = FileParameterStore(str(tmp_path / 'config.json'))
+        assert parameter_store.get_last_updated_timestamp() is None
+
+        parameter_store.set_last_updated_timestamp(TIMESTAMP)
+        parameter_store.set_checkpoint({'completed': []})
+
+        reopened = FileParameterStore(str(tmp_path / 'config.json'))
+        assert reopened.get_last_updated_timestamp() == TIMESTAMP
+        assert reopened.get_checkpoint() == {'completed': []}
+
 
 class TestUtils:
 
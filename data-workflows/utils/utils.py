@@ -1,7 +1,9 @@
 import boto3
 import json
+import os
 import time
 from datetime import date, datetime, timezone
+from typing import Optional
 
 from .env import get_required_env
 
@@ -11,6 +13,15 @@ def get_current_timestamp() -> int:
 
 
 LAST_UPDATED_TIMESTAMP_KEY = "last_activity_fetched_timestamp"
+CHECKPOINT_KEY = "activity_checkpoint"
+
+
+def is_dry_run() -> bool:
+    """
+    Activity runs with ACTIVITY_DRY_RUN=true report the items they would write
+    without writing them or advancing the last updated timestamp.
+    """
+    return os.getenv("ACTIVITY_DRY_RUN", "").lower() == "true"
 
 
 def date_to_utc_timestamp_in_millis(timestamp: date) -> int:
@@ -29,16 +40,52 @@ class ParameterStoreAdapter:
         )
         self._ssm_client = boto3.client("ssm")
 
-    def get_last_updated_timestamp(self) -> int:
+    def _get_config(self) -> dict:
         response = self._ssm_client.get_parameter(
             Name=self._parameter_name, WithDecryption=True
         )
-        return json.loads(response["Parameter"]["Value"]).get(
-            LAST_UPDATED_TIMESTAMP_KEY
-        )
+        return json.loads(response["Parameter"]["Value"])
 
-    def set_last_updated_timestamp(self, timestamp) -> None:
-        value = json.dumps({LAST_UPDATED_TIMESTAMP_KEY: timestamp})
+    def _put_config(self, config: dict) -> None:
         self._ssm_client.put_parameter(
-            Name=self._parameter_name, Value=value, Overwrite=True, Type="SecureString"
+            Name=self._parameter_name,
+            Value=json.dumps(config),
+            Overwrite=True,
+            Type="SecureString",
         )
+
+    def get_last_updated_timestamp(self) -> int:
+        return self._get_config().get(LAST_UPDATED_TIMESTAMP_KEY)
+
+    def set_last_updated_timestamp(self, timestamp) -> None:
+        """Advance the last updated timestamp, clearing the checkpoint of the run."""
+        self._put_config({LAST_UPDATED_TIMESTAMP_KEY: timestamp})
+
+    def get_checkpoint(self) -> Optional[dict]:
+        return self._get_config().get(CHECKPOINT_KEY)
+
+    def set_checkpoint(self, checkpoint: dict) -> None:
+        config = self._get_config()
+        config[CHECKPOINT_KEY] = checkpoint
+        self._put_config(config)
+
+
+class FileParameterStore(ParameterStoreAdapter):
+    """
+    Keeps the data-workflows config in a local JSON file instead of the
+    parameter store, for tests and local runs.
+    """
+
+    def __init__(self, path: str):
+        self._path = path
+
+    def _get_config(self) -> dict:
+        try:
+            with open(self._path) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _put_config(self, config: dict) -> None:
+        with open(self._path, "w") as f:
+            json.dump(config, f)
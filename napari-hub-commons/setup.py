@@ -11,4 +11,6 @@ setup(
     package_dir={"": "src"},
     packages=find_packages(where="src"),
     python_requires=">=3.8",
+    # the snowflake connector is pinned by the packages using the pool
+    extras_require={"snowflake": ["snowflake-connector-python[pandas]>=2.8"]},
 )
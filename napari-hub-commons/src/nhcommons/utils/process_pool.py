@@ -0,0 +1,118 @@
+import logging
+import multiprocessing
+import os
+import resource
+import signal
+import time
+from multiprocessing.connection import wait
+from typing import Any, Callable, Iterable, List, Optional, Tuple
+
+from nhcommons.utils.task_status import OK, ERROR, TIMED_OUT
+
+LOGGER = logging.getLogger()
+
+
+def _run_task(
+    func: Callable, task: Tuple, conn, memory_limit_mb: Optional[int]
+) -> None:
+    # lead a process group, so a timeout also kills the subprocesses of the task
+    os.setpgrp()
+    if memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    try:
+        conn.send((OK, func(*task)))
+    except BaseException as e:
+        conn.send((ERROR, str(e) or type(e).__name__))
+    finally:
+        conn.close()
+
+
+def kill_process_group(process) -> None:
+    """
+    Kill a child started by run_isolated along with the processes it spawned.
+    Falls back to killing the child alone if it hasn't made its process group yet.
+    """
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        process.kill()
+
+
+def run_isolated(
+    func: Callable[..., Any],
+    tasks: Iterable[Tuple],
+    max_workers: int,
+    timeout: float,
+    memory_limit_mb: Optional[int] = None,
+    label: str = "Task",
+) -> List[dict]:
+    """
+    Run func(*task) for every task in its own child process, with at most
+    max_workers running at once. Each child runs in its own process group,
+    which is killed once the child has run for longer than timeout seconds,
+    and its address space is capped at memory_limit_mb when set.
+
+    Lambda has no /dev/shm, so multiprocessing.Pool and Queue are unavailable;
+    results are returned over a one-way Pipe per child instead.
+
+    :param func: function run in the child, its return value must be picklable
+    :param tasks: argument tuples to run func with
+    :param max_workers: maximum number of concurrent child processes
+    :param timeout: wall-clock limit per task in seconds
+    :param memory_limit_mb: address space limit per task in megabytes
+    :param label: name of the tasks in logs and error messages
+    :return: list of dicts with task, status, body and duration_ms, in the
+    order the tasks finished
+    """
+    context = multiprocessing.get_context("fork")
+    pending = list(tasks)
+    running = {}
+    results = []
+
+    while pending or running:
+        while pending and len(running) < max_workers:
+            task = tuple(pending.pop(0))
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run_task, args=(func, task, sender, memory_limit_mb)
+            )
+            process.start()
+            sender.close()
+            running[receiver] = (task, process, time.perf_counter())
+
+        next_deadline = min(start for *_, start in running.values()) + timeout
+        ready = wait(list(running), max(next_deadline - time.perf_counter(), 0))
+
+        for conn in list(running):
+            task, process, start = running[conn]
+            if conn in ready:
+                try:
+                    status, body = conn.recv()
+                except EOFError:
+                    process.join()
+                    status = ERROR
+                    body = f"{label} process exited with code {process.exitcode}"
+            elif time.perf_counter() - start >= timeout:
+                kill_process_group(process)
+                status, body = TIMED_OUT, f"{label} timed out after {timeout}s"
+            else:
+                continue
+
+            process.join()
+            conn.close()
+            del running[conn]
+            duration = (time.perf_counter() - start) * 1000
+            LOGGER.info(
+                f"{label} for {task} status={status} time_taken={duration}ms"
+            )
+            results.append(
+                {
+                    "task": task,
+                    "status": status,
+                    "body": body,
+                    "duration_ms": duration,
+                }
+            )
+
+    return results
@@ -0,0 +1,238 @@
+import logging
+import os
+import threading
+import time
+from abc import ABC, abstractmethod
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import pandas
+import snowflake.connector
+from snowflake.connector.errors import NotSupportedError
+
+try:
+    import pyarrow  # noqa: F401 required by the connector to fetch arrow batches
+except ImportError:
+    pyarrow = None
+
+LOGGER = logging.getLogger()
+
+# Interval in seconds at which idle sessions are kept alive by the connector
+HEARTBEAT_FREQUENCY_SECONDS = 900
+# Idle connections kept open per schema
+MAX_IDLE_CONNECTIONS = 4
+# Rows per batch when results can't be fetched as arrow batches
+ROW_BATCH_SIZE = 10000
+
+
+class QueryEngine(ABC):
+    """
+    Executes queries against the activity warehouse. Snowflake in deployed
+    environments, a local stand-in such as DuckDB can implement the same
+    interface for tests.
+    """
+
+    @abstractmethod
+    def execute(self, schema: str, query: str) -> Iterable[Any]:
+        """
+        Execute the statements of a query.
+
+        :param schema: The schema the query runs in.
+        :param query: One or more SQL statements.
+        :return: A cursor per statement, each iterating over its rows.
+        """
+
+    @abstractmethod
+    def close(self) -> None:
+        """Release the resources held by the engine."""
+
+    def get_metrics(self) -> List[Dict]:
+        """
+        :return: The schema, duration and rows fetched of each query executed.
+        """
+        return []
+
+
+class SnowflakeConnectionPool(QueryEngine):
+    """
+    Reuses Snowflake sessions across queries, so a run pays for the
+    authentication handshake once per schema and concurrent query rather
+    than once per query. Idle sessions are kept alive by the connector's
+    heartbeat until the pool is closed.
+    """
+
+    def __init__(self, max_idle: int = MAX_IDLE_CONNECTIONS):
+        self._max_idle = max_idle
+        self._idle: Dict[str, List] = {}
+        self._lock = threading.Lock()
+        self._metrics: List[Dict] = []
+        self._connection_count = 0
+
+    def _connect(self, schema: str):
+        start = time.perf_counter()
+        connection = snowflake.connector.connect(
+            user=os.getenv("SNOWFLAKE_USER"),
+            password=os.getenv("SNOWFLAKE_PASSWORD"),
+            account="CZI-IMAGING",
+            warehouse="IMAGING",
+            database="IMAGING",
+            schema=schema,
+            client_session_keep_alive=True,
+            client_session_keep_alive_heartbeat_frequency=HEARTBEAT_FREQUENCY_SECONDS,
+        )
+        with self._lock:
+            self._connection_count += 1
+        duration = (time.perf_counter() - start) * 1000
+        LOGGER.info(f"Opened snowflake connection schema={schema} timeTaken={duration}ms")
+        return connection
+
+    def _acquire(self, schema: str):
+        with self._lock:
+            idle = self._idle.get(schema, [])
+            while idle:
+                connection = idle.pop()
+                if connection.is_closed() is not True:
+                    return connection
+        return self._connect(schema)
+
+    def _release(self, schema: str, connection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(schema, [])
+            if len(idle) < self._max_idle:
+                idle.append(connection)
+                return
+        connection.close()
+
+    def execute(self, schema: str, query: str) -> Iterable[Any]:
+        connection = self._acquire(schema)
+        start = time.perf_counter()
+        try:
+            cursors = connection.execute_string(query)
+        except Exception:
+            # the session may be unusable after a failure, don't return it to the pool
+            connection.close()
+            raise
+        duration = (time.perf_counter() - start) * 1000
+        self._release(schema, connection)
+
+        rows = sum(getattr(cursor, "rowcount", None) or 0 for cursor in cursors)
+        with self._lock:
+            self._metrics.append({"schema": schema, "duration_ms": duration, "rows": rows})
+        LOGGER.info(f"Query execution schema={schema} rows={rows} timeTaken={duration}ms")
+        return cursors
+
+    def get_metrics(self) -> List[Dict]:
+        with self._lock:
+            return list(self._metrics)
+
+    def close(self) -> None:
+        with self._lock:
+            connections = [connection for idle in self._idle.values() for connection in idle]
+            self._idle = {}
+            metrics = self._metrics
+            self._metrics = []
+            connection_count = self._connection_count
+            self._connection_count = 0
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception:
+                LOGGER.exception("Exception when closing snowflake connection")
+        LOGGER.info(
+            f"Closed snowflake connection pool connections={connection_count} "
+            f"queries={len(metrics)} rows={sum(metric['rows'] for metric in metrics)} "
+            f"timeTaken={sum(metric['duration_ms'] for metric in metrics)}ms"
+        )
+
+
+def _fetch_arrow_batches(cursor) -> Optional[Iterable[Any]]:
+    fetch_arrow_batches = getattr(cursor, "fetch_arrow_batches", None)
+    if pyarrow is None or fetch_arrow_batches is None:
+        return None
+    try:
+        return fetch_arrow_batches()
+    except NotSupportedError:
+        return None
+
+
+def iter_column_batches(cursor, batch_size: int = ROW_BATCH_SIZE) -> Iterator[List[List]]:
+    """
+    Iterate over the result of a query as batches of columns. Results are
+    fetched as arrow batches when the cursor supports it and pyarrow is
+    installed, which skips the connector's per row conversion, and are
+    batched from the rows otherwise, e.g. for local stand-ins.
+
+    :param cursor: The cursor of an executed query.
+    :param batch_size: The number of rows per batch when fetching rows.
+    :return: Batches with a list of values per column.
+    """
+    tables = _fetch_arrow_batches(cursor)
+    if tables is not None:
+        for table in tables:
+            if table.num_rows:
+                yield [column.to_pylist() for column in table.columns]
+        return
+
+    rows = iter(cursor)
+    while True:
+        batch = list(islice(rows, batch_size))
+        if not batch:
+            return
+        yield [list(column) for column in zip(*batch)]
+
+
+def fetch_dataframe(cursor, columns: List[str]) -> pandas.DataFrame:
+    """
+    Fetch the result of a query as a DataFrame, so it can be grouped and
+    converted column-wise instead of row by row. Arrow batches are
+    concatenated when the cursor supports them and pyarrow is installed, and
+    the rows are read otherwise, e.g. for local stand-ins.
+
+    :param cursor: The cursor of an executed query.
+    :param columns: Names for the columns of the result, in order.
+    :return: The result of the query.
+    """
+    tables = _fetch_arrow_batches(cursor)
+    if tables is not None:
+        tables = [table for table in tables if table.num_rows]
+        if not tables:
+            return pandas.DataFrame(columns=columns)
+        frame = pyarrow.concat_tables(tables).to_pandas()
+        frame.columns = columns
+        return frame
+    return pandas.DataFrame.from_records(list(cursor), columns=columns)
+
+
+_query_engine: Optional[QueryEngine] = None
+_query_engine_lock = threading.Lock()
+
+
+def get_query_engine() -> QueryEngine:
+    """
+    :return: The query engine shared by the queries of a run, a Snowflake connection pool unless set otherwise.
+    """
+    global _query_engine
+    with _query_engine_lock:
+        if _query_engine is None:
+            _query_engine = SnowflakeConnectionPool()
+        return _query_engine
+
+
+def set_query_engine(query_engine: Optional[QueryEngine]) -> None:
+    """
+    Replace the shared query engine, e.g. with a local stand-in for tests.
+
+    :param query_engine: The engine to use, None to use a new Snowflake connection pool.
+    """
+    global _query_engine
+    with _query_engine_lock:
+        _query_engine = query_engine
+
+
+def close_query_engine() -> None:
+    """Close the shared query engine at the end of a run."""
+    global _query_engine
+    with _query_engine_lock:
+        query_engine, _query_engine = _query_engine, None
+    if query_engine is not None:
+        query_engine.close()
@@ -0,0 +1,4 @@
+# Statuses of tasks run in isolated processes, shared by manifest discovery and plugin previews
+OK = "ok"
+ERROR = "error"
+TIMED_OUT = "timed-out"
@@ -0,0 +1,62 @@
+import os
+import subprocess
+import time
+
+from nhcommons.utils.process_pool import run_isolated
+from nhcommons.utils.task_status import ERROR, OK, TIMED_OUT
+
+
+def _spawn_and_hang(pid_file):
+    child = subprocess.Popen(["sleep", "60"])
+    with open(pid_file, "w") as f:
+        f.write(str(child.pid))
+    time.sleep(60)
+
+
+def _fail(name):
+    raise ValueError(f"no {name}")
+
+
+def _is_running(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # a killed grandchild may linger as a zombie until it is reaped by init
+    with open(f"/proc/{pid}/stat") as f:
+        return f.read().split(")")[-1].split()[0] != "Z"
+
+
+def test_run_isolated_kills_subprocesses_on_timeout(tmp_path):
+    pid_file = str(tmp_path / "pid")
+
+    results = run_isolated(_spawn_and_hang, [(pid_file,)], max_workers=1, timeout=1)
+
+    assert results[0]["status"] == TIMED_OUT
+    assert results[0]["body"] == "Task timed out after 1s"
+    grandchild = int(open(pid_file).read())
+    deadline = time.time() + 5
+    while _is_running(grandchild) and time.time() < deadline:
+        time.sleep(0.05)
+    assert not _is_running(grandchild)
+
+
+def test_run_isolated_returns_results():
+    results = run_isolated(
+        lambda plugin, version: f"{plugin}:{version}",
+        [("foo", "0.1.0")],
+        max_workers=1,
+        timeout=10,
+    )
+
+    assert [(result["task"], result["status"], result["body"]) for result in results] == [
+        (("foo", "0.1.0"), OK, "foo:0.1.0")
+    ]
+
+
+def test_run_isolated_reports_errors():
+    results = run_isolated(_fail, [("bar",)], max_workers=1, timeout=10)
+
+    assert [(result["status"], result["body"]) for result in results] == [
+        (ERROR, "no bar")
+    ]
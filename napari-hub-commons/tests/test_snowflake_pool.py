@@ -0,0 +1,136 @@
+from unittest.mock import Mock
+
+import pytest
+import snowflake.connector
+
+from nhcommons.utils import snowflake_pool
+from nhcommons.utils.snowflake_pool import SnowflakeConnectionPool
+
+
+class TestSnowflakeConnectionPool:
+    @pytest.fixture(autouse=True)
+    def _setup_method(self, monkeypatch):
+        self._connections = []
+        monkeypatch.setattr(snowflake.connector, "connect", self._connect)
+
+    def _connect(self, **kwargs):
+        connection = Mock()
+        connection.schema = kwargs["schema"]
+        connection.is_closed.return_value = False
+        connection.execute_string.return_value = [Mock(rowcount=2), Mock(rowcount=3)]
+        self._connections.append(connection)
+        return connection
+
+    def test_sessions_reused_per_schema(self):
+        pool = SnowflakeConnectionPool()
+        pool.execute("PYPI", "SELECT 1")
+        pool.execute("PYPI", "SELECT 2")
+        pool.execute("GITHUB", "SELECT 3")
+
+        assert [connection.schema for connection in self._connections] == ["PYPI", "GITHUB"]
+        assert self._connections[0].execute_string.call_count == 2
+        assert [(metric["schema"], metric["rows"]) for metric in pool.get_metrics()] == [
+            ("PYPI", 5),
+            ("PYPI", 5),
+            ("GITHUB", 5),
+        ]
+
+        pool.close()
+        for connection in self._connections:
+            connection.close.assert_called_once()
+        assert pool.get_metrics() == []
+
+    def test_closed_session_replaced(self):
+        pool = SnowflakeConnectionPool()
+        pool.execute("PYPI", "SELECT 1")
+        self._connections[0].is_closed.return_value = True
+        pool.execute("PYPI", "SELECT 2")
+
+        assert len(self._connections) == 2
+        self._connections[1].execute_string.assert_called_once_with("SELECT 2")
+
+    def test_failed_session_not_reused(self):
+        pool = SnowflakeConnectionPool()
+        pool.execute("PYPI", "SELECT 1")
+        self._connections[0].execute_string.side_effect = ValueError("failed")
+
+        with pytest.raises(ValueError):
+            pool.execute("PYPI", "SELECT 2")
+        pool.execute("PYPI", "SELECT 3")
+
+        self._connections[0].close.assert_called_once()
+        self._connections[1].execute_string.assert_called_once_with("SELECT 3")
+
+
+class ArrowCursor:
+    def __init__(self, tables):
+        self._tables = tables
+
+    def fetch_arrow_batches(self):
+        return iter(self._tables)
+
+    def __iter__(self):
+        raise AssertionError("rows fetched instead of arrow batches")
+
+
+def test_iter_column_batches_from_arrow():
+    pyarrow = pytest.importorskip("pyarrow")
+    tables = [
+        pyarrow.table({"NAME": ["foo", "bar"], "COUNT": [1, 2]}),
+        pyarrow.table(
+            {
+                "NAME": pyarrow.array([], pyarrow.string()),
+                "COUNT": pyarrow.array([], pyarrow.int64()),
+            }
+        ),
+        pyarrow.table({"NAME": ["baz"], "COUNT": [3]}),
+    ]
+
+    batches = list(snowflake_pool.iter_column_batches(ArrowCursor(tables)))
+
+    assert batches == [[["foo", "bar"], [1, 2]], [["baz"], [3]]]
+
+
+def test_iter_column_batches_from_rows():
+    rows = [("foo", 1), ("bar", 2), ("baz", 3)]
+    assert list(snowflake_pool.iter_column_batches(iter(rows), batch_size=2)) == [
+        [["foo", "bar"], [1, 2]],
+        [["baz"], [3]],
+    ]
+    assert list(snowflake_pool.iter_column_batches(iter([]))) == []
+
+
+def test_fetch_dataframe_from_arrow():
+    pyarrow = pytest.importorskip("pyarrow")
+    tables = [
+        pyarrow.table({"NAME": ["foo", "bar"], "COUNT": [1, 2]}),
+        pyarrow.table({"NAME": ["baz"], "COUNT": [3]}),
+    ]
+
+    frame = snowflake_pool.fetch_dataframe(ArrowCursor(tables), ["name", "count"])
+
+    assert frame.to_dict("records") == [
+        {"name": "foo", "count": 1},
+        {"name": "bar", "count": 2},
+        {"name": "baz", "count": 3},
+    ]
+    assert snowflake_pool.fetch_dataframe(ArrowCursor([]), ["name", "count"]).empty
+
+
+def test_fetch_dataframe_from_rows():
+    frame = snowflake_pool.fetch_dataframe(iter([("foo", 1), ("bar", 2)]), ["name", "count"])
+
+    assert frame.to_dict("records") == [{"name": "foo", "count": 1}, {"name": "bar", "count": 2}]
+    assert list(snowflake_pool.fetch_dataframe(iter([]), ["name", "count"]).columns) == ["name", "count"]
+
+
+def test_shared_query_engine():
+    engine = Mock()
+    snowflake_pool.set_query_engine(engine)
+    assert snowflake_pool.get_query_engine() is engine
+
+    snowflake_pool.close_query_engine()
+
+    engine.close.assert_called_once()
+    assert isinstance(snowflake_pool.get_query_engine(), SnowflakeConnectionPool)
+    snowflake_pool.set_query_engine(None)
@@ -30,6 +30,10 @@ class TestPluginManifest:
     def _get_data_from_s3(self, key):
         return self._bucket.Object(key).get()['Body'].read().decode('utf-8')
 
+    def _get_manifest_status(self, name, version):
+        key = {'name': name, 'version_type': f'{version}:DISTRIBUTION'}
+        return self._table.get_item(Key=key)['Item'].get('manifest_status')
+
     def _dynamo_put_item(self, name=TEST_PLUGIN, version=TEST_VERSION, data=None):
         item = create_plugin_item(name, version, data, True)
         self._table.put_item(Item=item)
@@ -46,7 +50,7 @@ class TestPluginManifest:
 
         fetch_manifest_mock = Mock()
         import get_plugin_manifest
-        monkeypatch.setattr(get_plugin_manifest, 'fetch_manifest', fetch_manifest_mock)
+        monkeypatch.setattr(get_plugin_manifest, 'fetch_manifest_cached', fetch_manifest_mock)
 
         from get_plugin_manifest import generate_manifest
         generate_manifest(TEST_INPUT, None)
@@ -67,7 +71,7 @@ class TestPluginManifest:
 
         start_time = round(time.time() * 1000)
         import get_plugin_manifest
-        monkeypatch.setattr(get_plugin_manifest, 'fetch_manifest', fetch_manifest_mock)
+        monkeypatch.setattr(get_plugin_manifest, 'fetch_manifest_cached', fetch_manifest_mock)
         get_plugin_manifest.generate_manifest(TEST_INPUT, None)
 
         fetch_manifest_mock.assert_not_called()
@@ -78,6 +82,7 @@ class TestPluginManifest:
     def test_s3_fetching_error(self, env_variables, aws_credentials, monkeypatch):
         """Ensure s3 errors outside of missing manifest are reraised."""
         self._bucket = setup_s3(monkeypatch, 'another_bucket')
+        self._table = setup_dynamo()
 
         with pytest.raises(ClientError):
             from get_plugin_manifest import generate_manifest
@@ -96,6 +101,7 @@ class TestPluginManifest:
         actual = self._get_data_from_s3(f'{TEST_BUCKET_PATH}/{TEST_CACHE_PATH}')
         assert json.dumps(expected_data) == actual
         verify_plugin_item(self._table, TEST_PLUGIN, TEST_VERSION, expected_data, start_time=start_time)
+        assert 'error' == self._get_manifest_status(TEST_PLUGIN, TEST_VERSION)
 
     def test_discovery_success(self, env_variables, aws_credentials, monkeypatch):
         """Test that valid manifest is correctly written to file."""
@@ -110,6 +116,25 @@ class TestPluginManifest:
         assert s3_data['name'] == 'napari-demo'
         assert len(s3_data['contributions']['widgets']) == 1
         verify_plugin_item(self._table, VALID_PLUGIN, VALID_VERSION, s3_data, start_time=start_time)
+        assert 'ok' == self._get_manifest_status(VALID_PLUGIN, VALID_VERSION)
+
+    def test_discovery_skipped_for_status(self, env_variables, aws_credentials, monkeypatch):
+        """Ensure a plugin version with a status in dynamo is not looked up in s3 or rediscovered."""
+        self._bucket = setup_s3(monkeypatch)
+        self._table = setup_dynamo()
+        item = create_plugin_item(TEST_PLUGIN, TEST_VERSION, {}, True)
+        self._table.put_item(Item={**item, 'manifest_status': 'timed-out'})
+
+        import get_plugin_manifest
+        fetch_manifest_mock = Mock()
+        monkeypatch.setattr(get_plugin_manifest, 'fetch_manifest_cached', fetch_manifest_mock)
+        object_exists_mock = Mock()
+        monkeypatch.setattr(get_plugin_manifest.S3Adapter, 'object_exists', object_exists_mock)
+        get_plugin_manifest.generate_manifest(TEST_INPUT, None)
+
+        fetch_manifest_mock.assert_not_called()
+        object_exists_mock.assert_not_called()
+        assert 'timed-out' == self._get_manifest_status(TEST_PLUGIN, TEST_VERSION)
 
     def test_bucket_name_not_set(self):
         with pytest.raises(RuntimeError, match='Bucket name not specified.'):
@@ -130,3 +155,107 @@ class TestPluginManifest:
         assert len(object_versions) == 2  # Verify the object was overriden once
         actual_data = next(obj for obj in object_versions if not obj.is_latest).get()['Body'].read().decode('utf-8')
         assert '{}' == actual_data  # Verify non latest version has the default value
+
+
+def _fake_fetch_manifest(plugin, version, cache):
+    if plugin == 'hanging-plugin':
+        time.sleep(60)
+    if plugin == 'broken-plugin':
+        raise ValueError('Could not find manifest')
+    manifest = Mock()
+    manifest.json.return_value = json.dumps({'name': plugin})
+    return manifest
+
+
+@mock_s3
+@mock_dynamodb
+class TestBatchPluginManifest:
+
+    def _get_data_from_s3(self, plugin, version):
+        key = f'{TEST_BUCKET_PATH}/cache/{plugin}/{version}-manifest.json'
+        return json.loads(self._bucket.Object(key).get()['Body'].read().decode('utf-8'))
+
+    def _generate_manifests(self, monkeypatch, plugins, **kwargs):
+        import get_plugin_manifest
+        monkeypatch.setattr(get_plugin_manifest, 'fetch_manifest_cached', _fake_fetch_manifest)
+        event = {'plugins': [{'plugin': plugin, 'version': TEST_VERSION} for plugin in plugins], **kwargs}
+        return get_plugin_manifest.generate_manifests(event, None)
+
+    def test_batch_discovery(self, env_variables, aws_credentials, monkeypatch):
+        self._bucket = setup_s3(monkeypatch)
+        self._table = setup_dynamo()
+
+        start_time = round(time.time() * 1000)
+        response = self._generate_manifests(
+            monkeypatch, ['napari-foo', 'broken-plugin', 'hanging-plugin'], timeout=2, max_workers=3
+        )
+
+        statuses = {result['plugin']: result['status'] for result in response['results']}
+        assert statuses == {'napari-foo': 'ok', 'broken-plugin': 'error', 'hanging-plugin': 'timed-out'}
+        assert response['summary'] == {'ok': 1, 'error': 1, 'timed-out': 1, 'skipped': 0}
+        assert all(result['duration_ms'] < 10000 for result in response['results'])
+
+        expected = {
+            'napari-foo': {'name': 'napari-foo'},
+            'broken-plugin': {'error': 'Could not find manifest'},
+            'hanging-plugin': {'error': 'Discovery timed out after 2s'},
+        }
+        for plugin, data in expected.items():
+            assert data == self._get_data_from_s3(plugin, TEST_VERSION)
+            verify_plugin_item(self._table, plugin, TEST_VERSION, data, start_time=start_time)
+            item = self._table.get_item(Key={'name': plugin, 'version_type': f'{TEST_VERSION}:DISTRIBUTION'})
+            assert statuses[plugin] == item['Item']['manifest_status']
+
+    def test_batch_discovery_skips_existing(self, env_variables, aws_credentials, monkeypatch):
+        self._bucket = setup_s3(monkeypatch)
+        self._table = setup_dynamo()
+        data = {'foo': 'bar'}
+        put_s3_object(self._bucket, data, f'{TEST_BUCKET_PATH}/cache/napari-foo/{TEST_VERSION}-manifest.json')
+
+        response = self._generate_manifests(monkeypatch, ['napari-foo', 'napari-bar'])
+
+        assert [result['plugin'] for result in response['results']] == ['napari-bar']
+        assert response['summary']['skipped'] == 1
+        assert data == self._get_data_from_s3('napari-foo', TEST_VERSION)
+
+    def test_batch_discovery_force(self, env_variables, aws_credentials, monkeypatch):
+        self._bucket = setup_s3(monkeypatch)
+        self._table = setup_dynamo()
+        put_s3_object(self._bucket, {'foo': 'bar'}, f'{TEST_BUCKET_PATH}/cache/napari-foo/{TEST_VERSION}-manifest.json')
+
+        response = self._generate_manifests(monkeypatch, ['napari-foo'], force=True)
+
+        assert response['summary'] == {'ok': 1, 'error': 0, 'timed-out': 0, 'skipped': 0}
+        assert {'name': 'napari-foo'} == self._get_data_from_s3('napari-foo', TEST_VERSION)
+
+    def test_batch_discovery_records_failed_s3_writes(self, env_variables, aws_credentials, monkeypatch):
+        self._bucket = setup_s3(monkeypatch)
+        self._table = setup_dynamo()
+        import get_plugin_manifest
+        write_to_s3 = get_plugin_manifest.S3Adapter.write_to_s3
+
+        def failing_write_to_s3(s3, data, path):
+            return False if 'napari-bar' in path else write_to_s3(s3, data, path)
+
+        monkeypatch.setattr(get_plugin_manifest.S3Adapter, 'write_to_s3', failing_write_to_s3)
+
+        self._generate_manifests(monkeypatch, ['napari-foo', 'napari-bar'])
+
+        item = self._table.get_item(Key={'name': 'napari-bar', 'version_type': f'{TEST_VERSION}:DISTRIBUTION'})
+        assert item['Item']['manifest_status'] == 'error'
+        item = self._table.get_item(Key={'name': 'napari-foo', 'version_type': f'{TEST_VERSION}:DISTRIBUTION'})
+        assert item['Item']['manifest_status'] == 'ok'
+
+    def test_batch_discovery_invalidates_manifest_metadata(self, env_variables, aws_credentials, monkeypatch):
+        self._bucket = setup_s3(monkeypatch)
+        self._table = setup_dynamo()
+        metadata_key = f'{TEST_BUCKET_PATH}/cache/napari-foo/{TEST_VERSION}-manifest-metadata-v1.json'
+        other_key = f'{TEST_BUCKET_PATH}/cache/napari-bar/{TEST_VERSION}-manifest-metadata-v1.json'
+        put_s3_object(self._bucket, {'display_name': 'stale'}, metadata_key)
+        put_s3_object(self._bucket, {'display_name': 'bar'}, other_key)
+
+        self._generate_manifests(monkeypatch, ['napari-foo'], force=True)
+
+        keys = [obj.key for obj in self._bucket.objects.filter(Prefix=TEST_BUCKET_PATH)]
+        assert metadata_key not in keys
+        assert other_key in keys
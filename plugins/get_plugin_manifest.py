@@ -1,49 +1,195 @@
 import json
 import logging
-from npe2 import fetch_manifest
+import os
+from concurrent import futures
+from typing import Optional
+
+from nhcommons.utils.process_pool import run_isolated
+
+from utils.artifact_cache import ArtifactCache
+from utils.manifest import fetch_manifest_cached
 from utils.s3_adapter import S3Adapter
+from utils.manifest_status import PENDING, OK, ERROR, TIMED_OUT
 from models.pluginmetadata import PluginMetadata
 
 
 LOGGER = logging.getLogger()
 
+DEFAULT_TIMEOUT_SECONDS = 300
+DEFAULT_MAX_WORKERS = os.cpu_count() or 1
+S3_WRITE_WORKERS = 16
+
+_artifact_cache = None
+
 
 def _setup_logging():
     logger = logging.getLogger()
     logger.setLevel(logging.INFO)
 
 
+def _get_manifest_key(plugin, version):
+    return f'cache/{plugin}/{version}-manifest.json'
+
+
+def _get_manifest_metadata_prefix(plugin, version):
+    # Fields the backend parses from the manifest, cached per metadata version
+    return f'cache/{plugin}/{version}-manifest-metadata'
+
+
+def _write_manifest(s3: S3Adapter, s3_body: str, plugin: str, version: str) -> bool:
+    """
+    Write the manifest to s3 and drop the metadata the backend parsed from
+    the previous manifest, so it is parsed again from the new one.
+    """
+    if not s3.write_to_s3(s3_body, _get_manifest_key(plugin, version)):
+        return False
+    s3.delete_prefix(_get_manifest_metadata_prefix(plugin, version))
+    return True
+
+
+def _get_artifact_cache():
+    global _artifact_cache
+    if _artifact_cache is None:
+        share_through_s3 = os.getenv('ARTIFACT_CACHE_S3', 'false').lower() == 'true'
+        _artifact_cache = ArtifactCache(s3=S3Adapter() if share_through_s3 else None)
+    return _artifact_cache
+
+
+def _fetch_manifest_json(plugin, version):
+    return fetch_manifest_cached(plugin, version, _get_artifact_cache()).json()
+
+
+def _manifest_exists(s3: S3Adapter, plugin: str, version: str, status: Optional[str]) -> bool:
+    """
+    Check whether discovery already ran for a plugin version, using the status
+    on its plugin-metadata record. Manifests written before statuses were
+    recorded may only exist in s3, in which case the record is backfilled.
+    """
+    if status:
+        LOGGER.info(f'Manifest status for {plugin}:{version} is {status}')
+        return True
+    key = _get_manifest_key(plugin, version)
+    if s3.object_exists(key):
+        PluginMetadata.verify_exists_in_dynamo(plugin, version, key)
+        return True
+    return False
+
+
 def generate_manifest(event, context):
     """
-    When manifest does not already exist, discover using `npe2_fetch` and write
-    valid manifest or resulting error message back to manifest file.
+    When manifest does not already exist, discover it from the plugin's
+    distribution file, resolved through the artifact cache, and write valid
+    manifest or resulting error message back to manifest file.
     """
     _setup_logging()
     s3 = S3Adapter()
 
     plugin = event['plugin']
     version = event['version']
-    key = f'cache/{plugin}/{version}-manifest.json'
+    key = _get_manifest_key(plugin, version)
     LOGGER.info(f'Processing {key}')
     # if the manifest for this plugin already exists there's nothing do to
-    existing_manifest_summary = s3.get_object_list_in_bucket(key)
-    LOGGER.info(f'Matching manifests in bucket {existing_manifest_summary}')
-    if existing_manifest_summary:
-        PluginMetadata.verify_exists_in_dynamo(plugin, version, key)
+    if _manifest_exists(s3, plugin, version, PluginMetadata.get_manifest_status(plugin, version)):
         LOGGER.info("Manifest exists... returning.")
         return
 
     # write file to s3 to ensure we never retry this plugin version
     s3_body = json.dumps({})
     s3.write_to_s3(s3_body, key)
-    PluginMetadata.write_manifest_data(plugin, version, s3_body)
+    PluginMetadata.write_manifest_data(plugin, version, s3_body, PENDING)
     try:
         LOGGER.info(f'Discovering manifest for {plugin}:{version}')
-        manifest = fetch_manifest(plugin, version)
-        s3_body = manifest.json()
+        s3_body = _fetch_manifest_json(plugin, version)
     except Exception as e:
         LOGGER.exception(f"Failed discovery for {plugin}:{version}...")
         s3_body = json.dumps({'error': str(e)})
 
-    s3.write_to_s3(s3_body, key)
+    _write_manifest(s3, s3_body, plugin, version)
     PluginMetadata.write_manifest_data(plugin, version, s3_body)
+
+
+def _write_manifests(s3: S3Adapter, manifests: dict, statuses: dict = None):
+    """
+    Write manifests to s3 and record them in dynamo. A manifest that could not
+    be written to s3 is recorded as an error, so its record doesn't claim a
+    manifest that isn't there.
+    """
+    statuses = dict(statuses or {})
+    manifests = dict(manifests)
+    with futures.ThreadPoolExecutor(max_workers=S3_WRITE_WORKERS) as executor:
+        writes = {executor.submit(_write_manifest, s3, s3_body, plugin, version): (plugin, version)
+                  for (plugin, version), s3_body in manifests.items()}
+        for write in futures.as_completed(writes):
+            plugin, version = writes[write]
+            try:
+                error = None if write.result() else 'Failed writing manifest to s3'
+            except Exception as e:
+                error = f'Failed writing manifest to s3: {e}'
+            if error:
+                LOGGER.error(f'{error} for {plugin}:{version}')
+                manifests[(plugin, version)] = json.dumps({'error': error})
+                statuses[(plugin, version)] = ERROR
+    PluginMetadata.write_manifest_data_batch(manifests, statuses)
+
+
+def generate_manifests(event, context):
+    """
+    Batch variant of `generate_manifest` for many plugin versions at once.
+
+    Each discovery runs in its own process, bounded by `timeout` seconds and
+    `memory_limit_mb`, so a hung or runaway plugin cannot stall the batch.
+    Existing manifests are skipped unless `force` is set, which allows
+    re-discovering every manifest after an npe2 upgrade.
+
+    Expected event:
+        {
+            "plugins": [{"plugin": "napari-demo", "version": "0.1.0"}, ...],
+            "force": false,
+            "timeout": 300,
+            "max_workers": 4,
+            "memory_limit_mb": 2048
+        }
+
+    :return: per plugin status and duration, and a count for each status
+    """
+    _setup_logging()
+    s3 = S3Adapter()
+    force = event.get('force', False)
+
+    plugins = [(item['plugin'], item['version']) for item in event['plugins']]
+    statuses = {} if force else PluginMetadata.get_manifest_statuses(plugins)
+    targets = [(plugin, version) for plugin, version in plugins
+               if force or not _manifest_exists(s3, plugin, version, statuses.get((plugin, version)))]
+    LOGGER.info(f'Discovering {len(targets)} of {len(event["plugins"])} manifests')
+
+    # write files to s3 to ensure we never retry these plugin versions
+    _write_manifests(s3, {target: json.dumps({}) for target in targets})
+
+    results = run_isolated(_fetch_manifest_json,
+                           targets,
+                           max_workers=event.get('max_workers', DEFAULT_MAX_WORKERS),
+                           timeout=event.get('timeout', DEFAULT_TIMEOUT_SECONDS),
+                           memory_limit_mb=event.get('memory_limit_mb'),
+                           label='Discovery')
+
+    manifests = {}
+    statuses = {}
+    for result in results:
+        plugin, version = result['task']
+        if result['status'] == OK:
+            s3_body = result['body']
+        else:
+            LOGGER.error(f"Failed discovery for {plugin}:{version} "
+                         f"status={result['status']} error={result['body']}")
+            s3_body = json.dumps({'error': result['body']})
+        manifests[(plugin, version)] = s3_body
+        statuses[(plugin, version)] = result['status']
+    _write_manifests(s3, manifests, statuses)
+
+    report = [{'plugin': result['task'][0], 'version': result['task'][1], 'status': result['status'],
+               'duration_ms': result['duration_ms']} for result in results]
+    summary = {status: sum(1 for result in results if result['status'] == status)
+               for status in (OK, ERROR, TIMED_OUT)}
+    summary['skipped'] = len(event['plugins']) - len(targets)
+    LOGGER.info(f'Batch discovery summary {summary}')
+    return {'results': report, 'summary': summary}
@@ -65,3 +65,26 @@ class TestPluginModel:
 
         self._verify(start_time=start_time)
         assert self._last_modified == self._bucket.Object(complete_path).last_modified
+
+    @pytest.mark.parametrize('data, status, expected', [
+        ({}, None, 'pending'),
+        ({'error': 'HTTP Error 404: Not Found'}, None, 'error'),
+        (DATA_JSON, None, 'ok'),
+        ({'error': 'Discovery timed out after 300s'}, 'timed-out', 'timed-out'),
+    ])
+    def test_get_manifest_status(self, data, status, expected, env_variables, aws_credentials):
+        self._table = setup_dynamo()
+        item = create_plugin_item(PLUGIN, VERSION, data, True)
+        if status:
+            item['manifest_status'] = status
+        self._table.put_item(Item=item)
+
+        from models.pluginmetadata import PluginMetadata
+        assert expected == PluginMetadata.get_manifest_status(PLUGIN, VERSION)
+        assert {(PLUGIN, VERSION): expected} == PluginMetadata.get_manifest_statuses([(PLUGIN, VERSION), ('foo', VERSION)])
+
+    def test_get_manifest_status_missing(self, env_variables, aws_credentials):
+        self._table = setup_dynamo()
+
+        from models.pluginmetadata import PluginMetadata
+        assert PluginMetadata.get_manifest_status(PLUGIN, VERSION) is None
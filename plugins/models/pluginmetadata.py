@@ -2,11 +2,13 @@ import json
 import logging
 import os
 import time
+from typing import Dict, Iterable, Optional, Tuple
 
 from pynamodb.models import Model
 from pynamodb.attributes import UnicodeAttribute, NumberAttribute, MapAttribute
 
 from utils.s3_adapter import S3Adapter
+from utils.manifest_status import PENDING, OK, ERROR
 
 LOGGER = logging.getLogger()
 
@@ -15,6 +17,12 @@ def _get_version_type(version):
     return f'{version}:DISTRIBUTION'
 
 
+def _get_manifest_status(data: dict) -> str:
+    if not data:
+        return PENDING
+    return ERROR if 'error' in data else OK
+
+
 class PluginMetadata(Model):
     class Meta:
         host = os.getenv('LOCAL_DYNAMO_HOST')
@@ -26,19 +34,64 @@ class PluginMetadata(Model):
     version = UnicodeAttribute()
     type = UnicodeAttribute(default_for_new=lambda: 'DISTRIBUTION')
     data = MapAttribute()
+    manifest_status = UnicodeAttribute(null=True)
     last_updated_timestamp = NumberAttribute(default_for_new=lambda: round(time.time() * 1000))
 
     @staticmethod
-    def write_manifest_data(plugin: str, version: str, data_str: str):
-        start = time.perf_counter()
+    def _create(plugin: str, version: str, data_str: str, status: Optional[str]):
         data = json.loads(data_str)
-        version_type = _get_version_type(version)
-        PluginMetadata(name=plugin,
-                       version_type=version_type,
-                       version=version, data=data).save()
+        return PluginMetadata(name=plugin,
+                              version_type=_get_version_type(version),
+                              version=version,
+                              data=data,
+                              manifest_status=status or _get_manifest_status(data))
+
+    @staticmethod
+    def write_manifest_data(plugin: str, version: str, data_str: str, status: str = None):
+        start = time.perf_counter()
+        PluginMetadata._create(plugin, version, data_str, status).save()
         duration = (time.perf_counter() - start) * 1000
         logging.info(f'Put {plugin}:{version} record time taken={duration}ms')
 
+    @staticmethod
+    def write_manifest_data_batch(manifests: Dict[Tuple[str, str], str],
+                                  statuses: Dict[Tuple[str, str], str] = None):
+        start = time.perf_counter()
+        statuses = statuses or {}
+        with PluginMetadata.batch_write() as batch:
+            for (plugin, version), data_str in manifests.items():
+                batch.save(PluginMetadata._create(plugin, version, data_str, statuses.get((plugin, version))))
+        duration = (time.perf_counter() - start) * 1000
+        logging.info(f'Batch put {len(manifests)} records time taken={duration}ms')
+
+    @staticmethod
+    def get_manifest_statuses(keys: Iterable[Tuple[str, str]]) -> Dict[Tuple[str, str], str]:
+        """
+        Look up the manifest status of plugin versions by key.
+
+        :param keys: (plugin, version) pairs to look up
+        :return: status for each pair that has a record, pairs without one are omitted
+        """
+        start = time.perf_counter()
+        items = list({(plugin, _get_version_type(version)) for plugin, version in keys})
+        statuses = {}
+        for item in PluginMetadata.batch_get(items):
+            statuses[(item.name, item.version)] = item.manifest_status or _get_manifest_status(item.data.as_dict())
+        duration = (time.perf_counter() - start) * 1000
+        logging.info(f'BatchGet {len(items)} manifest statuses time taken={duration}ms')
+        return statuses
+
+    @staticmethod
+    def get_manifest_status(plugin: str, version: str) -> Optional[str]:
+        """
+        Look up the manifest status of a plugin version, None if it has no record.
+        """
+        try:
+            item = PluginMetadata.get(plugin, _get_version_type(version))
+        except PluginMetadata.DoesNotExist:
+            return None
+        return item.manifest_status or _get_manifest_status(item.data.as_dict())
+
     @staticmethod
     def verify_exists_in_dynamo(plugin, version, path):
         try:
@@ -0,0 +1,70 @@
+import hashlib
+import os
+
+import pytest
+from moto import mock_s3
+
+from conftest import TEST_BUCKET_PATH, setup_s3
+
+
+def _write_artifact(directory, name, content):
+    path = directory / name
+    path.write_bytes(content)
+    return path.as_uri(), hashlib.sha256(content).hexdigest()
+
+
+class TestArtifactCache:
+
+    def test_download_and_hit(self, tmp_path):
+        from utils.artifact_cache import ArtifactCache
+        url, sha256 = _write_artifact(tmp_path, 'foo-0.1.0.whl', b'foo')
+        cache = ArtifactCache(cache_dir=str(tmp_path / 'cache'))
+
+        path = cache.get(sha256, 'foo-0.1.0.whl', url)
+        os.remove(tmp_path / 'foo-0.1.0.whl')
+
+        assert cache.get(sha256, 'foo-0.1.0.whl', url) == path
+        with open(path, 'rb') as f:
+            assert f.read() == b'foo'
+
+    def test_sha256_mismatch(self, tmp_path):
+        from utils.artifact_cache import ArtifactCache
+        url, _ = _write_artifact(tmp_path, 'foo-0.1.0.whl', b'foo')
+        cache = ArtifactCache(cache_dir=str(tmp_path / 'cache'))
+
+        with pytest.raises(ValueError, match='sha256 mismatch'):
+            cache.get('0' * 64, 'foo-0.1.0.whl', url)
+        assert not os.path.exists(tmp_path / 'cache' / ('0' * 64) / 'foo-0.1.0.whl')
+
+    def test_lru_eviction(self, tmp_path):
+        from utils.artifact_cache import ArtifactCache
+        cache = ArtifactCache(cache_dir=str(tmp_path / 'cache'), max_bytes=20)
+        paths = {}
+        for name in ('a', 'b', 'c'):
+            url, sha256 = _write_artifact(tmp_path, name, name.encode() * 10)
+            paths[name] = cache.get(sha256, name, url)
+            # keep mtimes apart so recency is unambiguous
+            os.utime(paths[name], (len(paths), len(paths)))
+
+        assert not os.path.exists(paths['a'])
+        assert os.path.exists(paths['b'])
+        assert os.path.exists(paths['c'])
+
+
+@mock_s3
+class TestS3ArtifactCache:
+
+    def test_shared_through_s3(self, tmp_path, env_variables, aws_credentials, monkeypatch):
+        bucket = setup_s3(monkeypatch)
+        from utils.artifact_cache import ArtifactCache
+        from utils.s3_adapter import S3Adapter
+        url, sha256 = _write_artifact(tmp_path, 'foo-0.1.0.whl', b'foo')
+
+        ArtifactCache(cache_dir=str(tmp_path / 'first'), s3=S3Adapter()).get(sha256, 'foo-0.1.0.whl', url)
+        key = f'{TEST_BUCKET_PATH}/artifacts/{sha256}/foo-0.1.0.whl'
+        assert bucket.Object(key).get()['Body'].read() == b'foo'
+
+        os.remove(tmp_path / 'foo-0.1.0.whl')
+        cache = ArtifactCache(cache_dir=str(tmp_path / 'second'), s3=S3Adapter())
+        with open(cache.get(sha256, 'foo-0.1.0.whl', url), 'rb') as f:
+            assert f.read() == b'foo'
@@ -0,0 +1,228 @@
+import hashlib
+import io
+import os
+import re
+import tarfile
+import threading
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+
+import pytest
+
+MANIFEST = """name: napari-foo
+display_name: Foo
+contributions:
+  commands:
+    - id: napari-foo.read
+      title: Read foo
+      python_name: napari_foo:read
+  readers:
+    - command: napari-foo.read
+      filename_patterns: ['*.foo']
+"""
+METADATA = """Metadata-Version: 2.1
+Name: napari-foo
+Version: 0.1.0
+Summary: A foo plugin
+"""
+
+
+class _RangeRequestHandler(SimpleHTTPRequestHandler):
+    supports_range = True
+
+    def do_GET(self):
+        match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        if not self.supports_range or not match:
+            return super().do_GET()
+        with open(self.translate_path(self.path), 'rb') as f:
+            content = f.read()
+        start, end = int(match.group(1)), int(match.group(2))
+        body = content[start:end + 1]
+        self.send_response(206)
+        self.send_header('Content-Range', f'bytes {start}-{start + len(body) - 1}/{len(content)}')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class _NoRangeRequestHandler(_RangeRequestHandler):
+    supports_range = False
+
+
+class _QuietHTTPServer(ThreadingHTTPServer):
+
+    def handle_error(self, request, client_address):
+        # clients drop the connection when a full body is sent instead of a range
+        pass
+
+
+def _serve(directory, handler):
+    server = _QuietHTTPServer(('127.0.0.1', 0), partial(handler, directory=str(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _build_wheel(directory):
+    path = directory / 'napari_foo-0.1.0-py3-none-any.whl'
+    with ZipFile(path, 'w', ZIP_DEFLATED) as wheel:
+        wheel.writestr('napari_foo/__init__.py', 'def read(path):\n    pass\n')
+        wheel.writestr('napari_foo/napari.yaml', MANIFEST)
+        # large model file that should never be fetched
+        wheel.writestr('napari_foo/model.bin', os.urandom(2 * 1024 * 1024), ZIP_STORED)
+        wheel.writestr('napari_foo-0.1.0.dist-info/METADATA', METADATA)
+        wheel.writestr('napari_foo-0.1.0.dist-info/entry_points.txt',
+                       '[napari.manifest]\nnapari-foo = napari_foo:napari.yaml\n')
+    return path
+
+
+@pytest.fixture
+def wheel(tmp_path):
+    return _build_wheel(tmp_path)
+
+
+@pytest.fixture
+def range_server(tmp_path):
+    server = _serve(tmp_path, _RangeRequestHandler)
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+@pytest.fixture
+def no_range_server(tmp_path):
+    server = _serve(tmp_path, _NoRangeRequestHandler)
+    yield f'http://127.0.0.1:{server.server_port}'
+    server.shutdown()
+
+
+def test_http_range_file(wheel, range_server):
+    from utils.http_range import HTTPRangeFile
+    remote = HTTPRangeFile(f'{range_server}/{wheel.name}', wheel.stat().st_size)
+    with ZipFile(remote) as remote_zip, ZipFile(wheel) as local_zip:
+        assert remote_zip.namelist() == local_zip.namelist()
+        assert remote_zip.read('napari_foo/napari.yaml') == local_zip.read('napari_foo/napari.yaml')
+    assert remote.bytes_fetched < wheel.stat().st_size / 10
+
+
+def test_http_range_file_not_supported(wheel, no_range_server):
+    from utils.http_range import HTTPRangeFile, RangeNotSupportedError
+    with pytest.raises(RangeNotSupportedError):
+        ZipFile(HTTPRangeFile(f'{no_range_server}/{wheel.name}', wheel.stat().st_size))
+
+
+def test_get_manifest_from_remote_wheel(wheel, range_server):
+    from npe2 import get_manifest_from_wheel
+    from utils.manifest import get_manifest_from_remote_wheel
+
+    manifest = get_manifest_from_remote_wheel(f'{range_server}/{wheel.name}', wheel.stat().st_size)
+
+    assert manifest.name == 'napari-foo'
+    assert manifest.package_metadata.version == '0.1.0'
+    assert manifest.json() == get_manifest_from_wheel(str(wheel)).json()
+
+
+def test_get_manifest_from_remote_wheel_npe1(tmp_path, range_server):
+    from utils.manifest import get_manifest_from_remote_wheel
+    path = tmp_path / 'napari_bar-0.1.0-py3-none-any.whl'
+    with ZipFile(path, 'w') as wheel:
+        wheel.writestr('napari_bar/__init__.py', '')
+        wheel.writestr('napari_bar-0.1.0.dist-info/METADATA', METADATA.replace('foo', 'bar'))
+        wheel.writestr('napari_bar-0.1.0.dist-info/entry_points.txt', '[napari.plugin]\nnapari-bar = napari_bar\n')
+
+    assert get_manifest_from_remote_wheel(f'{range_server}/{path.name}', path.stat().st_size) is None
+
+
+def test_fetch_manifest_cached_falls_back_to_download(wheel, no_range_server, tmp_path, monkeypatch):
+    from utils import manifest
+    from utils.artifact_cache import ArtifactCache
+    distribution = {
+        'filename': wheel.name,
+        'url': f'{no_range_server}/{wheel.name}',
+        'size': wheel.stat().st_size,
+        'sha256': hashlib.sha256(wheel.read_bytes()).hexdigest(),
+        'packagetype': 'bdist_wheel',
+    }
+    monkeypatch.setattr(manifest, 'get_distribution', lambda plugin, version: distribution)
+    cache = ArtifactCache(cache_dir=str(tmp_path / 'cache'))
+
+    result = manifest.fetch_manifest_cached('napari-foo', '0.1.0', cache)
+
+    assert result.name == 'napari-foo'
+    assert cache.contains(distribution['sha256'], wheel.name)
+
+
+def _make_tar(path, members):
+    with tarfile.open(path, 'w:gz') as tar:
+        for member, data in members:
+            tar.addfile(member, io.BytesIO(data) if data is not None else None)
+
+
+def _tar_member(name, data=b'', **kwargs):
+    member = tarfile.TarInfo(name)
+    member.size = len(data or b'')
+    for key, value in kwargs.items():
+        setattr(member, key, value)
+    return member, data
+
+
+def test_extract_sdist_tar(tmp_path):
+    from utils.manifest import _check_tar_member, _extract_sdist
+    sdist = str(tmp_path / 'napari-foo-0.1.0.tar.gz')
+    _make_tar(sdist, [_tar_member('napari-foo-0.1.0/setup.py', b'setup()')])
+
+    _extract_sdist(sdist, str(tmp_path / 'out'))
+
+    assert (tmp_path / 'out' / 'napari-foo-0.1.0' / 'setup.py').read_bytes() == b'setup()'
+
+
+@pytest.mark.parametrize('member', [
+    _tar_member('../evil.py', b'x'),
+    _tar_member('napari-foo-0.1.0/link', None, type=tarfile.SYMTYPE, linkname='../../etc/passwd'),
+])
+def test_extract_sdist_rejects_escaping_members(tmp_path, member):
+    from utils.manifest import _check_tar_member, _extract_sdist
+    sdist = str(tmp_path / 'napari-foo-0.1.0.tar.gz')
+    _make_tar(sdist, [member])
+
+    with pytest.raises((ValueError, tarfile.TarError)):
+        _extract_sdist(sdist, str(tmp_path / 'out'))
+    with pytest.raises(ValueError):
+        _check_tar_member(member[0], str(tmp_path / 'out'))
+
+
+def test_extract_sdist_absolute_member_stays_inside(tmp_path):
+    from utils.manifest import _check_tar_member, _extract_sdist
+    sdist = str(tmp_path / 'napari-foo-0.1.0.tar.gz')
+    member = _tar_member(str(tmp_path / 'evil.py'), b'x')
+    _make_tar(sdist, [member])
+
+    with pytest.raises(ValueError):
+        _check_tar_member(member[0], str(tmp_path / 'out'))
+    try:
+        _extract_sdist(sdist, str(tmp_path / 'out'))
+    except (ValueError, tarfile.TarError):
+        pass
+    assert not (tmp_path / 'evil.py').exists()
+
+
+def test_check_tar_member_allows_internal_links(tmp_path):
+    from utils.manifest import _check_tar_member, _extract_sdist
+    member, _ = _tar_member('napari-foo-0.1.0/link', None, type=tarfile.SYMTYPE, linkname='setup.py')
+
+    _check_tar_member(member, str(tmp_path))
+
+
+def test_extract_sdist_zip(tmp_path):
+    from utils.manifest import _check_tar_member, _extract_sdist
+    sdist = str(tmp_path / 'napari-foo-0.1.0.zip')
+    with ZipFile(sdist, 'w') as archive:
+        archive.writestr('napari-foo-0.1.0/setup.py', 'setup()')
+        archive.writestr('../evil.py', 'x')
+
+    _extract_sdist(sdist, str(tmp_path / 'out'))
+
+    assert (tmp_path / 'out' / 'napari-foo-0.1.0' / 'setup.py').read_text() == 'setup()'
+    assert not (tmp_path / 'evil.py').exists()
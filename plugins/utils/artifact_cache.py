@@ -0,0 +1,120 @@
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+from typing import Optional
+from urllib import request
+
+from utils.s3_adapter import S3Adapter
+
+LOGGER = logging.getLogger()
+
+DEFAULT_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'artifact-cache')
+# Lambda /tmp defaults to 512MB and is also used for unpacking distributions
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+_CHUNK_SIZE = 1024 * 1024
+
+
+class ArtifactCache:
+    """
+    Content-addressed cache for distribution files, keyed by the sha256 digest
+    PyPI publishes for each file. Files live on local disk and are evicted in
+    least recently used order once their total size exceeds max_bytes. When an
+    S3Adapter is given, files are also shared through `artifacts/` in its bucket
+    so that other invocations can skip the PyPI download.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR,
+                 max_bytes: int = DEFAULT_MAX_BYTES,
+                 s3: Optional[S3Adapter] = None):
+        self._cache_dir = cache_dir
+        self._max_bytes = max_bytes
+        self._s3 = s3
+        # in-flight downloads are kept apart so eviction never sees them
+        self._download_dir = os.path.join(cache_dir, '.downloads')
+        os.makedirs(self._download_dir, exist_ok=True)
+
+    def _get_local_path(self, sha256: str, filename: str) -> str:
+        return os.path.join(self._cache_dir, sha256, filename)
+
+    def contains(self, sha256: str, filename: str) -> bool:
+        return os.path.exists(self._get_local_path(sha256, filename))
+
+    def get(self, sha256: str, filename: str, url: str) -> str:
+        """
+        Get the local path of a distribution file, fetching it from S3 or url
+        when it is not cached locally.
+
+        :param sha256: expected sha256 hex digest of the file
+        :param filename: name of the distribution file
+        :param url: url to download the file from on a cache miss
+        :return: path to the cached file
+        """
+        path = self._get_local_path(sha256, filename)
+        if os.path.exists(path):
+            # mtime tracks recency of use for eviction
+            os.utime(path)
+            LOGGER.info(f'Artifact cache hit for {filename}')
+            return path
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self._download_dir)
+        os.close(fd)
+        try:
+            s3_key = f'artifacts/{sha256}/{filename}'
+            from_s3 = self._s3 is not None and self._s3.download_file(s3_key, tmp_path)
+            if not from_s3:
+                self._download(url, tmp_path)
+            actual = _sha256(tmp_path)
+            if actual != sha256:
+                raise ValueError(f'sha256 mismatch for {filename} expected={sha256} actual={actual}')
+            if self._s3 is not None and not from_s3:
+                self._s3.upload_file(tmp_path, s3_key)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+        self._evict(keep=path)
+        return path
+
+    @staticmethod
+    def _download(url: str, filename: str):
+        start = time.perf_counter()
+        with request.urlopen(url) as response, open(filename, 'wb') as f:
+            shutil.copyfileobj(response, f, _CHUNK_SIZE)
+        duration = (time.perf_counter() - start) * 1000
+        LOGGER.info(f'Downloaded {url} time taken={duration}ms')
+
+    def _evict(self, keep: str):
+        entries = []
+        for root, dirs, files in os.walk(self._cache_dir):
+            if root == self._cache_dir:
+                dirs.remove('.downloads')
+            for name in files:
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            if path == keep:
+                continue
+            LOGGER.info(f'Evicting {path} from artifact cache')
+            shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+            total -= size
+
+
+def _sha256(filename: str) -> str:
+    digest = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
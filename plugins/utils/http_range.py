@@ -0,0 +1,84 @@
+import io
+import logging
+from urllib import request
+
+LOGGER = logging.getLogger()
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+
+class RangeNotSupportedError(Exception):
+    """Raised when a server answers a range request with the full body."""
+
+
+class HTTPRangeFile(io.RawIOBase):
+    """
+    Read-only, seekable file over a remote url that fetches only the byte
+    ranges being read, using HTTP Range requests.
+
+    Reads are rounded out to block_size and fetched blocks are kept, so that
+    zipfile.ZipFile can locate the end of central directory record, read the
+    central directory and open individual members with a handful of requests
+    instead of downloading the whole archive.
+    """
+
+    def __init__(self, url: str, size: int, block_size: int = DEFAULT_BLOCK_SIZE):
+        self._url = url
+        self._size = size
+        self._block_size = block_size
+        self._position = 0
+        self._blocks = {}
+        self.request_count = 0
+        self.bytes_fetched = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def tell(self):
+        return self._position
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_SET:
+            position = offset
+        elif whence == io.SEEK_CUR:
+            position = self._position + offset
+        elif whence == io.SEEK_END:
+            position = self._size + offset
+        else:
+            raise ValueError(f'Invalid whence {whence}')
+        self._position = max(position, 0)
+        return self._position
+
+    def readinto(self, buffer):
+        end = min(self._position + len(buffer), self._size)
+        if self._position >= end:
+            return 0
+        first, last = self._position // self._block_size, (end - 1) // self._block_size
+        self._fetch_blocks(first, last)
+        data = b''.join(self._blocks[index] for index in range(first, last + 1))
+        offset = self._position - first * self._block_size
+        count = end - self._position
+        buffer[:count] = data[offset:offset + count]
+        self._position = end
+        return count
+
+    def _fetch_blocks(self, first: int, last: int):
+        missing = [index for index in range(first, last + 1) if index not in self._blocks]
+        if not missing:
+            return
+        # one request covering every missing block, even if some are cached
+        start = missing[0] * self._block_size
+        end = min((missing[-1] + 1) * self._block_size, self._size) - 1
+        req = request.Request(self._url, headers={'Range': f'bytes={start}-{end}'})
+        with request.urlopen(req) as response:
+            if response.status != 206:
+                raise RangeNotSupportedError(f'Range requests not supported for {self._url}')
+            data = response.read()
+        self.request_count += 1
+        self.bytes_fetched += len(data)
+        for index in range(missing[0], missing[-1] + 1):
+            offset = index * self._block_size - start
+            self._blocks[index] = data[offset:offset + self._block_size]
@@ -0,0 +1,176 @@
+import json
+import logging
+import os
+import subprocess
+import sys
+import tarfile
+import tempfile
+from importlib import metadata
+from pathlib import Path
+from typing import Dict, Optional
+from urllib import request
+from zipfile import ZipFile
+
+from npe2 import PackageMetadata, PluginManifest, get_manifest_from_wheel
+
+from utils.artifact_cache import ArtifactCache
+from utils.http_range import HTTPRangeFile, RangeNotSupportedError
+
+LOGGER = logging.getLogger()
+
+NPE2_ENTRY_POINT = 'napari.manifest'
+
+
+def get_distribution(plugin: str, version: str) -> Dict[str, str]:
+    """
+    Get the distribution file to discover the manifest from, preferring a pure
+    python wheel, then any wheel, then the sdist.
+
+    :param plugin: name of the plugin
+    :param version: version of the plugin
+    :return: dict with the filename, url, size, sha256 and packagetype of the file
+    """
+    with request.urlopen(f'https://pypi.org/pypi/{plugin}/json') as response:
+        releases = json.load(response)['releases']
+    files = releases.get(version.lstrip('v'))
+    if files is None:
+        raise ValueError(f'{plugin} does not have version {version}')
+
+    def _rank(file):
+        if file['packagetype'] == 'bdist_wheel':
+            return 0 if file['filename'].endswith('-none-any.whl') else 1
+        return 2
+
+    candidates = sorted((file for file in files if file['packagetype'] in ('bdist_wheel', 'sdist')),
+                        key=_rank)
+    if not candidates:
+        raise ValueError(f'No wheel or sdist found for {plugin}:{version}')
+    file = candidates[0]
+    return {
+        'filename': file['filename'],
+        'url': file['url'],
+        'size': file['size'],
+        'sha256': file['digests']['sha256'],
+        'packagetype': file['packagetype'],
+    }
+
+
+def _check_tar_member(member: tarfile.TarInfo, dest_dir: str):
+    """
+    Reject tar members that would be written or link outside of dest_dir, or
+    that are devices, like the 'data' extraction filter does on newer pythons.
+    """
+    dest_dir = os.path.realpath(dest_dir)
+    target = os.path.realpath(os.path.join(dest_dir, member.name))
+    if os.path.commonpath([dest_dir, target]) != dest_dir:
+        raise ValueError(f'sdist member {member.name} is outside of the extraction directory')
+    if member.issym() or member.islnk():
+        link_base = os.path.dirname(target) if member.issym() else dest_dir
+        link_target = os.path.realpath(os.path.join(link_base, member.linkname))
+        if os.path.isabs(member.linkname) or os.path.commonpath([dest_dir, link_target]) != dest_dir:
+            raise ValueError(f'sdist member {member.name} links outside of the extraction directory')
+    elif not (member.isfile() or member.isdir()):
+        raise ValueError(f'sdist member {member.name} is not a regular file or directory')
+
+
+def _extract_sdist(sdist: str, dest_dir: str):
+    """
+    Extract a .tar.gz or .zip sdist, which comes from an untrusted upload, to dest_dir.
+    """
+    if sdist.endswith('.zip'):
+        # ZipFile.extract sanitizes absolute and parent paths, and writes links as regular files
+        with ZipFile(sdist) as archive:
+            archive.extractall(dest_dir)
+        return
+    with tarfile.open(sdist) as tar:
+        if hasattr(tarfile, 'data_filter'):
+            tar.extractall(dest_dir, filter='data')
+            return
+        members = tar.getmembers()
+        for member in members:
+            _check_tar_member(member, dest_dir)
+        tar.extractall(dest_dir, members=members)
+
+
+def _get_manifest_from_sdist(sdist: str) -> PluginManifest:
+    with tempfile.TemporaryDirectory() as td:
+        src_root = os.path.join(td, 'src')
+        _extract_sdist(sdist, src_root)
+        src_dir = next(entry.path for entry in os.scandir(src_root) if entry.is_dir())
+        dist_dir = os.path.join(td, 'dist')
+        subprocess.run([sys.executable, '-m', 'build', '-w', src_dir, '-o', dist_dir],
+                       check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        wheel = next(entry.path for entry in os.scandir(dist_dir) if entry.name.endswith('.whl'))
+        return get_manifest_from_wheel(wheel)
+
+
+def get_manifest_from_remote_wheel(url: str, size: int) -> Optional[PluginManifest]:
+    """
+    Read the npe2 manifest of a remote wheel with HTTP range requests, fetching
+    only the zip central directory, the dist-info metadata, the entry points
+    and the manifest file itself.
+
+    :param url: url of the wheel
+    :param size: size of the wheel in bytes
+    :return: manifest for the wheel, None if it has no npe2 entry point
+    """
+    remote = HTTPRangeFile(url, size)
+    with ZipFile(remote) as wheel, tempfile.TemporaryDirectory() as td:
+        names = set(wheel.namelist())
+        dist_info = next((name.split('/')[0] for name in names
+                          if name.count('/') == 1 and name.endswith('.dist-info/METADATA')), None)
+        if dist_info is None:
+            raise ValueError(f'No dist-info metadata found in {url}')
+        for member in ('METADATA', 'entry_points.txt'):
+            if f'{dist_info}/{member}' in names:
+                wheel.extract(f'{dist_info}/{member}', td)
+
+        dist = metadata.PathDistribution(Path(td) / dist_info)
+        entry_point = next((ep for ep in dist.entry_points if ep.group == NPE2_ENTRY_POINT), None)
+        if entry_point is None:
+            return None
+        match = entry_point.pattern.match(entry_point.value)
+        manifest_member = '/'.join(match.group('module').split('.') + [match.group('attr')])
+        if manifest_member not in names:
+            raise ValueError(f"manifest {match.group('attr')!r} does not exist in distribution "
+                             f"for {dist.metadata['Name']}")
+        wheel.extract(manifest_member, td)
+
+        manifest = PluginManifest.from_file(os.path.join(td, manifest_member))
+        manifest.package_metadata = PackageMetadata.from_dist_metadata(dist.metadata)
+
+    LOGGER.info(f'Read manifest from {url} with {remote.request_count} range requests '
+                f'fetching {remote.bytes_fetched} of {size} bytes')
+    return manifest
+
+
+def fetch_manifest_cached(plugin: str, version: str, cache: ArtifactCache) -> PluginManifest:
+    """
+    Discover the manifest for a plugin version from its distribution file.
+
+    npe2 manifests of wheels that are not cached yet are read with range
+    requests. sdists and npe1 plugins, whose contributions can only be found
+    by importing the package, need the whole file, which is resolved through
+    the artifact cache before downloading it.
+
+    :param plugin: name of the plugin
+    :param version: version of the plugin
+    :param cache: artifact cache to resolve the distribution file through
+    :return: manifest for the plugin version
+    """
+    distribution = get_distribution(plugin, version)
+    is_wheel = distribution['packagetype'] == 'bdist_wheel'
+    if is_wheel and not cache.contains(distribution['sha256'], distribution['filename']):
+        try:
+            manifest = get_manifest_from_remote_wheel(distribution['url'], distribution['size'])
+            if manifest is not None:
+                return manifest
+            LOGGER.info(f'No npe2 entry point for {plugin}:{version}, falling back to full download')
+        except RangeNotSupportedError:
+            LOGGER.warning(f'Range requests not supported for {plugin}:{version}, '
+                           f'falling back to full download')
+
+    path = cache.get(distribution['sha256'], distribution['filename'], distribution['url'])
+    if is_wheel:
+        return get_manifest_from_wheel(path)
+    return _get_manifest_from_sdist(path)
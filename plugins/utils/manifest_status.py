@@ -0,0 +1,4 @@
+# Manifest discovery statuses, stored as `manifest_status` on the plugin-metadata record
+from nhcommons.utils.task_status import OK, ERROR, TIMED_OUT  # noqa: F401
+
+PENDING = 'pending'
@@ -3,6 +3,7 @@ import os
 import time
 
 import boto3
+from botocore.exceptions import ClientError
 
 LOGGER = logging.getLogger()
 
@@ -38,7 +39,10 @@ class S3Adapter:
             LOGGER.info(f'Getobject from {self._bucket} path={complete_path} '
                         f'time taken={duration}')
 
-    def write_to_s3(self, data, path):
+    def write_to_s3(self, data, path) -> bool:
+        """
+        :return: True if the object was written, False if the write failed
+        """
         complete_path = self._get_complete_path(path)
         LOGGER.info(f'Writing {data} to {path} in {self._bucket}')
         start = time.perf_counter()
@@ -46,22 +50,81 @@ class S3Adapter:
             self._client.put_object(Bucket=self._bucket,
                                     Key=complete_path,
                                     Body=data)
+            return True
         except Exception:
             LOGGER.exception(f'Error when writing to {self._bucket} '
                              f'path={complete_path}')
+            return False
         finally:
             duration = (time.perf_counter() - start) * 1000
             LOGGER.info(f'Writing to {self._bucket} path={complete_path}'
                         f' time taken={duration}')
 
-    def get_object_list_in_bucket(self, path=''):
+    def delete_prefix(self, prefix):
+        """
+        Delete all objects with keys starting with prefix.
+        """
+        start = time.perf_counter()
+        complete_prefix = self._get_complete_path(prefix)
+        try:
+            paginator = self._client.get_paginator('list_objects_v2')
+            for page in paginator.paginate(Bucket=self._bucket, Prefix=complete_prefix):
+                objects = [{'Key': obj['Key']} for obj in page.get('Contents', [])]
+                if objects:
+                    self._client.delete_objects(Bucket=self._bucket,
+                                                Delete={'Objects': objects})
+        except Exception:
+            LOGGER.exception(f'Error when deleting from {self._bucket} '
+                             f'prefix={complete_prefix}')
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            LOGGER.info(f'Deleting from {self._bucket} prefix={complete_prefix} '
+                        f'time taken={duration}')
+
+    def object_exists(self, path):
         start = time.perf_counter()
         complete_path = self._get_complete_path(path)
         try:
-            bucket_list = self._client.list_objects(Bucket=self._bucket,
-                                                    Prefix=complete_path)
-            return bucket_list.get('Contents', [])
+            self._client.head_object(Bucket=self._bucket, Key=complete_path)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return False
+            raise
         finally:
             duration = (time.perf_counter() - start) * 1000
-            LOGGER.info(f'Listing objects in {self._bucket} '
-                        f'prefix={complete_path} time taken={duration}')
+            LOGGER.info(f'Headobject from {self._bucket} path={complete_path} '
+                        f'time taken={duration}')
+
+    def download_file(self, path, filename):
+        """
+        Download the object at path to filename.
+
+        :return: True if the object was downloaded, False if it does not exist
+        """
+        start = time.perf_counter()
+        complete_path = self._get_complete_path(path)
+        try:
+            self._client.download_file(self._bucket, complete_path, filename)
+            return True
+        except ClientError as e:
+            if e.response['Error']['Code'] in ('404', 'NoSuchKey'):
+                return False
+            raise
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            LOGGER.info(f'Downloading from {self._bucket} path={complete_path} '
+                        f'time taken={duration}')
+
+    def upload_file(self, filename, path):
+        start = time.perf_counter()
+        complete_path = self._get_complete_path(path)
+        try:
+            self._client.upload_file(filename, self._bucket, complete_path)
+        except Exception:
+            LOGGER.exception(f'Error when uploading to {self._bucket} '
+                             f'path={complete_path}')
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            LOGGER.info(f'Uploading to {self._bucket} path={complete_path} '
+                        f'time taken={duration}')